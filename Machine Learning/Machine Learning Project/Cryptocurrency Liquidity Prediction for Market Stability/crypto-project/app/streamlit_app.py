@@ -1,23 +1,39 @@
 # app/app.py
 import streamlit as st
 import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
-from datetime import datetime, date
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
+from datetime import date
 import logging
-import io
 import json
+import sys
+import time
+import uuid
 
 # -------------------------
 # Config & Paths
 # -------------------------
 st.set_page_config(page_title="Crypto Liquidity Predictor", layout="wide", initial_sidebar_state="collapsed")
 BASE_DIR = Path(__file__).resolve().parents[1]
-MODEL_PATH = BASE_DIR / "models" / "Linear_Regression.pkl"
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))  # so `src` is importable when run from app/
+
+from src.jobs import JobRunner, ACTIVE, QUEUED, RUNNING, DONE
+from src.predict import MODEL_FEATURES, UI_FIELDS, predict_features as model_input_features, predict_from_dict
+from src.predict import model_feature_names as fitted_feature_names, coefficient_table
+from src.registry import ModelRegistry, LiveModel, ModelPool, CURRENT
+from src.shadow import ShadowScorer
+from src.admission import AdmissionController, QueueFull
+from src.history import HistoryStore, HistoryWriter
+from src.reports import ReportRenderer
+from src.autofill import CoinIndex
+from src.datastore import load_engineered
+from src.sweep import SweepEngine, around
+from src.inference import vector_from_dict
+from src.charts import coef_bar_spec, sweep_line_spec, sweep_heatmap_spec, daily_mean_spec, coin_daily_spec
+
+MODELS_DIR = BASE_DIR / "models"  # registry: versioned artifacts + metadata.json
+MODEL_PATH = MODELS_DIR / "Linear_Regression.pkl"  # used until a version is registered
 ENGINEERED_CSV = BASE_DIR / "data" / "processed" / "engineered_features.csv"  # optional autofill
 
 LOG_DIR = BASE_DIR / "logs"
@@ -26,129 +42,191 @@ LOG_DIR.mkdir(parents=True, exist_ok=True)
 REPORT_DIR.mkdir(parents=True, exist_ok=True)
 
 LOG_FILE = LOG_DIR / "app.log"
-CSV_HISTORY = REPORT_DIR / "predictions" / "prediction_history.csv"
+CSV_HISTORY = REPORT_DIR / "predictions" / "prediction_history.csv"  # legacy, imported once into HISTORY_DIR
+HISTORY_DIR = REPORT_DIR / "predictions" / "history"  # date-partitioned Parquet store
+JOBS_DIR = REPORT_DIR / "predictions" / "jobs"  # background batch jobs (src/jobs.py)
 
 # logging
 logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 
 # -------------------------
-# The model expects only these numeric features at predict time:
+# Load model safely (hot-reloaded from the registry, see src/registry.py)
 # -------------------------
-MODEL_FEATURES = [
-    "price",
-    "1h",
-    "24h",
-    "7d",
-    "24h_volume",
-    "mkt_cap",
-    "liquidity_ratio",
-    "price_change_24h",
-]
-
-# Full UI fields (includes coin/symbol/date for UX) — match schema you gave
-UI_FIELDS = [
-    "coin", "symbol", "price", "1h", "24h", "7d",
-    "24h_volume", "mkt_cap", "date", "liquidity_ratio", "price_change_24h"
-]
+@st.cache_resource
+def get_live_model(models_dir: Path, fallback: Path):
+    # one watcher per server process; new versions are validated, then swapped in
+    return LiveModel(ModelRegistry(models_dir), fallback_path=fallback).start()
+
+try:
+    live_model = get_live_model(MODELS_DIR, MODEL_PATH)
+except Exception as e:
+    st.error(f"Failed to load model: {e}")
+    st.stop()
 
-# -------------------------
-# Load model safely
-# -------------------------
 @st.cache_resource
-def load_model(path: Path):
-    if not path.exists():
-        st.error(f"Model not found: {path}")
-        st.stop()
-    try:
-        m = joblib.load(path)
-        return m
-    except Exception as e:
-        st.error(f"Failed to load model: {e}")
-        st.stop()
+def get_model_pool(models_dir: Path, fallback: Path):
+    # every models/*.pkl, loaded on first use and shared by all sessions
+    return ModelPool(get_live_model(models_dir, fallback))
 
-model = load_model(MODEL_PATH)
+model_pool = get_model_pool(MODELS_DIR, MODEL_PATH)
 
-# If model exposes feature_names_in_, use it to reorder
+# One snapshot per rerun: a swap mid-run never mixes two models in one page.
+# The "Model" selectbox (left panel) is read here so every view matches it.
+model_choice = st.session_state.get("model_choice", CURRENT)
 try:
-    model_feature_names = list(model.feature_names_in_)
-except Exception:
-    model_feature_names = MODEL_FEATURES.copy()
+    serving = model_pool.get(model_choice)
+except Exception as e:
+    st.warning(f"Could not load model {model_choice} ({e}); using the current model.")
+    st.session_state.pop("model_choice", None)
+    model_choice, serving = CURRENT, live_model.get()
+model = serving.model
+model_key = serving.key  # sha256:mtime of the artifact
+
+# -------------------------
+# Model-derived views, computed once per model version, not per rerun
+# -------------------------
+@st.cache_data(show_spinner=False, max_entries=4)
+def model_views(model_key: str, _model):
+    imp_df = coefficient_table(_model)
+    return {
+        # If model exposes feature_names_in_, use it to reorder
+        "feature_names": fitted_feature_names(_model),
+        # Column order actually sent to the model: model order when we can provide all of it
+        "predict_features": model_input_features(_model),
+        "coef_table": imp_df,
+        # chart spec (data only), drawn by the browser
+        "coef_chart": None if imp_df is None else coef_bar_spec(imp_df, top=12),
+    }
+
+views = model_views(model_key, model)
+model_feature_names = views["feature_names"]
+predict_features = views["predict_features"]
+
+# Inference backend: closed-form dot product for linear models, model.predict otherwise
+backend = serving.backend
+
+# What-if sweeps for the preview charts (results cached by base vector + axes)
+@st.cache_resource(max_entries=4)
+def get_sweep_engine(_backend, model_key: str):
+    return SweepEngine(_backend)
+
+sweep_engine = get_sweep_engine(backend, model_key)
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def sweep_chart(model_key: str, base: tuple, sweep_x: str, sweep_y: str, span: int):
+    # spec per (model, inputs, axes); the sweep itself is cached by the engine
+    base_vec = np.asarray(base)
+    x_vals = around(base_vec[predict_features.index(sweep_x)], span / 100, 30 if sweep_y == "-- none --" else 60)
+    if sweep_y == "-- none --":
+        return sweep_line_spec(x_vals, sweep_engine.sweep(base_vec, {sweep_x: x_vals}), sweep_x)
+    y_vals = around(base_vec[predict_features.index(sweep_y)], span / 100, 60)
+    grid = sweep_engine.sweep(base_vec, {sweep_x: x_vals, sweep_y: y_vals})
+    return sweep_heatmap_spec(x_vals, y_vals, grid, sweep_x, sweep_y)
+
+# Shadow scoring: a candidate model re-scores the same inputs off the request path
+@st.cache_resource
+def get_shadow_scorer(primary: str, candidate: str):
+    # one scorer (and one set of metrics) per primary/candidate pair
+    pool = get_model_pool(MODELS_DIR, MODEL_PATH)
+    return ShadowScorer(lambda: pool.get(candidate).backend, name=candidate)
+
+shadow_choice = st.session_state.get("shadow_choice", "-- none --")
+shadow = None if shadow_choice in ("-- none --", model_choice) else get_shadow_scorer(model_choice, shadow_choice)
 
 # -------------------------
 # Optional engineered CSV for autofill (not used for prediction)
 # -------------------------
-@st.cache_data
 def load_engineered_csv(path: Path):
+    # compact dtypes, memory-mapped from a binary copy built on first use
     if path.exists():
         try:
-            return pd.read_csv(path)
+            return load_engineered(path)
         except Exception:
+            logging.exception("Failed to load engineered features")
             return None
     return None
 
-engineered_df = load_engineered_csv(ENGINEERED_CSV)
+# Only the per-coin index is cached; the full frame is dropped once it is built
+@st.cache_data
+def load_coin_index(path: Path):
+    df = load_engineered_csv(path)
+    if df is None or "coin" not in df.columns:
+        return None
+    return CoinIndex.from_frame(df)
+
+coin_index = load_coin_index(ENGINEERED_CSV)
+AUTOFILL_MAX_OPTIONS = 1000  # selectbox options shown at once; narrow with the prefix search
 
 # -------------------------
 # Helpers
 # -------------------------
-def prepare_model_df_from_ui_dict(d: dict) -> pd.DataFrame:
-    """
-    Create a DataFrame containing only the numeric MODEL_FEATURES.
-    Reorder to match model.feature_names_in_ if available.
-    """
-    row = {}
-    for f in MODEL_FEATURES:
-        v = d.get(f, 0.0)
-        try:
-            # allow empty strings -> 0.0
-            if v == "" or v is None:
-                v = 0.0
-            v = float(v)
-        except Exception:
-            v = 0.0
-        row[f] = v
-    df = pd.DataFrame([row])
-    # If model expects a specific order/columns, reorder / select intersection
-    # Use model_feature_names (from loaded model) but only keep the ones we can provide
-    if all(name in df.columns for name in model_feature_names):
-        df = df[model_feature_names]
-    else:
-        # select MODEL_FEATURES order
-        df = df[MODEL_FEATURES]
-    return df
+# PDF reports render on a shared worker pool, only when asked for, cached by input
+@st.cache_resource
+def get_report_renderer(out_dir: Path):
+    return ReportRenderer(out_dir)
+
+# One store + writer thread per server process, shared by all sessions
+@st.cache_resource
+def get_history_store(root: Path):
+    store = HistoryStore(root)
+    if store.is_empty() and CSV_HISTORY.exists():
+        n = store.import_csv(CSV_HISTORY)
+        logging.info(f"Imported {n} legacy history rows from {CSV_HISTORY}")
+    return store
+
+@st.cache_resource
+def get_history_writer(root: Path):
+    return HistoryWriter(get_history_store(root))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def daily_chart(root: Path, stamp):
+    return daily_mean_spec(get_history_store(root).daily_stats())
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def coin_chart(root: Path, stamp, coins: tuple):
+    return coin_daily_spec(get_history_store(root).coin_daily_stats(list(coins)))
 
-def generate_pdf(input_row: dict, pred: float):
-    fname = f"liquidity_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    path = REPORT_DIR / fname
-    c = canvas.Canvas(str(path), pagesize=letter)
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, 760, "Crypto Liquidity Prediction Report")
-    c.setFont("Helvetica", 10)
-    c.drawString(40, 742, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    c.drawString(40, 724, f"Predicted liquidity_score: {pred:.6f}")
-    y = 702
-    c.drawString(40, y, "Input features:")
-    y -= 18
-    for col, val in input_row.items():
-        line = f"{col}: {val}"
-        c.drawString(50, y, line[:120])
-        y -= 14
-        if y < 60:
-            c.showPage()
-            c.setFont("Helvetica", 10)
-            y = 750
-    c.save()
-    return path
+# Admission control shared by all sessions: at most BATCH_JOBS batch jobs run at
+# once (others wait in a FIFO queue, see get_job_runner), single predictions are
+# rate limited per session
+BATCH_JOBS = 2
+BATCH_QUEUE = 20
+SINGLE_RATE, SINGLE_BURST = 5.0, 10  # predictions / second, burst
+
+@st.cache_resource
+def get_admission():
+    return AdmissionController(max_batch_jobs=BATCH_JOBS, max_queue=BATCH_QUEUE,
+                               single_rate=SINGLE_RATE, single_burst=SINGLE_BURST)
+
+admission = get_admission()
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
 
 def save_history_csv(ui_df: pd.DataFrame, preds, mode: str):
-    out = ui_df.copy().reset_index(drop=True)
-    out["prediction"] = preds
-    out["mode"] = mode
-    out["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    if CSV_HISTORY.exists():
-        out.to_csv(CSV_HISTORY, mode="a", header=False, index=False)
-    else:
-        out.to_csv(CSV_HISTORY, index=False)
+    # queued: the background writer appends it to the history store (off the request path)
+    get_history_writer(HISTORY_DIR).write(ui_df, preds, mode)
+
+def with_ui_fields(df: pd.DataFrame) -> pd.DataFrame:
+    for col in UI_FIELDS:
+        if col not in df.columns:
+            df[col] = "" if col in ("coin","symbol","date") else 0.0
+    return df
+
+# Batch predictions run as background jobs on a shared worker pool, chunk by chunk;
+# the page only polls their progress. Jobs left unfinished by a restart resume here.
+@st.cache_resource
+def get_job_runner(root: Path):
+    pool = get_model_pool(MODELS_DIR, MODEL_PATH)
+    writer = get_history_writer(HISTORY_DIR)  # resolved here: workers run outside any session
+
+    def _on_chunk(job, chunk):
+        writer.write(with_ui_fields(chunk)[UI_FIELDS], chunk["prediction"].to_numpy(), "batch")
+
+    runner = JobRunner(root, pool.get, max_workers=BATCH_JOBS,
+                       admission=get_admission(), on_chunk=_on_chunk)
+    resumed = runner.recover()
+    if resumed:
+        logging.info(f"Resumed batch jobs: {resumed}")
+    return runner
 
 # -------------------------
 # THEME / GITHUB-DARK CSS (B1) and button fixes
@@ -243,6 +321,8 @@ else:
 with top2:
     st.title("🔮 Crypto Liquidity Predictor")
     st.markdown("<div class='small'>Predict short-term liquidity_score. Use numeric inputs only (the model will ignore coin/symbol/date).</div>", unsafe_allow_html=True)
+    _entry = serving.entry or {}
+    st.caption(f"Model: {_entry.get('model_name', serving.path.stem)} {_entry.get('version', '')}".rstrip())
 with top3:
     # Use a regular button that toggles show_help in session state
     if st.button("Help"):
@@ -273,246 +353,350 @@ if st.session_state.show_help:
 st.markdown("---")
 
 # -------------------------
-# Layout: left inputs, right charts
+# Which model serves this session, and optionally which candidate shadows it
+# (outside the panels: switching model reruns the whole page)
 # -------------------------
-left, right = st.columns([1.1, 1])
+model_names = model_pool.names()
+if st.session_state.get("model_choice", CURRENT) not in model_names:
+    st.session_state.model_choice = CURRENT
+if st.session_state.get("shadow_choice", "-- none --") not in ["-- none --"] + model_names:
+    st.session_state.shadow_choice = "-- none --"
+m1, m2 = st.columns(2)
+with m1:
+    st.selectbox("Model", model_names, key="model_choice")
+with m2:
+    st.selectbox("Shadow-score with (optional)", ["-- none --"] + model_names, key="shadow_choice")
 
 # -------------------------
-# LEFT: Inputs & Batch
+# Panels are fragments: a widget only reruns the panel it belongs to, not the
+# whole script (CSS, model views, auto-fill index, history reads...).
+#   input panel    inputs + single predict + what-if preview (the preview follows the inputs)
+#   batch panel    CSV / editable table -> background batch job
+#   job panel      progress / cancel / resume / download of this session's last job (polled while it runs)
+#   insights panel coefficients + shadow metrics (refreshed on a timer while shadowing)
+#   history panel  recent predictions + daily charts, refreshed on a timer
 # -------------------------
-with left:
-    st.markdown("<div class='card'>", unsafe_allow_html=True)
-    st.subheader("📥 Input (numeric features)")
-
-    # optional autofill
-    coin_choice = None
-    if engineered_df is not None and "coin" in engineered_df.columns:
-        coin_choice = st.selectbox("Auto-fill by coin (optional)", ["-- none --"] + engineered_df["coin"].dropna().unique().tolist())
-    else:
-        st.info("Auto-fill unavailable (engineered CSV missing).")
-        coin_choice = "-- none --"
-
-    # prepare ui dict with defaults or autofill
-    ui = {}
-    if coin_choice and coin_choice != "-- none --":
-        sample = engineered_df[engineered_df["coin"] == coin_choice].iloc[0]
-        ui = {
-            "coin": sample.get("coin", ""),
-            "symbol": sample.get("symbol", ""),
-            "price": sample.get("price", 0.0),
-            "1h": sample.get("1h", 0.0),
-            "24h": sample.get("24h", 0.0),
-            "7d": sample.get("7d", 0.0),
-            "24h_volume": sample.get("24h_volume", 0.0),
-            "mkt_cap": sample.get("mkt_cap", 0.0),
-            "date": sample.get("date", str(date.today())),
-            "liquidity_ratio": sample.get("liquidity_ratio", 0.0),
-            "price_change_24h": sample.get("price_change_24h", 0.0)
-        }
-        st.success("Auto-filled (editable).")
-    else:
-        ui = {
-            "coin": "",
-            "symbol": "",
-            "price": 0.0,
-            "1h": 0.0,
-            "24h": 0.0,
-            "7d": 0.0,
-            "24h_volume": 0.0,
-            "mkt_cap": 0.0,
-            "date": str(date.today()),
-            "liquidity_ratio": 0.0,
-            "price_change_24h": 0.0
-        }
-
-    # Only numeric fields used by model are presented as inputs (but we also show coin/symbol/date for UX)
-    st.markdown("**General (for history only)**")
-    g1, g2, g3 = st.columns(3)
-    with g1:
-        ui["coin"] = st.text_input("Coin (optional)", value=ui["coin"])
-    with g2:
-        ui["symbol"] = st.text_input("Symbol (optional)", value=ui["symbol"])
-    with g3:
-        ui["date"] = st.text_input("Date (YYYY-MM-DD)", value=str(ui["date"]))
-
-    st.markdown("**Price & Volume**")
-    p1, p2, p3 = st.columns(3)
-    with p1:
-        ui["price"] = st.number_input("price", value=float(ui["price"]))
-        ui["24h_volume"] = st.number_input("24h_volume", value=float(ui["24h_volume"]))
-    with p2:
-        ui["mkt_cap"] = st.number_input("mkt_cap", value=float(ui["mkt_cap"]))
-        ui["liquidity_ratio"] = st.number_input("liquidity_ratio", value=float(ui["liquidity_ratio"]))
-    with p3:
-        ui["price_change_24h"] = st.number_input("price_change_24h", value=float(ui["price_change_24h"]))
-
-    st.markdown("**Price Changes**")
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        ui["1h"] = st.number_input("1h (decimal)", value=float(ui["1h"]))
-    with c2:
-        ui["24h"] = st.number_input("24h (decimal)", value=float(ui["24h"]))
-    with c3:
-        ui["7d"] = st.number_input("7d (decimal)", value=float(ui["7d"]))
-
-    st.markdown("---")
-
-    # -----------------------------
-    # Predict Button
-    # -----------------------------
-    if st.button("🚀 Predict Liquidity Score", use_container_width=True):
+HISTORY_REFRESH_SECONDS = 10
+SHADOW_REFRESH_SECONDS = 5
+JOB_REFRESH_SECONDS = 2
+
+@st.fragment
+def input_panel():
+    left, right = st.columns([1.1, 1])
+    with left:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.subheader("📥 Input (numeric features)")
+
+        # optional autofill
+        coin_choice = None
+        if coin_index is not None:
+            a1, a2 = st.columns([1, 2])
+            with a1:
+                coin_prefix = st.text_input("Search coin (prefix)", value="")
+            matches = coin_index.search(coin_prefix, limit=AUTOFILL_MAX_OPTIONS)
+            with a2:
+                coin_choice = st.selectbox("Auto-fill by coin (optional)", ["-- none --"] + matches)
+            if len(matches) == AUTOFILL_MAX_OPTIONS:
+                st.caption(f"Showing the first {AUTOFILL_MAX_OPTIONS} of {len(coin_index):,} coins; type a prefix to narrow.")
+        else:
+            st.info("Auto-fill unavailable (engineered CSV missing).")
+            coin_choice = "-- none --"
+
+        # prepare ui dict with defaults or autofill
+        ui = {}
+        if coin_choice and coin_choice != "-- none --":
+            sample = coin_index.get(coin_choice)
+            ui = {
+                "coin": sample.get("coin", ""),
+                "symbol": sample.get("symbol", ""),
+                "price": sample.get("price", 0.0),
+                "1h": sample.get("1h", 0.0),
+                "24h": sample.get("24h", 0.0),
+                "7d": sample.get("7d", 0.0),
+                "24h_volume": sample.get("24h_volume", 0.0),
+                "mkt_cap": sample.get("mkt_cap", 0.0),
+                "date": sample.get("date", str(date.today())),
+                "liquidity_ratio": sample.get("liquidity_ratio", 0.0),
+                "price_change_24h": sample.get("price_change_24h", 0.0)
+            }
+            st.success("Auto-filled (editable).")
+        else:
+            ui = {
+                "coin": "",
+                "symbol": "",
+                "price": 0.0,
+                "1h": 0.0,
+                "24h": 0.0,
+                "7d": 0.0,
+                "24h_volume": 0.0,
+                "mkt_cap": 0.0,
+                "date": str(date.today()),
+                "liquidity_ratio": 0.0,
+                "price_change_24h": 0.0
+            }
+
+        # Only numeric fields used by model are presented as inputs (but we also show coin/symbol/date for UX)
+        st.markdown("**General (for history only)**")
+        g1, g2, g3 = st.columns(3)
+        with g1:
+            ui["coin"] = st.text_input("Coin (optional)", value=ui["coin"])
+        with g2:
+            ui["symbol"] = st.text_input("Symbol (optional)", value=ui["symbol"])
+        with g3:
+            ui["date"] = st.text_input("Date (YYYY-MM-DD)", value=str(ui["date"]))
+
+        st.markdown("**Price & Volume**")
+        p1, p2, p3 = st.columns(3)
+        with p1:
+            ui["price"] = st.number_input("price", value=float(ui["price"]))
+            ui["24h_volume"] = st.number_input("24h_volume", value=float(ui["24h_volume"]))
+        with p2:
+            ui["mkt_cap"] = st.number_input("mkt_cap", value=float(ui["mkt_cap"]))
+            ui["liquidity_ratio"] = st.number_input("liquidity_ratio", value=float(ui["liquidity_ratio"]))
+        with p3:
+            ui["price_change_24h"] = st.number_input("price_change_24h", value=float(ui["price_change_24h"]))
+
+        st.markdown("**Price Changes**")
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            ui["1h"] = st.number_input("1h (decimal)", value=float(ui["1h"]))
+        with c2:
+            ui["24h"] = st.number_input("24h (decimal)", value=float(ui["24h"]))
+        with c3:
+            ui["7d"] = st.number_input("7d (decimal)", value=float(ui["7d"]))
+
+        st.markdown("---")
+
+        # -----------------------------
+        # Predict Button
+        # -----------------------------
+        if st.button("🚀 Predict Liquidity Score", use_container_width=True):
+            allowed, retry_after = admission.allow_single(session_id)
+            if not allowed:
+                st.warning(f"Too many predictions; try again in {retry_after:.1f}s.")
+            else:
+                try:
+                    t0 = time.perf_counter()
+                    pred = predict_from_dict(backend, ui)
+                    if shadow is not None:
+                        shadow.observe(vector_from_dict(ui, backend.feature_names).reshape(1, -1),
+                                       backend.feature_names, [pred], time.perf_counter() - t0)
+                    st.success(f"Predicted liquidity_score: {pred:.6f}")
+
+                    # Save history CSV with UI fields + prediction
+                    ui_df = pd.DataFrame([{k: ui.get(k, "") for k in UI_FIELDS}])
+                    save_history_csv(ui_df, [pred], mode="single")
+                    logging.info(json.dumps({"mode":"single","inputs":ui,"prediction":pred}))
+
+                    # PDF is rendered lazily (see below), only if the user asks for it
+                    st.session_state.last_single = {"ui": dict(ui), "pred": pred}
+                    st.session_state.pdf_single = None
+                except Exception as e:
+                    st.error(f"Prediction failed: {e}")
+                    logging.exception("Prediction failed")
+
+        last_single = st.session_state.get("last_single")
+        if last_single is not None:
+            if st.session_state.get("pdf_single") is None:
+                if st.button(f"📄 Build PDF report (prediction {last_single['pred']:.6f})"):
+                    st.session_state.pdf_single = get_report_renderer(REPORT_DIR).submit(last_single["ui"], last_single["pred"])
+            if st.session_state.get("pdf_single") is not None:
+                try:
+                    with st.spinner("Rendering PDF..."):
+                        pdf_name, pdf_bytes = st.session_state.pdf_single.result()
+                    st.download_button("📄 Download PDF report", pdf_bytes, file_name=pdf_name, mime="application/pdf")
+                except Exception as e:
+                    st.error(f"PDF report failed: {e}")
+                    logging.exception("PDF report failed")
+                    st.session_state.pdf_single = None
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with right:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        # Real-time preview chart: sweep one feature (line) or two (heatmap) around the current inputs
+        st.subheader("Real-time preview (what-if sweep)")
         try:
-            model_df = prepare_model_df_from_ui_dict(ui)
-            preds = model.predict(model_df)
-            pred = float(preds[0])
-            st.success(f"Predicted liquidity_score: {pred:.6f}")
-
-            # Save history CSV with UI fields + prediction
-            ui_df = pd.DataFrame([{k: ui.get(k, "") for k in UI_FIELDS}])
-            save_history_csv(ui_df, [pred], mode="single")
-            logging.info(json.dumps({"mode":"single","inputs":ui,"prediction":pred}))
-
-            # PDF
-            pdf_path = generate_pdf(ui, pred)
-            with open(pdf_path, "rb") as f:
-                st.download_button("📄 Download PDF report", f.read(), file_name=pdf_path.name, mime="application/pdf")
+            base_vec = vector_from_dict(ui, predict_features)
+            w1, w2, w3 = st.columns(3)
+            with w1:
+                sweep_x = st.selectbox("Sweep feature", predict_features, index=predict_features.index("price") if "price" in predict_features else 0)
+            with w2:
+                sweep_y = st.selectbox("2nd feature (heatmap)", ["-- none --"] + [f for f in predict_features if f != sweep_x])
+            with w3:
+                sweep_span = st.slider("Range (± %)", 1, 100, 10)
+            st.vega_lite_chart(sweep_chart(model_key, tuple(base_vec), sweep_x, sweep_y, sweep_span), width="stretch")
         except Exception as e:
-            st.error(f"Prediction failed: {e}")
-            logging.exception("Prediction failed")
-
-    st.markdown("---")
+            st.write("Preview chart unavailable:", e)
+        st.markdown("</div>", unsafe_allow_html=True)
 
+@st.fragment
+def batch_panel():
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
     # -----------------------------
-    # Batch mode (unchanged logic)
+    # Batch mode: submitted as a background job (progress / cancel / resume below)
     # -----------------------------
     st.header("Batch mode (CSV upload or editable table)")
     st.write("CSV should contain at least the numeric MODEL features (price,1h,24h,7d,24h_volume,mkt_cap,liquidity_ratio,price_change_24h). Coin/symbol/date can be present but are optional.")
 
     uploaded = st.file_uploader("Upload CSV for batch prediction (optional)", type=["csv"])
-    template = pd.DataFrame([{k: "" if k in ("coin","symbol","date") else 0.0 for k in UI_FIELDS}])
-    editable = st.data_editor(template if uploaded is None else pd.read_csv(uploaded), num_rows="dynamic", width="stretch")
+    large_mode = st.checkbox("Large file mode (score the upload as is, no editable table)", value=False)
 
+    if large_mode:
+        # the upload is copied to the job directory and read chunk by chunk, never as one frame
+        source = uploaded
+        if uploaded is None:
+            st.info("Upload a CSV to use large file mode.")
+    else:
+        template = pd.DataFrame([{k: "" if k in ("coin","symbol","date") else 0.0 for k in UI_FIELDS}])
+        source = st.data_editor(template if uploaded is None else pd.read_csv(uploaded), num_rows="dynamic", width="stretch")
+
+    submitted = False
     if st.button("Predict (batch)"):
-        if editable is None or len(editable) == 0:
+        if source is None or (isinstance(source, pd.DataFrame) and len(source) == 0):
             st.warning("No rows.")
         else:
             try:
-                ui_batch = editable.copy()
-                for col in UI_FIELDS:
-                    if col not in ui_batch.columns:
-                        ui_batch[col] = "" if col in ("coin","symbol","date") else 0.0
-
-                # Prepare model input by selecting MODEL_FEATURES
-                model_batch = pd.DataFrame()
-                for f in MODEL_FEATURES:
-                    if f in ui_batch.columns:
-                        model_batch[f] = pd.to_numeric(ui_batch[f], errors="coerce").fillna(0.0)
-                    else:
-                        # missing numeric column -> fill zeros
-                        model_batch[f] = 0.0
-
-                # Reorder to match model if possible
-                if all(name in model_batch.columns for name in model_feature_names):
-                    model_batch = model_batch[model_feature_names]
-                else:
-                    model_batch = model_batch[MODEL_FEATURES]
-
-                preds = model.predict(model_batch)
-                out = ui_batch.copy()
-                out["prediction"] = preds
-                st.dataframe(out)
-
-                # Save history CSV with UI fields + preds
-                save_history_csv(out[UI_FIELDS + ["prediction"]], preds, mode="batch")
-
-                # Provide download
-                csv_buf = out.to_csv(index=False).encode("utf-8")
-                st.download_button("⬇ Download batch predictions CSV", csv_buf, "batch_predictions.csv")
-                logging.info(f"Batch predicted {len(out)} rows")
+                if isinstance(source, pd.DataFrame):
+                    source = with_ui_fields(source)
+                job_id = get_job_runner(JOBS_DIR).submit(source, model=model_choice, owner=session_id)
+                st.session_state.batch_job = job_id
+                st.session_state.pdf_batch = None
+                logging.info(f"Batch job {job_id} submitted (model {model_choice})")
+                submitted = True
+            except QueueFull as e:
+                st.warning(str(e))
             except Exception as e:
-                st.error(f"Batch prediction failed: {e}")
-                logging.exception("Batch error")
+                st.error(f"Could not start the batch job: {e}")
+                logging.exception("Batch job submit error")
+    st.markdown("</div>", unsafe_allow_html=True)
+    if submitted:
+        st.rerun()  # full rerun, so the job panel starts polling
+
+def batch_job_panel():
+    job_id = st.session_state.get("batch_job")
+    if job_id is None:
+        return
+    runner = get_job_runner(JOBS_DIR)
+    try:
+        job = runner.status(job_id)
+    except KeyError:
+        st.session_state.pop("batch_job", None)
+        return
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.subheader(f"Batch job {job_id}")
+    rows_msg = f"{job['rows_done']:,} / {job['rows_total']:,} rows (model {job['model']})"
+    if job["status"] == QUEUED:
+        pos = job["queue_position"]
+        st.info(f"⏳ Queued: position {pos} ({BATCH_JOBS} jobs run at a time)" if pos else "Starting...")
+    elif job["status"] == RUNNING:
+        st.progress(job["progress"], text=f"Scored {rows_msg}")
+    elif job["status"] == DONE:
+        st.success(f"Scored {job['rows_done']:,} rows in {job.get('seconds', 0):.1f}s (model {job['model']})")
+    else:
+        st.warning(f"Job {job['status']} after {rows_msg}" + (f": {job['error']}" if job.get("error") else ""))
 
+    if job["status"] in ACTIVE:
+        if st.button("Cancel job"):
+            runner.cancel(job_id)
+    elif job["status"] != DONE:
+        if st.button("Resume from the last completed chunk"):
+            try:
+                runner.resume(job_id, owner=session_id)
+            except QueueFull as e:
+                st.warning(str(e))
+            else:
+                st.rerun()
+    else:
+        out_path = runner.output_path(job_id)
+        st.dataframe(pd.read_csv(out_path, nrows=200))  # preview only; the full output is a download
+        with open(out_path, "rb") as f:
+            st.download_button("⬇ Download batch predictions CSV", f, file_name=f"batch_predictions_{job_id}.csv", mime="text/csv")
+
+        # Bulk PDF for the job output (multi-page), rendered on the report pool on demand
+        if st.session_state.get("pdf_batch") is None:
+            if st.button(f"📄 Build batch PDF report ({job['rows_done']:,} rows)"):
+                df = with_ui_fields(pd.read_csv(out_path))
+                st.session_state.pdf_batch = get_report_renderer(REPORT_DIR).submit_batch(df[UI_FIELDS + ["prediction"]])
+        if st.session_state.get("pdf_batch") is not None:
+            try:
+                with st.spinner("Rendering batch PDF..."):
+                    pdf_name, pdf_bytes = st.session_state.pdf_batch.result()
+                st.download_button("📄 Download batch PDF report", pdf_bytes, file_name=pdf_name, mime="application/pdf")
+            except Exception as e:
+                st.error(f"Batch PDF report failed: {e}")
+                logging.exception("Batch PDF report failed")
+                st.session_state.pdf_batch = None
     st.markdown("</div>", unsafe_allow_html=True)
+    if st.session_state.get("batch_job_polling") and job["status"] not in ACTIVE:
+        st.rerun()  # finished: one full rerun stops the timer
 
-# -------------------------
-# RIGHT: Charts & feature importance & history
-# -------------------------
-with right:
+def insights_panel():
     st.markdown("<div class='card'>", unsafe_allow_html=True)
     st.header("Charts & Insights")
 
     # Feature importance (linear model coefficients)
     st.subheader("Feature importance (linear model coefficients)")
     try:
-        if hasattr(model, "coef_"):
-            coefs = np.asarray(model.coef_).flatten()
-            # Determine names: prefer model.feature_names_in_ if available
-            try:
-                names = list(model.feature_names_in_)
-            except Exception:
-                names = MODEL_FEATURES
-            # Align lengths
-            names = [n for n in names if n in MODEL_FEATURES]
-            if len(coefs) >= len(names):
-                coefs = coefs[:len(names)]
-            imp_df = pd.DataFrame({"feature": names, "coef": coefs})
-            imp_df = imp_df.sort_values("coef", key=lambda s: s.abs(), ascending=False)
-            st.table(imp_df.head(12))
-            fig, ax = plt.subplots(figsize=(6,4))
-            imp_df.set_index("feature")["coef"].head(12).plot(kind="barh", ax=ax)
-            ax.set_title("Top coefficients")
-            st.pyplot(fig)
+        if views["coef_table"] is not None:
+            # table + chart spec, cached per model version
+            st.table(views["coef_table"].head(12))
+            st.vega_lite_chart(views["coef_chart"], width="stretch")
         else:
             st.write("Model has no coefficients attribute.")
     except Exception as e:
         st.write("Could not render feature importance:", e)
 
-    # Real-time preview chart: vary price and predict
-    st.subheader("Real-time preview (price vs predicted liquidity)")
-    try:
-        # base numeric values from last UI 'ui' dict
-        base_vals = {f: float(ui.get(f, 0.0)) for f in MODEL_FEATURES}
-        base_price = base_vals.get("price", 1.0) or 1.0
-        prices = np.linspace(base_price * 0.9, base_price * 1.1, 30)
-        sim_rows = []
-        for p in prices:
-            r = base_vals.copy()
-            r["price"] = float(p)
-            sim_rows.append(r)
-        sim_df = pd.DataFrame(sim_rows)
-        # reorder to model expectation
-        if all(name in sim_df.columns for name in model_feature_names):
-            sim_df = sim_df[model_feature_names]
+    # Shadow scoring metrics (candidate vs the model serving this session)
+    if shadow is not None:
+        st.subheader(f"Shadow scoring: {shadow_choice} vs {model_choice}")
+        m = shadow.metrics()
+        if m["rows"]:
+            st.table(pd.Series({k: v for k, v in m.items() if k != "shadow"}, name="value", dtype="float64").to_frame())
         else:
-            sim_df = sim_df[MODEL_FEATURES]
-        sim_preds = model.predict(sim_df)
-        fig2, ax2 = plt.subplots(figsize=(6,3))
-        ax2.plot(prices, sim_preds, marker="o")
-        ax2.set_xlabel("price (simulated)")
-        ax2.set_ylabel("predicted liquidity_score")
-        st.pyplot(fig2)
-    except Exception as e:
-        st.write("Preview chart unavailable:", e)
+            st.info("No shadow-scored predictions yet. Predict something to start comparing.")
+        if st.button("Reset shadow metrics"):
+            shadow.reset()
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    # History (CSV)
+@st.fragment(run_every=HISTORY_REFRESH_SECONDS)
+def history_panel():
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    # History (Parquet store: newest partitions + incrementally maintained daily rollups)
     st.subheader("Prediction history (recent)")
-    if CSV_HISTORY.exists():
+    history_store = get_history_store(HISTORY_DIR)
+    if not history_store.is_empty():
         try:
-            hist = pd.read_csv(CSV_HISTORY, parse_dates=["timestamp"])
-            st.dataframe(hist.tail(50))
-            # plot daily average
-            hist["timestamp"] = pd.to_datetime(hist["timestamp"])
-            daily = hist.groupby(hist["timestamp"].dt.date)["prediction"].mean().reset_index()
-            fig3, ax3 = plt.subplots(figsize=(6,3))
-            ax3.plot(daily["timestamp"], daily["prediction"], marker="o")
-            ax3.set_title("Daily average predicted liquidity_score")
-            st.pyplot(fig3)
+            st.dataframe(history_store.read_recent(50))
+            # plot daily average (spec rebuilt only when the rollup file changes)
+            rollup_stamp = history_store.rollup.stamp()
+            st.vega_lite_chart(daily_chart(HISTORY_DIR, rollup_stamp), width="stretch")
+
+            # per-coin daily averages (read from the per-day coin rollups, no prediction scan)
+            coin_sel = st.multiselect("Daily average per coin", history_store.rollup.coins())
+            if coin_sel:
+                st.vega_lite_chart(coin_chart(HISTORY_DIR, rollup_stamp, tuple(coin_sel)), width="stretch")
         except Exception as e:
             st.write("Could not load history:", e)
     else:
         st.info("No history yet. Make predictions to populate history.")
-
     st.markdown("</div>", unsafe_allow_html=True)
 
+input_panel()
+st.markdown("---")
+
+left, right = st.columns([1.1, 1])
+with left:
+    batch_panel()
+    job_active = False
+    if st.session_state.get("batch_job") is not None:
+        try:
+            job_active = get_job_runner(JOBS_DIR).status(st.session_state.batch_job)["status"] in ACTIVE
+        except KeyError:
+            pass
+    st.session_state.batch_job_polling = job_active
+    st.fragment(batch_job_panel, run_every=JOB_REFRESH_SECONDS if job_active else None)()
+with right:
+    st.fragment(insights_panel, run_every=SHADOW_REFRESH_SECONDS if shadow is not None else None)()
+    history_panel()
+
 st.caption("This app sends only the numeric features the model was trained on to avoid mismatched feature-name errors. coin/symbol/date are kept for UX/history but are not passed to the model.")
\ No newline at end of file
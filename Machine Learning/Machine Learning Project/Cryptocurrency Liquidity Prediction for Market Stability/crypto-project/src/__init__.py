@@ -0,0 +1,2 @@
+# src/__init__.py
+# Shared prediction / pipeline code used by the Streamlit app and the scripts.
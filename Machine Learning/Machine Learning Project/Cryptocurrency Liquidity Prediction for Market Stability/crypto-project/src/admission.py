@@ -0,0 +1,138 @@
+# src/admission.py
+# Admission control shared by every session of a server process:
+#   - per-session token buckets for single predictions
+#   - at most `max_batch_jobs` batch jobs running at once, the rest wait in a
+#     FIFO queue (bounded) and can report their position while they wait
+import contextlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+
+    def try_acquire(self, n: float = 1.0):
+        """(True, 0.0) if `n` tokens were taken, else (False, seconds until they will be available)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= n:
+            self.tokens -= n
+            return True, 0.0
+        return False, (n - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Thread-safe; one instance per process (st.cache_resource / the HTTP server).
+
+    Single predictions: `allow_single(key)` -> (ok, retry_after_seconds).
+    Batch jobs:         `with batch_slot(key, on_wait=...)` blocks until the job is
+                        admitted, calling `on_wait(position)` while queued (1 = next).
+    """
+
+    def __init__(self, max_batch_jobs: int = 2, max_queue: int = 20, max_jobs_per_session: int = 1,
+                 single_rate: float = 5.0, single_burst: int = 10, max_sessions: int = 10_000):
+        self.max_batch_jobs = max_batch_jobs
+        self.max_queue = max_queue
+        self.max_jobs_per_session = max_jobs_per_session
+        self.single_rate = single_rate
+        self.single_burst = single_burst
+        self.max_sessions = max_sessions
+        self._buckets = OrderedDict()  # key -> TokenBucket, least recently used first
+        self._cond = threading.Condition()
+        self._queue = []  # tickets waiting, FIFO
+        self._running = {}  # ticket -> key
+        self._owners = {}  # ticket -> key, queued or running
+        self._tickets = itertools.count(1)
+
+    # ---- single predictions ----
+    def allow_single(self, key):
+        with self._cond:
+            bucket = self._buckets.pop(key, None) or TokenBucket(self.single_rate, self.single_burst)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_sessions:
+                self._buckets.popitem(last=False)
+            return bucket.try_acquire()
+
+    # ---- batch jobs ----
+    def enqueue(self, key) -> int:
+        """Take a ticket in the batch queue. Raises QueueFull when the queue or the session is at its limit."""
+        with self._cond:
+            if sum(1 for k in self._owners.values() if k == key) >= self.max_jobs_per_session:
+                raise QueueFull("You already have a batch job queued or running; wait for it to finish.")
+            if len(self._queue) >= self.max_queue:
+                raise QueueFull(f"The batch queue is full ({self.max_queue} jobs waiting); try again later.")
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            self._owners[ticket] = key
+            self._cond.notify_all()
+            return ticket
+
+    def position(self, ticket: int) -> int:
+        """1-based position in the queue; 0 once the job is running (or gone)."""
+        with self._cond:
+            return self._queue.index(ticket) + 1 if ticket in self._queue else 0
+
+    def wait(self, ticket: int, timeout: float = None) -> bool:
+        """Block until `ticket` is admitted (True) or `timeout` passes (False)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if ticket in self._running:
+                    return True
+                if ticket not in self._queue:
+                    raise KeyError(f"Unknown or cancelled ticket: {ticket}")
+                if self._queue[0] == ticket and len(self._running) < self.max_batch_jobs:
+                    self._queue.pop(0)
+                    self._running[ticket] = self._owners[ticket]
+                    self._cond.notify_all()
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+    def release(self, ticket: int):
+        """Leave the queue or free the running slot (idempotent)."""
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            self._running.pop(ticket, None)
+            self._owners.pop(ticket, None)
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def batch_slot(self, key, on_wait=None, poll: float = 0.5, timeout: float = None):
+        """
+        Hold one of the `max_batch_jobs` slots for the duration of the block.
+        Raises QueueFull if the job can't be queued, TimeoutError after `timeout` seconds waiting.
+        """
+        ticket = self.enqueue(key)
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.wait(ticket, poll):
+                if on_wait is not None:
+                    on_wait(self.position(ticket))
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Batch job waited more than {timeout:.0f}s for a slot")
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"running": len(self._running), "queued": len(self._queue),
+                    "max_batch_jobs": self.max_batch_jobs, "sessions": len(self._buckets)}
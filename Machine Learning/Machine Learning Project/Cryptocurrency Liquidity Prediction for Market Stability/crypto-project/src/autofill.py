@@ -0,0 +1,52 @@
+# src/autofill.py
+# Coin -> latest engineered row index for the auto-fill selector.
+from bisect import bisect_left
+
+import pandas as pd
+
+from src.features import parse_engineered_dates
+from src.predict import UI_FIELDS
+
+
+class CoinIndex:
+    """
+    Latest engineered row per coin plus a sorted coin list.
+    Built once from engineered_features.csv; lookups are O(1) and prefix
+    search is a binary search over the case-folded sorted names.
+    """
+
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.coins = sorted(rows, key=str.casefold)
+        self._folded = [c.casefold() for c in self.coins]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CoinIndex":
+        df = df[df["coin"].notna()]
+        if "date" in df.columns:
+            # engineered dates are DD-MM-YYYY (see 01_data_exploration); stable sort keeps file order
+            # on ties, unparseable dates sort first so they never count as a coin's latest row
+            df = df.assign(_d=parse_engineered_dates(df["date"])).sort_values("_d", kind="stable", na_position="first")
+        latest = df.drop_duplicates("coin", keep="last")
+        cols = [c for c in UI_FIELDS if c in latest.columns]
+        if "date" in cols and pd.api.types.is_datetime64_any_dtype(latest["date"]):
+            latest = latest.assign(date=latest["date"].dt.strftime("%Y-%m-%d"))
+        rows = {str(r["coin"]): r for r in latest[cols].to_dict("records")}
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.coins)
+
+    def get(self, coin: str) -> dict:
+        return self.rows.get(coin, {})
+
+    def search(self, prefix: str = "", limit: int = None) -> list:
+        """Coins whose name starts with `prefix` (case-insensitive), in sorted order."""
+        prefix = (prefix or "").casefold()
+        start = bisect_left(self._folded, prefix)
+        out = []
+        for i in range(start, len(self.coins)):
+            if not self._folded[i].startswith(prefix) or (limit is not None and len(out) >= limit):
+                break
+            out.append(self.coins[i])
+        return out
@@ -0,0 +1,50 @@
+# src/batch.py
+import numpy as np
+import pandas as pd
+
+# Rows per model call. Big enough to amortise per-call overhead,
+# small enough that a chunk (and its DataFrame wrapper) stays cheap.
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+# -------------------------
+# Input conversion
+# -------------------------
+def to_feature_matrix(df: pd.DataFrame, feature_names) -> np.ndarray:
+    """
+    Convert a (UI / uploaded) DataFrame into one contiguous float64 matrix
+    with columns in `feature_names` order.
+    Missing columns -> 0.0, non-numeric cells -> 0.0 (same rules as the UI).
+    """
+    X = np.zeros((len(df), len(feature_names)), dtype=np.float64)
+    for j, f in enumerate(feature_names):
+        if f not in df.columns:
+            continue
+        col = df[f]
+        if not pd.api.types.is_numeric_dtype(col):
+            col = pd.to_numeric(col, errors="coerce")
+        X[:, j] = col.to_numpy(dtype=np.float64, na_value=np.nan)
+    X[np.isnan(X)] = 0.0
+    return X
+
+
+# -------------------------
+# Chunked prediction
+# -------------------------
+def iter_predict_chunks(backend, X: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Predict `X` in fixed-size chunks with an inference backend (see src/inference.py).
+    Yields (start, stop, preds) so callers can stream results / report progress.
+    """
+    for start in range(0, len(X), chunk_size):
+        stop = min(start + chunk_size, len(X))
+        yield start, stop, backend.predict(X[start:stop])
+
+
+def predict_matrix(backend, X: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """Predict a whole feature matrix into one preallocated output array."""
+    preds = np.empty(len(X), dtype=np.float64)
+    for start, stop, chunk_preds in iter_predict_chunks(backend, X, chunk_size):
+        preds[start:stop] = chunk_preds
+    return preds
+
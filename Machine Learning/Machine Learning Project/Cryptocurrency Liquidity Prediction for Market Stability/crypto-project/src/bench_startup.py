@@ -0,0 +1,131 @@
+# src/bench_startup.py
+# Headless cold-start benchmark for app/streamlit_app.py.
+#
+#   python src/bench_startup.py --runs 5
+#   python src/bench_startup.py --runs 3 --json
+#
+# Every measurement runs in a fresh interpreter (nothing cached in sys.modules):
+#   import  - the app's top-level imports (streamlit, pandas, src.*, ...)
+#   model   - loading + validating the serving model (compiled artifact or pickle)
+#   render  - first full run of the app script, headless (streamlit AppTest)
+# and lists the slowest modules in the app's import graph (python -X importtime).
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+APP_PATH = BASE_DIR / "app" / "streamlit_app.py"
+MODELS_DIR = BASE_DIR / "models"
+MODEL_PATH = MODELS_DIR / "Linear_Regression.pkl"
+
+HEAVY_MODULES = ["matplotlib", "reportlab", "joblib", "sklearn", "xgboost", "pyarrow"]
+
+
+def app_imports(app_path=APP_PATH) -> str:
+    """The app's module-level import statements, as source."""
+    src = app_path.read_text(encoding="utf-8")
+    tree = ast.parse(src)
+    return "\n".join(ast.get_source_segment(src, n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom)))
+
+
+def _loaded_heavy() -> list:
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+# -------------------------
+# Probes (run in a child interpreter, print one JSON line)
+# -------------------------
+def probe_import(app_path):
+    sys.path.insert(0, str(BASE_DIR))
+    code = app_imports(app_path)
+    t0 = time.perf_counter()
+    exec(compile(code, str(app_path), "exec"), {})
+    return {"seconds": time.perf_counter() - t0, "heavy_loaded": _loaded_heavy()}
+
+
+def probe_model(app_path):
+    sys.path.insert(0, str(BASE_DIR))
+    t0 = time.perf_counter()
+    from src.registry import LiveModel, ModelRegistry
+    imported = time.perf_counter()
+    serving = LiveModel(ModelRegistry(MODELS_DIR), fallback_path=MODEL_PATH).get()
+    return {"seconds": time.perf_counter() - imported, "import_seconds": imported - t0,
+            "backend": serving.backend.kind, "artifact": serving.path.name, "heavy_loaded": _loaded_heavy()}
+
+
+def probe_render(app_path):
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(str(app_path), default_timeout=120)
+    at.run()
+    return {"seconds": time.perf_counter() - t0, "exceptions": len(at.exception), "heavy_loaded": _loaded_heavy()}
+
+
+PROBES = {"import": probe_import, "model": probe_model, "render": probe_render}
+
+
+def run_probe(name: str, app_path) -> dict:
+    out = subprocess.run([sys.executable, __file__, "--probe", name, "--app", str(app_path)],
+                         capture_output=True, text=True, cwd=BASE_DIR)
+    if out.returncode != 0:
+        raise RuntimeError(f"{name} probe failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(app_path, top: int = 10) -> list:
+    """(module, cumulative ms) of the slowest top-level imports in the app's import graph."""
+    code = f"import sys; sys.path.insert(0, {str(BASE_DIR)!r})\n" + app_imports(app_path)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         capture_output=True, text=True, cwd=BASE_DIR)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # top-level entries only (nested imports are indented under their parent)
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            rows.append((name.strip(), int(cumulative) / 1000.0))
+    return sorted(rows, key=lambda r: -r[1])[:top]
+
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cold-start benchmark for the Streamlit app")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--app", default=str(APP_PATH))
+    ap.add_argument("--json", action="store_true", help="print the raw results as JSON")
+    ap.add_argument("--probe", choices=sorted(PROBES), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    app_path = Path(args.app)
+
+    if args.probe:
+        print(json.dumps(PROBES[args.probe](app_path)))
+        return
+
+    results = {name: [run_probe(name, app_path) for _ in range(args.runs)] for name in PROBES}
+    results["slowest_imports_ms"] = slowest_imports(app_path)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Cold start, {args.runs} fresh interpreter(s) per step")
+    for name in PROBES:
+        secs = [r["seconds"] for r in results[name]]
+        last = results[name][-1]
+        extra = f"  backend={last['backend']} ({last['artifact']})" if name == "model" else ""
+        print(f"  {name:<7} median {statistics.median(secs) * 1e3:8.1f} ms   min {min(secs) * 1e3:8.1f} ms"
+              f"   heavy modules: {', '.join(last['heavy_loaded']) or '-'}{extra}")
+    print("Slowest imports (cumulative ms):")
+    for mod, ms in results["slowest_imports_ms"]:
+        print(f"  {mod:<32} {ms:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# src/charts.py
+# Chart specs for the app: plain Vega-Lite dicts (data inlined), drawn by the
+# browser via st.vega_lite_chart. Nothing is rendered server-side, so there
+# are no figures to leak, and specs can go straight into st.cache_data.
+import altair as alt
+import numpy as np
+import pandas as pd
+
+PRED = "predicted liquidity_score"
+
+
+def coef_bar_spec(imp_df: pd.DataFrame, top: int = 12) -> dict:
+    """Horizontal bars of the largest |coef| (coefficient_table output)."""
+    df = imp_df.head(top)
+    return alt.Chart(df, title="Top coefficients").mark_bar().encode(
+        x=alt.X("coef:Q", title="coef"),
+        y=alt.Y("feature:N", sort=list(df["feature"]), title=None),
+        tooltip=["feature", alt.Tooltip("coef:Q", format=".6g")],
+    ).to_dict()
+
+
+def sweep_line_spec(x_vals, preds, feature: str) -> dict:
+    df = pd.DataFrame({feature: np.asarray(x_vals), PRED: np.asarray(preds)})
+    return alt.Chart(df).mark_line(point=True).encode(
+        x=alt.X(f"{feature}:Q", title=f"{feature} (simulated)", scale=alt.Scale(zero=False)),
+        y=alt.Y(f"{PRED}:Q", title=PRED, scale=alt.Scale(zero=False)),
+        tooltip=[alt.Tooltip(f"{feature}:Q", format=".6g"), alt.Tooltip(f"{PRED}:Q", format=".6g")],
+    ).to_dict()
+
+
+def sweep_heatmap_spec(x_vals, y_vals, grid, x_feature: str, y_feature: str) -> dict:
+    """grid[i, j] = prediction at (x_vals[i], y_vals[j])."""
+    xs, ys = np.meshgrid(np.asarray(x_vals), np.asarray(y_vals), indexing="ij")
+    df = pd.DataFrame({"x": xs.ravel(), "y": ys.ravel(), PRED: np.asarray(grid).ravel()})
+    return alt.Chart(df).mark_rect().encode(
+        x=alt.X("x:O", title=f"{x_feature} (simulated)", axis=alt.Axis(format=".4g", labelOverlap=True)),
+        y=alt.Y("y:O", title=f"{y_feature} (simulated)", sort="descending",
+                axis=alt.Axis(format=".4g", labelOverlap=True)),
+        color=alt.Color(f"{PRED}:Q", scale=alt.Scale(scheme="viridis"), title=PRED),
+        tooltip=[alt.Tooltip("x:Q", title=x_feature, format=".6g"),
+                 alt.Tooltip("y:Q", title=y_feature, format=".6g"),
+                 alt.Tooltip(f"{PRED}:Q", format=".6g")],
+    ).to_dict()
+
+
+def daily_mean_spec(daily: pd.DataFrame) -> dict:
+    """Daily mean prediction (HistoryStore.daily_stats output, indexed by day)."""
+    df = daily.reset_index()[["day", "mean", "count"]]
+    return alt.Chart(df, title="Daily average predicted liquidity_score").mark_line(point=True).encode(
+        x=alt.X("day:T", title=None),
+        y=alt.Y("mean:Q", title=PRED, scale=alt.Scale(zero=False)),
+        tooltip=["day", alt.Tooltip("mean:Q", format=".6g"), "count"],
+    ).to_dict()
+
+
+def coin_daily_spec(per_coin: pd.DataFrame) -> dict:
+    """One line per coin (HistoryStore.coin_daily_stats output)."""
+    df = per_coin[["day", "coin", "mean", "count"]]
+    return alt.Chart(df, title="Daily average predicted liquidity_score per coin").mark_line(point=True).encode(
+        x=alt.X("day:T", title=None),
+        y=alt.Y("mean:Q", title=PRED, scale=alt.Scale(zero=False)),
+        color=alt.Color("coin:N"),
+        tooltip=["day", "coin", alt.Tooltip("mean:Q", format=".6g"), "count"],
+    ).to_dict()
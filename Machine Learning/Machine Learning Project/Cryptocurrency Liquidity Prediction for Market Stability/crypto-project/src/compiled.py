@@ -0,0 +1,111 @@
+# src/compiled.py
+# Lean runtime for models exported by src/export.py (numpy only: no sklearn /
+# xgboost import, no unpickling).
+#
+#   models/compiled/<model stem>.npz   arrays + a JSON header (see CompiledModel)
+#
+# Linear models are X @ coef + intercept. Tree ensembles (DecisionTree,
+# RandomForest, ExtraTrees, GradientBoosting, XGBoost) are flattened into one
+# node table and every row walks every tree at once, one level per step.
+import json
+from pathlib import Path
+
+import numpy as np
+
+from src.fileutils import atomic_path
+
+FORMAT_VERSION = 1
+
+
+def compiled_path(model_path) -> Path:
+    """Where the compiled artifact for `models/<name>.pkl` lives."""
+    model_path = Path(model_path)
+    return model_path.parent / "compiled" / f"{model_path.stem}.npz"
+
+
+class CompiledModel:
+    """
+    Exported model. Acts both as the "model" (feature_names_in_, coef_ for
+    linear ones) and as an inference backend (predict / predict_row).
+
+    header: {"format", "kind": "linear" | "trees", "features", "source",
+             "source_sha256", "verified"} plus, for trees,
+            {"compare": "le" | "lt", "aggregate": "mean" | "sum", "base", "scale", "depth"}
+    """
+
+    def __init__(self, header: dict, arrays: dict):
+        self.header = header
+        self.arrays = arrays
+        self.kind = f"compiled-{header['kind']}"
+        self.feature_names = list(header["features"])
+        self.feature_names_in_ = np.array(self.feature_names, dtype=object)
+        if header["kind"] == "linear":
+            self.coef_ = np.ascontiguousarray(arrays["coef"], dtype=np.float64)
+            self.intercept_ = float(arrays["intercept"])
+        else:
+            self.roots = arrays["roots"]
+            self.feature = arrays["feature"]
+            self.threshold = arrays["threshold"]
+            self.value = arrays["value"]
+            # children[2 * node + went_left]: one gather per level instead of a where()
+            self._children = np.ascontiguousarray(np.stack([arrays["right"], arrays["left"]], axis=1).ravel())
+            self._le = header["compare"] == "le"
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.header["kind"] == "linear":
+            return X @ self.coef_ + self.intercept_
+        return self._predict_trees(X)
+
+    def predict_row(self, x) -> float:
+        return float(self.predict(x)[0])
+
+    def _predict_trees(self, X: np.ndarray) -> np.ndarray:
+        # both sklearn and xgboost trees split on float32 inputs
+        Xf = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = Xf.shape
+        flat = Xf.ravel()
+        row_offset = (np.arange(n) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        # leaves point to themselves, so `depth` steps land every row on a leaf
+        for _ in range(self.header["depth"]):
+            x = np.take(flat, row_offset + np.take(self.feature, node))
+            threshold = np.take(self.threshold, node)
+            go_left = x <= threshold if self._le else x < threshold
+            node = np.take(self._children, 2 * node + go_left)
+        leaves = np.take(self.value, node)
+        if self.header["aggregate"] == "mean":
+            return leaves.mean(axis=1)
+        return self.header["base"] + self.header["scale"] * leaves.sum(axis=1)
+
+
+# -------------------------
+# Load / save
+# -------------------------
+def save_compiled(path, header: dict, arrays: dict):
+    with atomic_path(path) as tmp:
+        with open(tmp, "wb") as fh:
+            np.savez(fh, header=np.array(json.dumps(header)), **arrays)
+
+
+def load_compiled(path) -> CompiledModel:
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(str(data["header"]))
+        arrays = {k: data[k] for k in data.files if k != "header"}
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled model format in {path}: {header.get('format')}")
+    return CompiledModel(header, arrays)
+
+
+def load_compiled_for(model_path, fingerprint: str):
+    """The compiled artifact of `model_path` if one was exported from this exact file, else None."""
+    path = compiled_path(model_path)
+    if not path.exists():
+        return None
+    try:
+        compiled = load_compiled(path)
+    except Exception:
+        return None
+    return compiled if compiled.header.get("source_sha256") == fingerprint else None
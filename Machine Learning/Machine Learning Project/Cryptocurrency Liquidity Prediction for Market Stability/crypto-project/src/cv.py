@@ -0,0 +1,206 @@
+# src/cv.py
+# Time-series cross-validation (rolling origin) for the candidate models of
+# src/train.py, replacing the notebook's single 80/20 split.
+#
+#   python src/cv.py --splits 5                         (expanding window, every candidate)
+#   python src/cv.py --splits 5 --window 5000 --cpus 16 (rolling window of 5000 rows)
+#
+# The dataset is written once as read-only .npy files and every (model, fold)
+# task memory-maps them: time-ordered folds are contiguous row ranges, so a
+# fold's X/y are views into the shared pages -- no per-fold or per-model copies
+# however many models x folds run in parallel.
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.train import (CANDIDATES, DATA_CSV, PeakMemory, load_training_data, make_model, plan_cpus,
+                       regression_metrics, thread_limit)
+from src.fileutils import atomic_path
+
+CV_RESULTS_CSV = BASE_DIR / "reports" / "model_performance" / "cv_results.csv"
+CV_SUMMARY_CSV = BASE_DIR / "reports" / "model_performance" / "cv_summary.csv"
+
+CV_COLUMNS = ["Model", "fold", "train_rows", "test_rows", "RMSE", "MAE", "R2", "fit_seconds",
+              "predict_seconds", "peak_rss_mb", "n_jobs", "error"]
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Folds
+# -------------------------
+def rolling_origin_folds(n_rows: int, n_splits: int = 5, test_size: int = None, window: int = None,
+                         gap: int = 0, min_train: int = None) -> list:
+    """
+    [(train_start, train_stop, test_start, test_stop)] over time-ordered rows.
+    Test blocks are consecutive and end at the last row (as sklearn's TimeSeriesSplit);
+    training is everything before a block (expanding) or its last `window` rows (rolling).
+    `gap` rows between train and test are left out.
+    """
+    test_size = test_size or n_rows // (n_splits + 1)
+    if test_size <= 0:
+        raise ValueError(f"Not enough rows ({n_rows}) for {n_splits} folds")
+    folds = []
+    for k in range(n_splits):
+        test_start = n_rows - (n_splits - k) * test_size
+        train_stop = test_start - gap
+        train_start = max(0, train_stop - window) if window else 0
+        if train_stop - train_start < max(1, min_train or 1):
+            continue
+        folds.append((train_start, train_stop, test_start, test_start + test_size))
+    if not folds:
+        raise ValueError(f"No fold has enough training rows (n_rows={n_rows}, test_size={test_size}, gap={gap})")
+    return folds
+
+
+class FoldCache:
+    """
+    X / y written once as .npy under `directory`, memory-mapped read-only by workers.
+    With `root`, the cache is kept under root/<data hash> and reused by later runs on
+    the same data; otherwise it lives in a temp directory removed by close().
+    """
+
+    def __init__(self, X, y, folds, root=None):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        self.folds = [tuple(int(v) for v in f) for f in folds]
+        if root is None:
+            self.directory, self._owned = Path(tempfile.mkdtemp(prefix="cv-")), True
+        else:
+            h = hashlib.sha1(X.tobytes())
+            h.update(y.tobytes())
+            self.directory, self._owned = Path(root) / h.hexdigest()[:16], False
+        if not (self.directory / "y.npy").exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for key, arr in (("X", X), ("y", y)):  # y last: its presence marks a complete cache
+                with atomic_path(self.directory / f"{key}.npy") as tmp:
+                    with open(tmp, "wb") as fh:
+                        np.save(fh, arr)
+
+    def close(self):
+        if self._owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def fold_arrays(cache_dir, fold):
+    """(X_train, y_train, X_test, y_test) of `fold`: read-only views into the memory-mapped cache."""
+    X = np.load(Path(cache_dir) / "X.npy", mmap_mode="r")
+    y = np.load(Path(cache_dir) / "y.npy", mmap_mode="r")
+    a, b, c, d = fold
+    return X[a:b], y[a:b], X[c:d], y[c:d]
+
+
+# -------------------------
+# Worker
+# -------------------------
+def evaluate_fold(name: str, params: dict, n_jobs: int, cache_dir, fold, fold_index: int, features) -> dict:
+    """Fit `name` on one fold's training rows and score its test block (runs in a worker process)."""
+    X_train, y_train, X_test, y_test = fold_arrays(cache_dir, fold)
+    with PeakMemory() as mem, thread_limit(n_jobs):
+        model = make_model(name, params, n_jobs)
+        t0 = time.perf_counter()
+        model.fit(pd.DataFrame(X_train, columns=features), y_train)
+        fit_seconds = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        preds = model.predict(pd.DataFrame(X_test, columns=features))
+        predict_seconds = time.perf_counter() - t0
+    return {"Model": name, "fold": fold_index, "train_rows": fold[1] - fold[0], "test_rows": fold[3] - fold[2],
+            **regression_metrics(y_test, preds), "fit_seconds": round(fit_seconds, 3),
+            "predict_seconds": round(predict_seconds, 3), "peak_rss_mb": mem.peak_mb, "n_jobs": n_jobs, "error": None}
+
+
+# -------------------------
+# Runner
+# -------------------------
+def cross_validate(X: pd.DataFrame, y, names=None, params: dict = None, n_splits: int = 5, window: int = None,
+                   gap: int = 0, cpu_budget: int = None, cache_root=None):
+    """
+    Evaluate every model on every rolling-origin fold, (model, fold) tasks in parallel.
+    Returns (per-fold results, per-model summary sorted by mean RMSE).
+    """
+    names = list(names or CANDIDATES)
+    cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+    folds = rolling_origin_folds(len(X), n_splits, window=window, gap=gap)
+    # folds of one model run side by side, so each fold gets a slice of the budget
+    n_jobs = plan_cpus(names, max(1, cpu_budget // len(folds)))
+    features = list(X.columns)
+    # parallel models and the largest training sets first
+    tasks = sorted(((n, i) for n in names for i in range(len(folds))),
+                   key=lambda t: (not CANDIDATES[t[0]][2], -(folds[t[1]][1] - folds[t[1]][0])))
+
+    results = []
+    with FoldCache(X.to_numpy(), np.asarray(y), folds, root=cache_root) as cache:
+        with ProcessPoolExecutor(max_workers=min(len(tasks), cpu_budget)) as pool:
+            futures = {pool.submit(evaluate_fold, n, (params or {}).get(n), n_jobs[n], cache.directory,
+                                   folds[i], i, features): (n, i) for n, i in tasks}
+            for fut in as_completed(futures):
+                name, i = futures[fut]
+                try:
+                    row = fut.result()
+                    log.info("%s fold %d: RMSE=%.4f (%.2fs)", name, i, row["RMSE"], row["fit_seconds"])
+                except Exception as e:
+                    log.exception("Error in %s fold %d", name, i)
+                    row = {"Model": name, "fold": i, "error": str(e)}
+                results.append(row)
+    per_fold = pd.DataFrame(results).reindex(columns=CV_COLUMNS).sort_values(["Model", "fold"]).reset_index(drop=True)
+    return per_fold, summarize(per_fold)
+
+
+def summarize(per_fold: pd.DataFrame) -> pd.DataFrame:
+    ok = per_fold[per_fold["error"].isna()]
+    summary = ok.groupby("Model").agg(
+        RMSE=("RMSE", "mean"), RMSE_std=("RMSE", "std"), MAE=("MAE", "mean"), R2=("R2", "mean"),
+        folds=("fold", "count"), fit_seconds=("fit_seconds", "sum"), peak_rss_mb=("peak_rss_mb", "max"))
+    return summary.sort_values("RMSE").reset_index()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rolling-origin cross-validation of the candidate models")
+    ap.add_argument("--data", default=str(DATA_CSV))
+    ap.add_argument("--models", nargs="+", choices=list(CANDIDATES), help="default: every candidate")
+    ap.add_argument("--splits", type=int, default=5)
+    ap.add_argument("--window", type=int, default=0, help="rolling training window in rows (0 = expanding)")
+    ap.add_argument("--gap", type=int, default=0, help="rows left out between train and test")
+    ap.add_argument("--cpus", type=int, default=os.cpu_count())
+    ap.add_argument("--cache-dir", default=None, help="keep the fold cache here and reuse it across runs")
+    ap.add_argument("--results", default=str(CV_RESULTS_CSV))
+    ap.add_argument("--summary", default=str(CV_SUMMARY_CSV))
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    X, y = load_training_data(args.data)
+    t0 = time.perf_counter()
+    per_fold, summary = cross_validate(X, y, args.models, n_splits=args.splits, window=args.window or None,
+                                       gap=args.gap, cpu_budget=args.cpus, cache_root=args.cache_dir)
+    for df, path in ((per_fold, args.results), (summary, args.summary)):
+        with atomic_path(path) as tmp:
+            df.to_csv(tmp, index=False)
+    log.info("Cross-validated %d models x %d folds in %.1fs -> %s",
+             per_fold["Model"].nunique(), per_fold["fold"].nunique(), time.perf_counter() - t0, args.summary)
+    print(summary.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# src/datastore.py
+# Compact, memory-mapped copy of engineered_features.csv.
+#
+# The CSV is converted once to an uncompressed Arrow IPC (Feather v2) file next
+# to it (categoricals for coin/symbol, parsed dates, float32 where lossless
+# enough); later starts memory-map that file instead of parsing the CSV.
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.features import parse_engineered_dates
+from src.fileutils import atomic_path
+
+CATEGORICAL_COLS = ["coin", "symbol"]
+DATE_COLS = ["date"]
+FLOAT32_RTOL = 1e-6  # max relative error accepted when downcasting float64 -> float32
+COMPACT_VERSION = b"2"  # bumped when compact_frame changes; older copies are rebuilt (2: explicit date format)
+
+log = logging.getLogger(__name__)
+
+
+def _float32_safe(col: pd.Series, rtol: float = FLOAT32_RTOL) -> bool:
+    v = col.to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = v[np.isfinite(v)]
+    if finite.size and np.abs(finite).max() >= np.finfo(np.float32).max:
+        return False
+    return bool(np.allclose(v.astype(np.float32), v, rtol=rtol, atol=0.0, equal_nan=True))
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Smallest dtypes that keep the data usable: categories, datetimes, float32 / small ints."""
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORICAL_COLS:
+            df[col] = s.astype("category")
+        elif col in DATE_COLS:
+            # notebooks write DD-MM-YYYY; an explicit format, since dayfirst parsing
+            # would swap day and month of ISO dates instead of reading them
+            df[col] = parse_engineered_dates(s)
+            if df[col].isna().sum() > s.isna().sum():
+                log.warning("%d unparseable values in %s", df[col].isna().sum() - s.isna().sum(), col)
+        elif pd.api.types.is_float_dtype(s):
+            if _float32_safe(s):
+                df[col] = s.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(s):
+            df[col] = pd.to_numeric(s, downcast="integer")
+    return df
+
+
+def compact_path(csv_path) -> Path:
+    return Path(csv_path).with_suffix(".arrow")
+
+
+def build_compact(csv_path, out_path=None) -> Path:
+    """Convert the CSV to a compact Arrow file (written atomically). Returns its path."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    csv_path = Path(csv_path)
+    out_path = Path(out_path) if out_path else compact_path(csv_path)
+    df = compact_frame(pd.read_csv(csv_path))
+    # uncompressed, so the file can be memory-mapped without decoding
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"compact_version": COMPACT_VERSION})
+    with atomic_path(out_path) as tmp:
+        feather.write_feather(table, tmp, compression="uncompressed")
+    log.info("Built compact engineered features %s (%d rows)", out_path, len(df))
+    return out_path
+
+
+def load_engineered(csv_path, rebuild: bool = False) -> pd.DataFrame:
+    """
+    Engineered features with compact dtypes, memory-mapped from the Arrow copy.
+    The copy is (re)built when missing, older than the CSV or from an older COMPACT_VERSION.
+    """
+    import pyarrow.feather as feather
+
+    csv_path = Path(csv_path)
+    arrow_path = compact_path(csv_path)
+    if rebuild or not arrow_path.exists() or arrow_path.stat().st_mtime < csv_path.stat().st_mtime:
+        build_compact(csv_path, arrow_path)
+    table = feather.read_table(arrow_path, memory_map=True)
+    if (table.schema.metadata or {}).get(b"compact_version") != COMPACT_VERSION:
+        build_compact(csv_path, arrow_path)
+        table = feather.read_table(arrow_path, memory_map=True)
+    # split_blocks avoids consolidating columns, so null-free numeric columns stay views on the map
+    return table.to_pandas(split_blocks=True)
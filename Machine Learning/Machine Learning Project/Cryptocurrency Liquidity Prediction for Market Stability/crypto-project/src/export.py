@@ -0,0 +1,226 @@
+# src/export.py
+# Export trained models to the portable format run by src/compiled.py, verified
+# against the pickled model before the artifact is written.
+#
+#   python src/export.py                                   (every models/*.pkl)
+#   python src/export.py --model models/XGBoost.pkl --holdout data/processed/engineered_features.csv
+#
+# Supported: linear regressors, DecisionTree / RandomForest / ExtraTrees /
+# GradientBoosting regressors and XGBoost (gbtree, identity-link objectives).
+# Other models (SVR, KNN, ...) are reported and keep serving from the pickle.
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.compiled import FORMAT_VERSION, CompiledModel, compiled_path, save_compiled
+from src.inference import EstimatorBackend, linear_params
+from src.predict import file_fingerprint, load_model, predict_features
+
+XGB_IDENTITY_OBJECTIVES = {"reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror", "reg:quantileerror"}
+
+log = logging.getLogger(__name__)
+
+
+class UnsupportedModel(ValueError):
+    pass
+
+
+# -------------------------
+# Tree flattening
+# -------------------------
+def _flatten(trees):
+    """
+    trees: [(left, right, feature, threshold, value)] with -1 children at leaves.
+    Returns one node table; leaves point to themselves (see CompiledModel).
+    """
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset, depth = 0, 0
+    for l, r, f, t, v in trees:
+        l, r = np.asarray(l, dtype=np.int64), np.asarray(r, dtype=np.int64)
+        ids = np.arange(len(l)) + offset
+        leaf = l < 0
+        roots.append(offset)
+        left.append(np.where(leaf, ids, l + offset))
+        right.append(np.where(leaf, ids, r + offset))
+        feature.append(np.where(leaf, 0, f))
+        threshold.append(t)
+        value.append(v)
+        depth = max(depth, _depth(l, r))
+        offset += len(l)
+    arrays = {
+        "roots": np.asarray(roots, dtype=np.intp),
+        "left": np.concatenate(left).astype(np.intp),
+        "right": np.concatenate(right).astype(np.intp),
+        "feature": np.concatenate(feature).astype(np.intp),
+        "threshold": np.concatenate(threshold),
+        "value": np.concatenate(value).astype(np.float64),
+    }
+    return arrays, depth
+
+
+def _depth(left, right) -> int:
+    depth, level = 0, [0]
+    while True:
+        level = [c for n in level if left[n] >= 0 for c in (left[n], right[n])]
+        if not level:
+            return depth
+        depth += 1
+
+
+def _sklearn_tree(est):
+    t = est.tree_
+    return t.children_left, t.children_right, t.feature, t.threshold.astype(np.float64), t.value[:, 0, 0]
+
+
+def _sklearn_trees(model):
+    """(trees, aggregate, base, scale) for sklearn tree regressors, or None."""
+    name = type(model).__name__
+    if name in ("DecisionTreeRegressor", "ExtraTreeRegressor"):
+        return [_sklearn_tree(model)], "mean", 0.0, 1.0
+    if name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        return [_sklearn_tree(e) for e in model.estimators_], "mean", 0.0, 1.0
+    if name == "GradientBoostingRegressor":
+        if model.init_ == "zero":
+            base = 0.0
+        elif hasattr(model.init_, "constant_"):
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise UnsupportedModel("GradientBoostingRegressor with a custom init estimator")
+        return [_sklearn_tree(e) for e in model.estimators_[:, 0]], "sum", base, float(model.learning_rate)
+    return None
+
+
+def _xgboost_trees(model):
+    """(trees, base) from the booster's JSON dump, or None if `model` isn't an XGBoost regressor."""
+    get_booster = getattr(model, "get_booster", None)
+    if get_booster is None:
+        return None
+    dump = json.loads(get_booster().save_raw(raw_format="json"))
+    learner = dump["learner"]
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise UnsupportedModel(f"XGBoost booster {learner['gradient_booster']['name']}")
+    objective = learner["objective"]["name"]
+    if objective not in XGB_IDENTITY_OBJECTIVES:
+        raise UnsupportedModel(f"XGBoost objective {objective}")
+    if int(learner["learner_model_param"].get("num_target", "1")) != 1:
+        raise UnsupportedModel("multi-output XGBoost model")
+    base = float(learner["learner_model_param"]["base_score"].strip("[]"))
+    trees = []
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        l = np.asarray(tree["left_children"])
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        # leaves keep their value in split_conditions
+        trees.append((l, tree["right_children"], tree["split_indices"], cond, cond.astype(np.float64)))
+    return trees, base
+
+
+# -------------------------
+# Export
+# -------------------------
+def compile_model(model, features=None):
+    """CompiledModel equivalent to `model` (not yet verified). Raises UnsupportedModel."""
+    features = list(features or predict_features(model))
+    header = {"format": FORMAT_VERSION, "features": features}
+    params = linear_params(model, features)
+    if params is not None:
+        header["kind"] = "linear"
+        return CompiledModel(header, {"coef": params[0], "intercept": np.float64(params[1])})
+
+    # trees are indexed by fitted column position; re-map onto `features`
+    fitted = [str(f) for f in getattr(model, "feature_names_in_", features)]
+    sk = _sklearn_trees(model)
+    if sk is not None:
+        trees, aggregate, base, scale = sk
+        compare = "le"
+    else:
+        xgb = _xgboost_trees(model)
+        if xgb is None:
+            raise UnsupportedModel(type(model).__name__)
+        trees, base = xgb
+        aggregate, scale, compare = "sum", 1.0, "lt"
+        booster_names = model.get_booster().feature_names
+        fitted = list(booster_names) if booster_names else fitted
+    if sorted(fitted) != sorted(features):
+        raise UnsupportedModel(f"fitted features {fitted} don't match {features}")
+    arrays, depth = _flatten(trees)
+    arrays["feature"] = np.asarray([features.index(fitted[i]) for i in range(len(fitted))],
+                                   dtype=np.intp)[arrays["feature"]]
+    header.update({"kind": "trees", "compare": compare, "aggregate": aggregate,
+                   "base": base, "scale": scale, "depth": depth})
+    return CompiledModel(header, arrays)
+
+
+def holdout_matrix(features, csv_path=None, rows: int = 5000) -> np.ndarray:
+    """Last `rows` rows of the engineered dataset (time-ordered holdout), or a synthetic probe."""
+    if csv_path is not None and Path(csv_path).exists():
+        df = pd.read_csv(csv_path)
+        return df.reindex(columns=features).tail(rows).apply(pd.to_numeric, errors="coerce") \
+                 .fillna(0.0).to_numpy(dtype=np.float64)
+    log.warning("No holdout data; verifying on a synthetic probe")
+    rng = np.random.default_rng(0)
+    return rng.lognormal(mean=0.0, sigma=3.0, size=(rows, len(features))) * rng.choice([-1, 1], (rows, len(features)))
+
+
+def verify(model, compiled: CompiledModel, X: np.ndarray, rtol: float = 1e-5, atol: float = 1e-6) -> dict:
+    """Compare compiled vs pickled predictions on X. Raises ValueError beyond tolerance."""
+    expected = EstimatorBackend(model, compiled.feature_names).predict(X)
+    got = compiled.predict(X)
+    err = np.abs(got - expected)
+    report = {"rows": int(len(X)), "max_abs_err": float(err.max(initial=0.0)),
+              "rtol": rtol, "atol": atol}
+    if not np.allclose(got, expected, rtol=rtol, atol=atol):
+        raise ValueError(f"Compiled model diverges from the original: {report}")
+    return report
+
+
+def export_model(model_path, holdout=None, rows: int = 5000, rtol: float = 1e-5, atol: float = 1e-6) -> dict:
+    """Compile models/<name>.pkl, verify it on the holdout and write models/compiled/<name>.npz."""
+    model_path = Path(model_path)
+    model = load_model(model_path)
+    compiled = compile_model(model)
+    X = holdout_matrix(compiled.feature_names, holdout, rows)
+    report = verify(model, compiled, X, rtol=rtol, atol=atol)
+    compiled.header.update({"source": model_path.name, "source_sha256": file_fingerprint(model_path),
+                            "verified": report})
+    out = compiled_path(model_path)
+    save_compiled(out, compiled.header, compiled.arrays)
+    return {"model": model_path.name, "artifact": str(out), **report}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export models to the compiled format (src/compiled.py)")
+    ap.add_argument("--model", action="append", help="model pickle (repeatable); default: every models/*.pkl")
+    ap.add_argument("--models-dir", default=str(BASE_DIR / "models"))
+    ap.add_argument("--holdout", default=str(BASE_DIR / "data" / "processed" / "engineered_features.csv"))
+    ap.add_argument("--rows", type=int, default=5000, help="holdout rows used for verification")
+    ap.add_argument("--rtol", type=float, default=1e-5)
+    ap.add_argument("--atol", type=float, default=1e-6)
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    paths = [Path(p) for p in args.model] if args.model else sorted(Path(args.models_dir).glob("*.pkl"))
+    failed = 0
+    for path in paths:
+        try:
+            report = export_model(path, args.holdout, args.rows, args.rtol, args.atol)
+            log.info("Exported %s -> %s (max abs err %.3g on %d rows)",
+                     path.name, report["artifact"], report["max_abs_err"], report["rows"])
+        except UnsupportedModel as e:
+            log.info("Skipped %s: unsupported model (%s)", path.name, e)
+        except Exception:
+            failed += 1
+            log.exception("Export of %s failed", path.name)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# src/features.py
+# Cleaning + feature engineering of one raw CoinGecko snapshot, as done by
+# notebook/01_data_exploration.ipynb and notebook/02_feature_engineering.ipynb
+# (see reports/LLD.md, "Module: features.py"). Works on one frame at a time,
+# so daily files can be processed as they arrive.
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAW_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
+RAW_PATTERN = "coin_gecko_*.csv"  # one snapshot a day, coin_gecko_YYYY-MM-DD.csv
+RAW_NUMERIC = ["price", "1h", "24h", "7d", "24h_volume", "mkt_cap"]
+RAW_COLUMNS = ["coin", "symbol"] + RAW_NUMERIC + ["date"]
+TARGET = "liquidity_score"
+DATE_FORMAT = "%d-%m-%Y"  # dates as the notebooks write them
+
+
+def cast_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Numeric raw columns -> float64 (unparseable values become NaN)."""
+    for c in RAW_NUMERIC:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float64)
+    return df
+
+
+def parse_engineered_dates(s: pd.Series) -> pd.Series:
+    """DD-MM-YYYY dates, with ISO (YYYY-MM-DD) as fallback; NaT for anything else."""
+    dates = pd.to_datetime(s, errors="coerce", format=DATE_FORMAT)
+    rest = dates.isna() & s.notna()
+    if rest.any():
+        dates[rest] = pd.to_datetime(s[rest], errors="coerce", format="%Y-%m-%d")
+    return dates
+
+
+def clean_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop duplicates, cast types, fill gaps (numeric: median, text: mode), date -> dd-mm-yyyy."""
+    missing = [c for c in RAW_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    df = cast_types(df.drop_duplicates().reset_index(drop=True))
+    num_cols = df.select_dtypes(include=np.number).columns
+    df[num_cols] = df[num_cols].fillna(df[num_cols].median())
+    cat_cols = df.select_dtypes(exclude=np.number).columns
+    modes = df[cat_cols].mode()
+    if len(modes):
+        df[cat_cols] = df[cat_cols].fillna(modes.iloc[0])
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    df["date"] = dates.dt.strftime(DATE_FORMAT).where(dates.notna(), df["date"])
+    return df
+
+
+def compute_liquidity_ratio(df: pd.DataFrame) -> pd.Series:
+    """24h_volume / mkt_cap (inf where mkt_cap is 0; generate_features replaces it)."""
+    return df["24h_volume"] / df["mkt_cap"]
+
+
+def generate_features(df: pd.DataFrame) -> pd.DataFrame:
+    """liquidity_ratio, price_change_24h and the liquidity_score target; inf / NaN -> column mean."""
+    df["liquidity_ratio"] = compute_liquidity_ratio(df)
+    df["price_change_24h"] = df["24h"] * df["price"] / 100
+    df[TARGET] = df["liquidity_ratio"].fillna(0)
+    df = df.replace([np.inf, -np.inf], np.nan)
+    return df.fillna(df.mean(numeric_only=True))
+
+
+def engineer_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Raw snapshot -> rows in the layout of data/processed/engineered_features.csv."""
+    return generate_features(clean_snapshot(df))
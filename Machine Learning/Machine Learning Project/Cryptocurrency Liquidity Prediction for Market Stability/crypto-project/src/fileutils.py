@@ -0,0 +1,63 @@
+# src/fileutils.py
+# Small filesystem helpers shared by the stores (history store, model registry).
+import contextlib
+import os
+import time
+import uuid
+from pathlib import Path
+
+
+# -------------------------
+# Cross-process file lock
+# -------------------------
+@contextlib.contextmanager
+def file_lock(path: Path):
+    """
+    Exclusive lock on `<path>.lock`, held for the duration of the block.
+    Serializes writers across processes (several Streamlit / script workers).
+    """
+    lock_path = Path(str(path) + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as fh:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            fcntl = None
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        else:
+            import msvcrt
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """
+    Yield a temp path next to `path`; whatever is written there replaces
+    `path` in one rename when the block exits cleanly (readers never see
+    a half-written file), and is discarded otherwise.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".tmp-{uuid.uuid4().hex[:8]}-{path.name}")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
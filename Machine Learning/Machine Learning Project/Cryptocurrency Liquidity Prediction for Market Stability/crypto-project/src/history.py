@@ -0,0 +1,214 @@
+# src/history.py
+# Prediction history: date-partitioned Parquet store + buffered, non-blocking writer.
+#
+#   <root>/date=YYYY-MM-DD/part-*.parquet   one file per flush (compacted when many)
+#   <root>/rollup_daily.csv, date=*/rollup_coin.parquet   daily aggregates (see src/rollup.py)
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.fileutils import atomic_path, file_lock
+from src.predict import UI_FIELDS
+from src.rollup import DailyRollup
+
+HISTORY_COLUMNS = UI_FIELDS + ["prediction", "mode", "timestamp"]
+TEXT_FIELDS = ["coin", "symbol", "date"]
+
+log = logging.getLogger(__name__)
+
+
+def history_frame(ui_df: pd.DataFrame, preds, mode, timestamp=None) -> pd.DataFrame:
+    """
+    UI fields + prediction + mode + timestamp, in HISTORY_COLUMNS order,
+    with a fixed schema (text fields str, numeric fields float64) so every
+    Parquet part has the same columns / types.
+    `mode` / `timestamp` are one value for all rows, or one per row.
+    """
+    out = ui_df.reindex(columns=UI_FIELDS).reset_index(drop=True)
+    for col in UI_FIELDS:
+        if col in TEXT_FIELDS:
+            out[col] = out[col].fillna("").astype(str)
+        else:
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype(np.float64)
+    out["prediction"] = np.asarray(preds, dtype=np.float64)
+    out["mode"] = mode if isinstance(mode, str) else np.asarray(mode, dtype=object)
+    if timestamp is None or isinstance(timestamp, str):
+        out["timestamp"] = pd.Timestamp(timestamp) if timestamp else pd.Timestamp.now().floor("s")
+    else:
+        out["timestamp"] = pd.to_datetime(np.asarray(timestamp))
+    return out
+
+
+# -------------------------
+# Parquet store
+# -------------------------
+class HistoryStore:
+    """
+    Prediction history partitioned by prediction day.
+    Recent views only open the newest partitions; daily charts read the
+    rollups maintained on every append instead of scanning predictions.
+    """
+
+    compact_after = 32  # part files per partition before they get merged
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.rollup = DailyRollup(self.root)
+        if not self.rollup.exists() and self.partitions():
+            self.rebuild_rollup()
+
+    # ---- writing ----
+    def append(self, df: pd.DataFrame):
+        """Write `df` (HISTORY_COLUMNS) as new part file(s) and update the daily stats."""
+        if df.empty:
+            return
+        days = df["timestamp"].dt.strftime("%Y-%m-%d")
+        with file_lock(self.root / "store"):
+            for day, part in df.groupby(days, sort=False):
+                pdir = self.root / f"date={day}"
+                pdir.mkdir(exist_ok=True)
+                self._write_part(pdir, part.reset_index(drop=True))
+                if len(list(pdir.glob("part-*.parquet"))) > self.compact_after:
+                    self._compact(pdir)
+            self.rollup.update(df)
+
+    def _write_part(self, pdir: Path, df: pd.DataFrame):
+        # write under a temp name, then rename: readers never see half-written files
+        name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+        with atomic_path(pdir / name) as tmp:
+            df.to_parquet(tmp, index=False)
+
+    def _compact(self, pdir: Path):
+        parts = sorted(pdir.glob("part-*.parquet"))
+        self._write_part(pdir, pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True))
+        for p in parts:
+            p.unlink()
+
+    def rebuild_rollup(self):
+        """Recompute the rollups from the stored predictions (one full scan)."""
+        with file_lock(self.root / "store"):
+            self.rollup.clear()
+            for pdir in self.partitions():
+                for p in sorted(pdir.glob("part-*.parquet")):
+                    self.rollup.update(pd.read_parquet(p, columns=["coin", "prediction", "mode", "timestamp"]))
+
+    def import_csv(self, csv_path, chunksize: int = 100_000) -> int:
+        """One-off import of the legacy prediction_history.csv, one append per chunk. Returns rows imported."""
+        rows = dropped = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            ts = pd.to_datetime(chunk["timestamp"], errors="coerce")
+            ok = ts.notna().to_numpy()
+            dropped += int((~ok).sum())
+            chunk, ts = chunk[ok], ts[ok]
+            self.append(history_frame(chunk, chunk["prediction"], chunk["mode"].fillna("single"), timestamp=ts))
+            rows += len(chunk)
+        if dropped:
+            log.warning("Skipped %d rows of %s with an unparseable timestamp", dropped, csv_path)
+        return rows
+
+    # ---- reading ----
+    def partitions(self) -> list:
+        """Partition directories, newest day first."""
+        return sorted((p for p in self.root.glob("date=*") if p.is_dir()), reverse=True)
+
+    def is_empty(self) -> bool:
+        return not self.rollup.exists()
+
+    def read_recent(self, n: int = 50) -> pd.DataFrame:
+        """Last `n` predictions (oldest first), touching only as many partitions as needed."""
+        frames, rows = [], 0
+        with file_lock(self.root / "store"):  # no compaction mid-read
+            for pdir in self.partitions():
+                df = pd.concat([pd.read_parquet(p) for p in sorted(pdir.glob("part-*.parquet"))] or
+                               [pd.DataFrame(columns=HISTORY_COLUMNS)], ignore_index=True)
+                frames.append(df)
+                rows += len(df)
+                if rows >= n:
+                    break
+        if not frames:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        hist = pd.concat(frames[::-1], ignore_index=True)
+        return hist.sort_values("timestamp", kind="stable").tail(n).reset_index(drop=True)
+
+    def daily_stats(self, mode: str = "*") -> pd.DataFrame:
+        """Per-day count / sum / min / max / sumsq / mean / std of predictions, indexed by day."""
+        return self.rollup.daily(mode)
+
+    def coin_daily_stats(self, coins=None, mode: str = "*") -> pd.DataFrame:
+        """Same stats per (day, coin)."""
+        return self.rollup.coin_daily(coins, mode)
+
+
+# -------------------------
+# Background writer
+# -------------------------
+class HistoryWriter:
+    """
+    Queue + dedicated thread that batches history rows and appends them to a
+    HistoryStore. A flush happens every `flush_interval` seconds or once
+    `max_rows` rows are buffered; each flush is a single locked append, so
+    writes from concurrent sessions / processes never interleave.
+    """
+
+    def __init__(self, store: HistoryStore, flush_interval: float = 1.0, max_rows: int = 10_000):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, ui_df: pd.DataFrame, preds, mode: str):
+        """Queue rows for the history (returns immediately). Don't mutate `ui_df` afterwards."""
+        self._queue.put((ui_df, preds, mode, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    def flush(self, timeout: float = None):
+        """Block until everything queued so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        pending, rows = [], 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, last_flush + self.flush_interval - time.monotonic()))
+            except queue.Empty:
+                item = False
+            if isinstance(item, tuple):
+                try:
+                    frame = history_frame(*item[:3], timestamp=item[3])
+                except Exception:  # one malformed write must not stop the writer
+                    log.exception("Dropping malformed history rows (mode=%s)", item[2])
+                else:
+                    pending.append(frame)
+                    rows += len(frame)
+                if rows < self.max_rows and time.monotonic() - last_flush < self.flush_interval:
+                    continue
+            if pending:
+                try:
+                    self.store.append(pd.concat(pending, ignore_index=True))
+                except Exception:
+                    log.exception("Failed to write %d history rows to %s", rows, self.store.root)
+                pending, rows = [], 0
+            last_flush = time.monotonic()
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
@@ -0,0 +1,251 @@
+# src/incremental.py
+# Incremental retraining from new daily CoinGecko snapshots.
+#
+#   python src/incremental.py                  (every data/raw/coin_gecko_*.csv not seen yet)
+#   python src/incremental.py --xgb-rounds 50
+#   python src/incremental.py --rebuild        (forget the state: refit from every raw file, fresh XGBoost)
+#
+# Only files not processed before are read (state: models/incremental/state.json).
+#   Linear Regression / Ridge: running sufficient statistics (row count, means and
+#       centred X'X, X'y) are merged with the new day's, and the fit is re-solved
+#       from them -- O(features^2) per update, whatever the history length.
+#   XGBoost: the current model gets `--xgb-rounds` more boosting rounds on the new rows.
+# Each updated model is registered as a new version (src/registry.py); its metrics are
+# the previous version's error on the new day (test-then-train).
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.features import RAW_DIR, RAW_PATTERN, TARGET, engineer_snapshot
+from src.fileutils import atomic_path, file_lock
+from src.predict import MODEL_FEATURES, file_fingerprint, load_model
+from src.train import CANDIDATES, DATA_CSV, make_model, regression_metrics
+
+MODELS_DIR = BASE_DIR / "models"
+
+# registry name -> ridge penalty of the closed-form fit (same params as src/train.py)
+LINEAR_MODELS = {"Linear_Regression": ("Linear Regression", 0.0),
+                 "Ridge_Regression": ("Ridge Regression", CANDIDATES["Ridge Regression"][1]["alpha"])}
+XGB_NAME = "XGBoost"
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Sufficient statistics for the linear models
+# -------------------------
+class LinearStats:
+    """
+    n, column means and centred co-moments (X'X, X'y about the means), merged
+    batch by batch (Chan et al.) -- the numerically stable form of X'X / X'y, which
+    would lose most digits with features as large as mkt_cap.
+    """
+
+    def __init__(self, n_features: int):
+        self.n = 0
+        self.mean_x = np.zeros(n_features)
+        self.mean_y = 0.0
+        self.cxx = np.zeros((n_features, n_features))
+        self.cxy = np.zeros(n_features)
+
+    def update(self, X, y):
+        X, y = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        m = len(X)
+        if m == 0:
+            return self
+        mx, my = X.mean(axis=0), y.mean()
+        Xc, yc = X - mx, y - my
+        dx, dy = mx - self.mean_x, my - self.mean_y
+        w = self.n * m / (self.n + m)
+        self.cxx += Xc.T @ Xc + w * np.outer(dx, dx)
+        self.cxy += Xc.T @ yc + w * dx * dy
+        self.n += m
+        self.mean_x += dx * m / self.n
+        self.mean_y += dy * m / self.n
+        return self
+
+    def solve(self, alpha: float = 0.0):
+        """(coef, intercept) of least squares with an L2 penalty `alpha` (the intercept is not penalised)."""
+        if self.n == 0:
+            raise ValueError("No rows accumulated yet")
+        # solve on unit-scaled columns for conditioning: (Cxx + aI) b = Cxy with b = g / d
+        d = np.sqrt(np.diag(self.cxx))
+        d[d == 0] = 1.0
+        A = self.cxx / np.outer(d, d) + np.diag(alpha / d ** 2)
+        g = np.linalg.lstsq(A, self.cxy / d, rcond=None)[0]
+        coef = g / d
+        return coef, float(self.mean_y - self.mean_x @ coef)
+
+    def save(self, path):
+        with atomic_path(path) as tmp:
+            with open(tmp, "wb") as fh:
+                np.savez(fh, n=self.n, mean_x=self.mean_x, mean_y=self.mean_y, cxx=self.cxx, cxy=self.cxy)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            stats = cls(len(data["mean_x"]))
+            stats.n = int(data["n"])
+            stats.mean_x, stats.mean_y = data["mean_x"], float(data["mean_y"])
+            stats.cxx, stats.cxy = data["cxx"], data["cxy"]
+        return stats
+
+
+def linear_model_from(stats: LinearStats, candidate: str, alpha: float, features):
+    """A fitted sklearn estimator carrying the closed-form solution (loads, predicts and exports like any other)."""
+    model = make_model(candidate)
+    coef, intercept = stats.solve(alpha)
+    model.coef_, model.intercept_ = coef, intercept
+    model.n_features_in_ = len(features)
+    model.feature_names_in_ = np.asarray(features, dtype=object)
+    return model
+
+
+# -------------------------
+# State
+# -------------------------
+class IncrementalState:
+    """models/incremental/: state.json (processed files) + linear_stats.npz."""
+
+    def __init__(self, models_dir=MODELS_DIR):
+        self.dir = Path(models_dir) / "incremental"
+        self.state_path = self.dir / "state.json"
+        self.stats_path = self.dir / "linear_stats.npz"
+
+    def read(self) -> dict:
+        if not self.state_path.exists():
+            return {"features": MODEL_FEATURES, "files": {}}
+        return json.loads(self.state_path.read_text(encoding="utf-8"))
+
+    def stats(self, n_features: int) -> LinearStats:
+        return LinearStats.load(self.stats_path) if self.stats_path.exists() else LinearStats(n_features)
+
+    def save(self, state: dict, stats: LinearStats):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        stats.save(self.stats_path)
+        with atomic_path(self.state_path) as tmp:
+            tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+    def reset(self):
+        for path in (self.state_path, self.stats_path):
+            path.unlink(missing_ok=True)
+
+
+def new_snapshots(state: dict, raw_dir=RAW_DIR, pattern: str = RAW_PATTERN) -> list:
+    """Raw files not processed yet, in name (= date) order. A changed processed file is skipped with a warning."""
+    out = []
+    for path in sorted(Path(raw_dir).glob(pattern)):
+        seen = state["files"].get(path.name)
+        if seen is None:
+            out.append(path)
+        elif seen["sha256"] != file_fingerprint(path):
+            log.warning("%s changed since it was processed; run with --rebuild to retrain on it", path.name)
+    return out
+
+
+# -------------------------
+# Update
+# -------------------------
+def previous_model(registry, name: str, models_dir):
+    """Latest registered version of `name`, else models/<name>.pkl, else None."""
+    versions = registry.versions(name)
+    path = registry.artifact(versions[-1]) if versions else Path(models_dir) / f"{name}.pkl"
+    return load_model(path) if path.exists() else None
+
+
+def warm_start_xgboost(model, X: pd.DataFrame, y, rounds: int):
+    """`rounds` more boosting rounds on (X, y) on top of `model` (a fresh model when None)."""
+    if model is None:
+        return make_model("XGBoost").fit(X, y)
+    params = {**model.get_params(), "n_estimators": rounds}
+    return type(model)(**params).fit(X, y, xgb_model=model.get_booster())
+
+
+def update(raw_dir=RAW_DIR, models_dir=MODELS_DIR, xgb_rounds: int = 20, register: bool = True,
+           pattern: str = RAW_PATTERN, rebuild: bool = False) -> dict:
+    """
+    Process the new snapshots and register updated models. Returns a summary.
+    `rebuild` forgets the processed files and statistics first, and trains XGBoost from scratch.
+    """
+    from src.registry import ModelRegistry
+    registry = ModelRegistry(Path(models_dir))
+    store = IncrementalState(models_dir)
+    t0 = time.perf_counter()
+    with file_lock(store.state_path):
+        if rebuild:
+            store.reset()
+        state = store.read()
+        features = state["features"]
+        paths = new_snapshots(state, raw_dir, pattern)
+        if not paths:
+            return {"files": [], "rows": 0}
+        frames = []
+        for path in paths:
+            df = engineer_snapshot(pd.read_csv(path))
+            frames.append(df)
+            state["files"][path.name] = {"sha256": file_fingerprint(path), "rows": len(df),
+                                         "processed_at": datetime.now().isoformat(timespec="seconds")}
+        new = pd.concat(frames, ignore_index=True)
+        X, y = new[features].astype(np.float64), new[TARGET].astype(np.float64)
+
+        stats = store.stats(len(features)).update(X.to_numpy(), y.to_numpy())
+        models = {name: linear_model_from(stats, cand, alpha, features)
+                  for name, (cand, alpha) in LINEAR_MODELS.items()}
+        previous = {name: previous_model(registry, name, models_dir) for name in list(models) + [XGB_NAME]}
+        if register:  # boosting rounds that wouldn't be registered would just be lost
+            models[XGB_NAME] = warm_start_xgboost(None if rebuild else previous[XGB_NAME], X, y, xgb_rounds)
+
+        current = registry.current()
+        summary = {"files": [p.name for p in paths], "rows": len(new), "total_rows": stats.n, "models": {}}
+        for name, model in models.items():
+            metrics = {"rows_trained": stats.n if name in LINEAR_MODELS else None, "new_rows": len(new)}
+            if previous[name] is not None:
+                before = regression_metrics(y, previous[name].predict(X))
+                metrics.update({f"prequential_{k}": v for k, v in before.items()})
+            if register:
+                entry = registry.register(model, name, metrics=metrics, features=features, holdout=DATA_CSV,
+                                          activate=current is not None and current["model_name"] == name)
+                metrics["version"] = entry["version"]
+            summary["models"][name] = metrics
+        # the files count as processed only once their models are registered: if registering
+        # fails, the next run merges them again into the same (unsaved) statistics
+        store.save(state, stats)
+    summary["seconds"] = round(time.perf_counter() - t0, 3)
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Incremental retraining from new daily snapshots")
+    ap.add_argument("--raw-dir", default=str(RAW_DIR))
+    ap.add_argument("--pattern", default=RAW_PATTERN)
+    ap.add_argument("--models-dir", default=str(MODELS_DIR))
+    ap.add_argument("--xgb-rounds", type=int, default=20, help="boosting rounds added per update")
+    ap.add_argument("--no-register", action="store_true",
+                    help="only merge the files into the linear statistics (no XGBoost rounds, nothing registered)")
+    ap.add_argument("--rebuild", action="store_true", help="forget processed files and statistics first")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    summary = update(args.raw_dir, args.models_dir, args.xgb_rounds, register=not args.no_register,
+                     pattern=args.pattern, rebuild=args.rebuild)
+    if not summary["files"]:
+        log.info("No new snapshots in %s", args.raw_dir)
+        return 0
+    log.info("Processed %s (%d rows) in %.2fs", ", ".join(summary["files"]), summary["rows"], summary["seconds"])
+    print(json.dumps(summary["models"], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
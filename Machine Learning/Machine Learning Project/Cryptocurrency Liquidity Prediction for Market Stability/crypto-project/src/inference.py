@@ -0,0 +1,123 @@
+# src/inference.py
+import numpy as np
+import pandas as pd
+
+
+# -------------------------
+# Input helpers
+# -------------------------
+def vector_from_dict(d: dict, feature_names) -> np.ndarray:
+    """
+    Build one float64 feature vector from a UI-style dict.
+    Empty / missing / unparsable values -> 0.0 (same rules as the UI).
+    """
+    x = np.zeros(len(feature_names), dtype=np.float64)
+    for j, f in enumerate(feature_names):
+        v = d.get(f, 0.0)
+        try:
+            x[j] = 0.0 if v == "" or v is None else float(v)
+        except Exception:
+            x[j] = 0.0
+    return x
+
+
+def align_columns(X: np.ndarray, src_names, dst_names) -> np.ndarray:
+    """Columns of `X` (ordered as `src_names`) re-laid out as `dst_names`; missing features -> 0.0."""
+    src_names, dst_names = list(src_names), list(dst_names)
+    if src_names == dst_names:
+        return X
+    out = np.zeros((X.shape[0], len(dst_names)), dtype=np.float64)
+    for j, f in enumerate(dst_names):
+        if f in src_names:
+            out[:, j] = X[:, src_names.index(f)]
+    return out
+
+
+# -------------------------
+# Backends
+# -------------------------
+class EstimatorBackend:
+    """Generic path: delegate to the estimator's own `predict`."""
+
+    kind = "estimator"
+
+    def __init__(self, model, feature_names):
+        self.model = model
+        self.feature_names = list(feature_names)
+        # models fitted on DataFrames warn when given bare arrays (and reject
+        # reordered columns), so wrap inputs in a DataFrame in the fitted order
+        fitted = getattr(model, "feature_names_in_", None)
+        self._fitted = None if fitted is None else list(fitted)
+        self._order = None
+        if self._fitted is not None and self._fitted != self.feature_names:
+            self._order = [self.feature_names.index(f) for f in self._fitted]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self._fitted is not None:
+            if self._order is not None:
+                X = X[:, self._order]
+            X = pd.DataFrame(X, columns=self._fitted, copy=False)
+        return np.asarray(self.model.predict(X), dtype=np.float64).ravel()
+
+    def predict_row(self, x: np.ndarray) -> float:
+        return float(self.predict(np.asarray(x, dtype=np.float64).reshape(1, -1))[0])
+
+
+class LinearBackend:
+    """Closed-form path for linear regressors: X @ coef + intercept."""
+
+    kind = "linear"
+
+    def __init__(self, coef, intercept, feature_names, model=None):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.feature_names = list(feature_names)
+        self.model = model
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef + self.intercept
+
+    def predict_row(self, x: np.ndarray) -> float:
+        return float(np.dot(x, self.coef) + self.intercept)
+
+
+def linear_params(model, feature_names):
+    """Return (coef aligned to feature_names, intercept) or None if model isn't a plain linear regressor."""
+    try:
+        from sklearn.base import is_regressor
+        if not is_regressor(model):
+            return None
+    except ImportError:
+        pass
+    try:
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        intercept = np.asarray(model.intercept_, dtype=np.float64).ravel()
+    except Exception:
+        # no coef_ at all, or e.g. XGBoost tree boosters raising on coef_
+        return None
+    if intercept.size != 1 or coef.size != len(feature_names):
+        return None
+    fitted = getattr(model, "feature_names_in_", None)
+    if fitted is not None:
+        fitted = list(fitted)
+        if sorted(fitted) != sorted(feature_names):
+            return None
+        coef = coef[[fitted.index(f) for f in feature_names]]
+    return coef, float(intercept[0])
+
+
+def make_backend(model, feature_names):
+    """
+    Pick the fastest backend that reproduces `model.predict`.
+    Linear regressors get the dot-product path (checked against `predict` on a
+    small probe batch); everything else falls back to EstimatorBackend.
+    """
+    fallback = EstimatorBackend(model, feature_names)
+    params = linear_params(model, feature_names)
+    if params is None:
+        return fallback
+    fast = LinearBackend(params[0], params[1], feature_names, model=model)
+    probe = np.random.default_rng(0).normal(size=(8, len(feature_names))) * 1e3
+    if not np.allclose(fast.predict(probe), fallback.predict(probe), rtol=1e-9, atol=1e-9):
+        return fallback
+    return fast
@@ -0,0 +1,255 @@
+# src/ingest.py
+# Streaming ingestion of the raw CoinGecko snapshots into partitioned Parquet.
+#
+#   python src/ingest.py                              (new data/raw/coin_gecko_*.csv -> data/cleaned/)
+#   python src/ingest.py --chunk-rows 50000 --rebuild
+#
+# Each file is read `--chunk-rows` rows at a time -- memory stays bounded by one
+# chunk whatever the size of the archive -- and every chunk is
+#   cast      numeric columns -> float64 (src/features.py)
+#   dated     DD-MM-YYYY or ISO dates (features.parse_engineered_dates)
+#   deduped   64-bit row hashes (of the parsed date, so 16-03-2022 == 2022-03-16) checked
+#             against every row kept so far (all files, all runs)
+#   validated rows without coin / symbol, with an unparseable date or a negative
+#             price, volume or market cap go to data/cleaned/_rejected/ (with their
+#             `reason` and the date as read, `raw_date`)
+# then appended to data/cleaned/date=YYYY-MM-DD/ (hive partitions, so
+# pd.read_parquet("data/cleaned") reads it all back with a `date` column).
+# Missing values are kept: filling them is a per-snapshot step (src/features.py).
+# Processed files are recorded in data/cleaned/_manifest.json and skipped next time;
+# the per-file validation report is data/cleaned/_validation_report.json.
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.features import RAW_COLUMNS, RAW_DIR, RAW_PATTERN, cast_types, parse_engineered_dates
+from src.fileutils import atomic_path, file_lock
+from src.predict import file_fingerprint
+
+CLEANED_DIR = BASE_DIR / "data" / "cleaned"
+CHUNK_ROWS = 100_000
+NON_NEGATIVE = ["price", "24h_volume", "mkt_cap"]
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Chunk steps
+# -------------------------
+def row_hashes(df: pd.DataFrame, raw_dates: pd.Series) -> np.ndarray:
+    """64-bit hash per row of a dated chunk; rows whose date didn't parse hash their date as read."""
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    bad = df["date"].isna().to_numpy()
+    if bad.any():
+        h[bad] = pd.util.hash_pandas_object(df[bad].assign(date=raw_dates[bad]), index=False).to_numpy()
+    return h
+
+
+def validate_chunk(df: pd.DataFrame):
+    """(valid rows, rejected rows with a `reason` column) of a cast chunk."""
+    reasons = pd.Series("", index=df.index)
+    for col in ("coin", "symbol"):
+        reasons[df[col].isna() | (df[col].str.strip() == "")] += f"missing {col};"
+    reasons[df["date"].isna()] += "bad date;"
+    for col in NON_NEGATIVE:
+        reasons[df[col] < 0] += f"negative {col};"
+    bad = reasons != ""
+    return df[~bad], df[bad].assign(reason=reasons[bad].str.rstrip(";"))
+
+
+class SeenRows:
+    """
+    64-bit hashes of the rows kept so far, as one sorted uint64 array (8 bytes a row,
+    a fraction of a Python set's footprint). Saved with the manifest, so later runs
+    dedup against everything ingested before.
+    """
+
+    def __init__(self, hashes=None):
+        self.hashes = np.empty(0, dtype=np.uint64) if hashes is None else hashes
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def keep(self, h: np.ndarray) -> np.ndarray:
+        """Mask of the row hashes `h` not seen before (first occurrence kept within the chunk); records them."""
+        mask = np.zeros(len(h), dtype=bool)
+        mask[np.unique(h, return_index=True)[1]] = True
+        if len(self.hashes):
+            pos = np.minimum(np.searchsorted(self.hashes, h), len(self.hashes) - 1)
+            mask &= self.hashes[pos] != h
+        new = np.sort(h[mask])  # chunk-sized; the saved array is only merged into, never re-sorted
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new), new)
+        return mask
+
+    def save(self, path):
+        with atomic_path(path) as tmp:
+            with open(tmp, "wb") as fh:
+                np.save(fh, self.hashes)
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path)) if Path(path).exists() else cls()
+
+
+# -------------------------
+# Output
+# -------------------------
+class CleanedStore:
+    """data/cleaned/: date=YYYY-MM-DD/part-<file>-<chunk>.parquet + manifest, hashes, report, rejects."""
+
+    def __init__(self, root=CLEANED_DIR):
+        self.root = Path(root)
+        self.manifest_path = self.root / "_manifest.json"
+        self.hashes_path = self.root / "_row_hashes.npy"
+        self.report_path = self.root / "_validation_report.json"
+        self.rejected_dir = self.root / "_rejected"
+
+    def manifest(self) -> dict:
+        if not self.manifest_path.exists():
+            return {"files": {}}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def write_part(self, df: pd.DataFrame, source: str, chunk: int) -> int:
+        """Write a validated chunk, one Parquet file per date partition. Returns the partitions written."""
+        day = df["date"].dt.strftime("%Y-%m-%d")
+        for key, part in df.drop(columns="date").groupby(day, sort=False):
+            with atomic_path(self.root / f"date={key}" / f"part-{source}-{chunk:05d}.parquet") as tmp:
+                part.to_parquet(tmp, index=False)
+        return day.nunique()
+
+    def drop_parts(self, source: str):
+        """Parts left by an interrupted run over `source` (they'd be duplicated otherwise)."""
+        for path in self.root.glob(f"date=*/part-{source}-*.parquet"):
+            path.unlink()
+        (self.rejected_dir / f"{source}.csv").unlink(missing_ok=True)
+
+    def write_rejected(self, df: pd.DataFrame, source: str, header: bool):
+        self.rejected_dir.mkdir(parents=True, exist_ok=True)
+        df.to_csv(self.rejected_dir / f"{source}.csv", mode="w" if header else "a", header=header, index=False)
+
+    def commit(self, manifest: dict, seen: SeenRows, reports: list):
+        """Hashes first, then the manifest: a file listed in the manifest is always in the hashes."""
+        seen.save(self.hashes_path)
+        with atomic_path(self.manifest_path) as tmp:
+            tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        previous = json.loads(self.report_path.read_text(encoding="utf-8")) if self.report_path.exists() else []
+        names = {r["file"] for r in reports}
+        with atomic_path(self.report_path) as tmp:
+            tmp.write_text(json.dumps([r for r in previous if r["file"] not in names] + reports, indent=2),
+                           encoding="utf-8")
+
+    def reset(self):
+        for path in self.root.glob("date=*/*.parquet"):
+            path.unlink()
+        for path in [*self.rejected_dir.glob("*.csv"), self.manifest_path, self.hashes_path, self.report_path]:
+            path.unlink(missing_ok=True)
+
+
+# -------------------------
+# Pipeline
+# -------------------------
+def ingest_file(path: Path, store: CleanedStore, seen: SeenRows, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """Stream one raw file into the store. Returns its validation report entry."""
+    source = path.stem
+    store.drop_parts(source)
+    report = {"file": path.name, "rows": 0, "duplicates": 0, "rejected": 0, "written": 0,
+              "min_date": None, "max_date": None, "issues": []}
+    first_rejected = True
+    reader = pd.read_csv(path, chunksize=chunk_rows, dtype=str)
+    for i, chunk in enumerate(reader):
+        missing = [c for c in RAW_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        chunk = cast_types(chunk[RAW_COLUMNS].copy())
+        report["rows"] += len(chunk)
+        raw_dates = chunk["date"]
+        chunk["date"] = parse_engineered_dates(raw_dates)
+        new = seen.keep(row_hashes(chunk, raw_dates))
+        report["duplicates"] += int((~new).sum())
+        chunk, raw_dates = chunk[new], raw_dates[new]
+        valid, rejected = validate_chunk(chunk)
+        if len(rejected):
+            rejected = rejected.assign(raw_date=raw_dates[rejected.index])  # what a "bad date" actually was
+            store.write_rejected(rejected, source, header=first_rejected)
+            first_rejected = False
+            report["rejected"] += len(rejected)
+        if len(valid):
+            store.write_part(valid, source, i)
+            report["written"] += len(valid)
+            lo, hi = valid["date"].min().date().isoformat(), valid["date"].max().date().isoformat()
+            report["min_date"] = min(filter(None, [report["min_date"], lo]))
+            report["max_date"] = max(filter(None, [report["max_date"], hi]))
+    # the archive names files coin_gecko_YYYY-MM-DD.csv: flag content from another day
+    stamp = source.rsplit("_", 1)[-1]
+    if report["min_date"] and (report["min_date"] != stamp or report["max_date"] != stamp):
+        report["issues"].append(f"dates {report['min_date']}..{report['max_date']} don't match the file name")
+    if report["rejected"]:
+        report["issues"].append(f"{report['rejected']} invalid rows -> {store.rejected_dir.name}/{source}.csv")
+    return report
+
+
+def ingest(raw_dir=RAW_DIR, out_dir=CLEANED_DIR, pattern: str = RAW_PATTERN, chunk_rows: int = CHUNK_ROWS,
+           rebuild: bool = False) -> list:
+    """Ingest every raw file not in the manifest yet (in name order). Returns their reports."""
+    store = CleanedStore(out_dir)
+    with file_lock(store.manifest_path):
+        if rebuild:
+            store.reset()
+        manifest = store.manifest()
+        seen = SeenRows.load(store.hashes_path)
+        reports = []
+        for path in sorted(Path(raw_dir).glob(pattern)):
+            sha = file_fingerprint(path)
+            done = manifest["files"].get(path.name)
+            if done is not None:
+                if done["sha256"] != sha:
+                    log.warning("%s changed since it was ingested; run with --rebuild to re-ingest it", path.name)
+                continue
+            t0 = time.perf_counter()
+            try:
+                report = ingest_file(path, store, seen, chunk_rows)
+            except (ValueError, pd.errors.ParserError) as e:
+                log.error("Skipping %s: %s", path.name, e)
+                store.drop_parts(path.stem)
+                seen = SeenRows.load(store.hashes_path)  # forget the hashes of its rows
+                continue
+            manifest["files"][path.name] = {"sha256": sha, "rows": report["written"],
+                                            "ingested_at": datetime.now().isoformat(timespec="seconds")}
+            store.commit(manifest, seen, [report])
+            reports.append(report)
+            log.info("%s: %d rows, %d duplicates, %d rejected (%.2fs)", path.name, report["rows"],
+                     report["duplicates"], report["rejected"], time.perf_counter() - t0)
+    return reports
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream raw CoinGecko snapshots into partitioned Parquet")
+    ap.add_argument("--raw-dir", default=str(RAW_DIR))
+    ap.add_argument("--pattern", default=RAW_PATTERN)
+    ap.add_argument("--out", default=str(CLEANED_DIR))
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--rebuild", action="store_true", help="clear the output and ingest every file again")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    reports = ingest(args.raw_dir, args.out, args.pattern, args.chunk_rows, args.rebuild)
+    if not reports:
+        log.info("No new snapshots in %s", args.raw_dir)
+        return 0
+    print(pd.DataFrame(reports).drop(columns="issues").to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+# src/jobs.py
+# Background batch-scoring jobs: submit a CSV, get a job id, poll progress.
+#
+#   python src/jobs.py submit data/universe.csv --model XGBoost   (nightly scoring, runs in the foreground)
+#   python src/jobs.py list
+#   python src/jobs.py cancel <job id>
+#   python src/jobs.py resume <job id>
+#
+# Each job lives in its own directory:
+#   <root>/<job id>/job.json            status, progress, model (+ the artifact it resolved to), error
+#   <root>/<job id>/input.csv           copy of the upload (CLI jobs read their path in place)
+#   <root>/<job id>/parts/00000.csv     one scored chunk per file, written atomically
+#   <root>/<job id>/output.csv          all parts, once the job is done
+# A chunk is only counted once its part file exists, so a job whose worker died
+# (crash, restart) resumes from the last completed chunk instead of starting over --
+# with the model artifact pinned at submit, so all its rows are scored by one model.
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.batch import DEFAULT_CHUNK_SIZE
+from src.fileutils import atomic_path
+from src.predict import predict_batch
+
+JOBS_DIR = BASE_DIR / "reports" / "predictions" / "jobs"
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+log = logging.getLogger(__name__)
+
+# jobs queued / running in this process, whichever JobRunner started them: a rebuilt
+# runner (e.g. a cleared Streamlit cache) must not start a second worker on a job an
+# older runner's thread is still scoring
+_live_jobs = set()
+_live_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _fingerprint(serving) -> str:
+    return serving.key.split(":")[0]  # ServingModel.key is "<sha256>:<mtime>"
+
+
+def count_rows(path, block: int = 1 << 20) -> int:
+    """Data rows in a CSV (newlines minus the header); used for the progress bar only."""
+    n, last = 0, b"\n"
+    with open(path, "rb") as fh:
+        while True:
+            buf = fh.read(block)
+            if not buf:
+                break
+            n += buf.count(b"\n")
+            last = buf[-1:]
+    return max(0, n + (last != b"\n") - 1)
+
+
+def _pid_alive(pid) -> bool:
+    if not pid or os.name == "nt":  # no cheap liveness probe on Windows: treat as gone
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobRunner:
+    """
+    Runs scoring jobs on a small worker pool, chunk by chunk.
+
+    model_source(model_name) -> src/registry.ServingModel. The name is resolved
+    at submit and the artifact's path + sha256 recorded in job.json; every run
+    of the job (first or resumed) scores with that artifact, and fails if it
+    has changed or is gone.
+    admission: optional src/admission.AdmissionController; when given, a job
+    takes a batch slot (and counts against its owner's limit) from submit
+    until it ends, and its queue position is reported by status().
+    on_chunk(job, chunk) sees every scored chunk (e.g. to append to history).
+    """
+
+    def __init__(self, root=JOBS_DIR, model_source=None, max_workers: int = 2,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, admission=None, on_chunk=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.model_source = model_source
+        self.chunk_size = chunk_size
+        self.admission = admission
+        self.on_chunk = on_chunk
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-job")
+        self._tickets = {}  # job id -> admission ticket (None without admission), while queued / running here
+        self._lock = threading.Lock()
+
+    # ---- job files ----
+    def job_dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def output_path(self, job_id: str) -> Path:
+        return self.job_dir(job_id) / "output.csv"
+
+    def _read(self, job_id: str) -> dict:
+        path = self.job_dir(job_id) / "job.json"
+        if not path.exists():
+            raise KeyError(f"Unknown job: {job_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write(self, job: dict):
+        job["updated"] = datetime.now().isoformat(timespec="seconds")
+        with atomic_path(self.job_dir(job["id"]) / "job.json") as tmp:
+            tmp.write_text(json.dumps(job, indent=2), encoding="utf-8")
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        # a marker file, so `jobs.py cancel` from another process works too
+        return (self.job_dir(job_id) / "cancel").exists()
+
+    # ---- API ----
+    def submit(self, source, model: str = "current", owner: str = None) -> str:
+        """
+        Queue a job scoring `source` (DataFrame, file-like upload or CSV path) with `model`.
+        Returns the job id. Raises admission.QueueFull if the owner / queue is at its limit.
+        """
+        job_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        serving = self.model_source(model)  # KeyError for unknown models, before queueing
+        ticket = self.admission.enqueue(owner) if self.admission is not None else None
+        try:
+            jdir = self.job_dir(job_id)
+            jdir.mkdir(parents=True)
+            if isinstance(source, pd.DataFrame):
+                input_path = jdir / "input.csv"
+                source.to_csv(input_path, index=False)
+            elif hasattr(source, "read"):
+                input_path = jdir / "input.csv"
+                source.seek(0)
+                with open(input_path, "wb") as fh:
+                    shutil.copyfileobj(source, fh)
+            else:
+                input_path = Path(source).resolve()
+            job = {"id": job_id, "status": QUEUED, "model": model, "owner": owner,
+                   "model_path": str(serving.path), "model_sha256": _fingerprint(serving),
+                   "input": str(input_path), "rows_total": count_rows(input_path),
+                   "chunk_size": self.chunk_size, "chunks_done": 0, "rows_done": 0,
+                   "created": datetime.now().isoformat(timespec="seconds"), "error": None, "pid": os.getpid()}
+            self._write(job)
+        except Exception:
+            if ticket is not None:
+                self.admission.release(ticket)
+            raise
+        self._claim(job_id)
+        self._start(job_id, ticket)
+        return job_id
+
+    def _live_key(self, job_id: str) -> str:
+        return str(self.job_dir(job_id).resolve())
+
+    def _claim(self, job_id: str) -> bool:
+        """Mark `job_id` live in this process; False if it already is."""
+        with _live_lock:
+            if self._live_key(job_id) in _live_jobs:
+                return False
+            _live_jobs.add(self._live_key(job_id))
+            return True
+
+    def _unclaim(self, job_id: str):
+        with _live_lock:
+            _live_jobs.discard(self._live_key(job_id))
+
+    def _start(self, job_id: str, ticket=None):
+        with self._lock:
+            self._tickets[job_id] = ticket
+        self._pool.submit(self._run, job_id)
+
+    def status(self, job_id: str) -> dict:
+        job = self._read(job_id)
+        ticket = self._tickets.get(job_id)
+        job["queue_position"] = self.admission.position(ticket) if (ticket and job["status"] == QUEUED) else 0
+        job["progress"] = min(1.0, job["rows_done"] / job["rows_total"]) if job["rows_total"] else 0.0
+        return job
+
+    def jobs(self, owner: str = None, limit: int = 20) -> list:
+        """Most recent jobs first (optionally only `owner`'s)."""
+        out = []
+        for jdir in sorted(self.root.iterdir(), reverse=True):
+            if not (jdir / "job.json").exists():
+                continue
+            job = self.status(jdir.name)
+            if owner is None or job.get("owner") == owner:
+                out.append(job)
+            if len(out) >= limit:
+                break
+        return out
+
+    def cancel(self, job_id: str):
+        """Ask a job to stop; it does so before its next chunk."""
+        self._read(job_id)
+        (self.job_dir(job_id) / "cancel").touch()
+
+    def resume(self, job_id: str, owner: str = None) -> bool:
+        """Re-run a failed / cancelled / interrupted job from its last completed chunk. False if not restarted."""
+        job = self._read(job_id)
+        if job["status"] == DONE or not self._claim(job_id):  # done, or still queued / running in this process
+            return False
+        try:
+            ticket = self.admission.enqueue(owner or job.get("owner")) if self.admission is not None else None
+        except Exception:
+            self._unclaim(job_id)
+            raise
+        (self.job_dir(job_id) / "cancel").unlink(missing_ok=True)
+        job.update({"status": QUEUED, "error": None, "pid": os.getpid()})
+        self._write(job)
+        self._start(job_id, ticket)
+        return True
+
+    def recover(self) -> list:
+        """Resume every job left queued / running by a previous process (call once at startup)."""
+        resumed = []
+        for jdir in sorted(self.root.iterdir()):
+            try:
+                job = self._read(jdir.name)
+            except (KeyError, ValueError):
+                continue
+            # skip jobs another live process (e.g. a CLI run) is still working on; resume()
+            # skips those a thread of this process is
+            if job["status"] in ACTIVE and (job.get("pid") == os.getpid() or not _pid_alive(job.get("pid"))):
+                try:
+                    if self.resume(job["id"]):
+                        resumed.append(job["id"])
+                except Exception:
+                    log.exception("Could not resume job %s", job["id"])
+        return resumed
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    # ---- worker ----
+    def _run(self, job_id: str):
+        ticket = self._tickets.get(job_id)
+        job = None
+        try:
+            job = self._read(job_id)
+            if ticket is not None:
+                while not self.admission.wait(ticket, timeout=0.5):
+                    if self._cancel_requested(job_id):
+                        raise JobCancelled()
+            job.update({"status": RUNNING, "started": datetime.now().isoformat(timespec="seconds")})
+            self._write(job)
+            self._score(job)
+            job.update({"status": DONE, "output": str(self.output_path(job_id))})
+        except JobCancelled:
+            job["status"] = CANCELLED
+        except Exception as e:
+            log.exception("Batch job %s failed", job_id)
+            if job is not None:  # else job.json is unreadable: nothing to record the failure in
+                job.update({"status": FAILED, "error": str(e)})
+        finally:
+            if ticket is not None:
+                self.admission.release(ticket)
+            with self._lock:
+                self._tickets.pop(job_id, None)
+            self._unclaim(job_id)
+            if job is not None:
+                job["finished"] = datetime.now().isoformat(timespec="seconds")
+                self._write(job)
+
+    def _pinned_backend(self, job: dict):
+        """Backend of the artifact the job was submitted with (ValueError if it changed since)."""
+        serving = self.model_source(job["model"])
+        pinned = job.get("model_sha256")
+        if pinned is None or _fingerprint(serving) == pinned:  # (jobs from before models were pinned)
+            return serving.backend
+        # `model` now resolves to another artifact (e.g. a newer current version): reuse the old one
+        from src.registry import load_serving, validate
+        path = Path(job["model_path"])
+        if path.exists():
+            serving = load_serving(path)
+            if _fingerprint(serving) == pinned:
+                validate(serving)
+                return serving.backend
+        raise ValueError(f"Model {job['model']} ({path.name}) changed since the job was submitted; "
+                         "submit it again to score with the current model")
+
+    def _score(self, job: dict):
+        jdir = self.job_dir(job["id"])
+        parts = jdir / "parts"
+        parts.mkdir(exist_ok=True)
+        backend = self._pinned_backend(job)
+        job["rows_done"] = 0
+        t0 = time.perf_counter()
+        for i, chunk in enumerate(pd.read_csv(job["input"], chunksize=job["chunk_size"])):
+            part = parts / f"{i:05d}.csv"
+            if not part.exists():  # else: scored before the worker stopped
+                if self._cancel_requested(job["id"]):
+                    raise JobCancelled()
+                chunk["prediction"] = predict_batch(backend, chunk)
+                with atomic_path(part) as tmp:
+                    chunk.to_csv(tmp, header=(i == 0), index=False)
+                if self.on_chunk is not None:
+                    self.on_chunk(job, chunk)
+            job["chunks_done"] = i + 1
+            job["rows_done"] += len(chunk)
+            self._write(job)
+        # stitch the parts together (only the first one has a header)
+        with atomic_path(self.output_path(job["id"])) as tmp:
+            with open(tmp, "wb") as out:
+                for part in sorted(parts.glob("[0-9]*.csv")):  # not .tmp-* left by a killed worker
+                    with open(part, "rb") as fh:
+                        shutil.copyfileobj(fh, out)
+        shutil.rmtree(parts)
+        job["seconds"] = round(time.perf_counter() - t0, 3)
+
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Background batch-scoring jobs")
+    ap.add_argument("--root", default=str(JOBS_DIR))
+    ap.add_argument("--models-dir", default=str(BASE_DIR / "models"))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("submit", help="score a CSV")
+    p.add_argument("input")
+    p.add_argument("--model", default="current", help="model in --models-dir (default: the registry's current one)")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    sub.add_parser("list")
+    for name in ("status", "cancel", "resume"):
+        sub.add_parser(name).add_argument("job_id")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    def model_source(name):
+        from src.registry import LiveModel, ModelPool, ModelRegistry
+        live = LiveModel(ModelRegistry(Path(args.models_dir)), fallback_path=Path(args.models_dir) / "Linear_Regression.pkl")
+        return ModelPool(live).get(name)
+
+    def on_chunk(job, chunk):
+        log.info("Job %s: %d / %d rows", job["id"], job["rows_done"] + len(chunk), job["rows_total"])
+
+    runner = JobRunner(args.root, model_source, max_workers=1, on_chunk=on_chunk,
+                       chunk_size=getattr(args, "chunk_size", DEFAULT_CHUNK_SIZE))
+    if args.cmd == "list":
+        for job in runner.jobs(limit=50):
+            print(f"{job['id']}  {job['status']:<9} {job['rows_done']:>12,} / {job['rows_total']:,} rows  model={job['model']}")
+        return 0
+    if args.cmd == "status":
+        print(json.dumps(runner.status(args.job_id), indent=2))
+        return 0
+    if args.cmd == "cancel":
+        runner.cancel(args.job_id)
+        return 0
+
+    if args.cmd == "submit":
+        job_id = runner.submit(args.input, model=args.model)
+    else:
+        job_id = args.job_id
+        runner.resume(job_id)
+    print(job_id)
+    runner.shutdown(wait=True)
+    job = runner.status(job_id)
+    log.info("Job %s %s: %d rows -> %s", job_id, job["status"], job["rows_done"], job.get("output"))
+    return 0 if job["status"] == DONE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
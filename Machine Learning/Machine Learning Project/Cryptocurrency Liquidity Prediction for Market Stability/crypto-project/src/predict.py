@@ -0,0 +1,112 @@
+# src/predict.py
+# Prediction logic decoupled from the UI (see reports/LLD.md, "Module: predict.py").
+import hashlib
+import weakref
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.batch import to_feature_matrix, predict_matrix
+from src.inference import make_backend, vector_from_dict
+
+# -------------------------
+# The model expects only these numeric features at predict time:
+# -------------------------
+MODEL_FEATURES = [
+    "price",
+    "1h",
+    "24h",
+    "7d",
+    "24h_volume",
+    "mkt_cap",
+    "liquidity_ratio",
+    "price_change_24h",
+]
+
+# Full UI / history fields (includes coin/symbol/date for UX)
+UI_FIELDS = [
+    "coin", "symbol", "price", "1h", "24h", "7d",
+    "24h_volume", "mkt_cap", "date", "liquidity_ratio", "price_change_24h"
+]
+
+
+# -------------------------
+# Model & feature order
+# -------------------------
+def load_model(path):
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Model not found: {path}")
+    import joblib  # unpickling also imports sklearn / xgboost; only paid when a pickle is loaded
+    return joblib.load(path)
+
+
+def model_feature_names(model) -> list:
+    """Feature names the model was fitted with (MODEL_FEATURES if it doesn't say)."""
+    try:
+        return list(model.feature_names_in_)
+    except Exception:
+        return MODEL_FEATURES.copy()
+
+
+def predict_features(model) -> list:
+    """Column order actually sent to the model: model order when we can provide all of it."""
+    names = model_feature_names(model)
+    return names if all(n in MODEL_FEATURES for n in names) else MODEL_FEATURES.copy()
+
+
+def file_fingerprint(path) -> str:
+    """sha256 of a model artifact or data file (streamed, so large files aren't read into memory)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def coefficient_table(model):
+    """Linear coefficients as a DataFrame (feature, coef) sorted by |coef|, or None if the model has none."""
+    if not hasattr(model, "coef_"):
+        return None
+    coefs = np.asarray(model.coef_).flatten()
+    # prefer the fitted feature names, restricted to the ones the UI knows
+    names = [n for n in model_feature_names(model) if n in MODEL_FEATURES]
+    if len(coefs) >= len(names):
+        coefs = coefs[:len(names)]
+    imp_df = pd.DataFrame({"feature": names, "coef": coefs})
+    return imp_df.sort_values("coef", key=lambda s: s.abs(), ascending=False).reset_index(drop=True)
+
+
+_backends = weakref.WeakKeyDictionary()
+
+
+def get_backend(model):
+    """Inference backend for `model` (built once per model object). Backends pass through."""
+    if hasattr(model, "predict_row"):
+        return model
+    try:
+        return _backends[model]
+    except (KeyError, TypeError):
+        pass
+    backend = make_backend(model, predict_features(model))
+    try:
+        _backends[model] = backend
+    except TypeError:
+        pass  # not weak-referenceable, just don't cache
+    return backend
+
+
+# -------------------------
+# Public API
+# -------------------------
+def predict_from_dict(model, input_dict: dict) -> float:
+    """Predict liquidity_score for one UI-style dict. `model` may be an estimator or a backend."""
+    backend = get_backend(model)
+    return backend.predict_row(vector_from_dict(input_dict, backend.feature_names))
+
+
+def predict_batch(model, df: pd.DataFrame) -> np.ndarray:
+    """Predict every row of `df` (missing / non-numeric features -> 0.0)."""
+    backend = get_backend(model)
+    return predict_matrix(backend, to_feature_matrix(df, backend.feature_names))
@@ -0,0 +1,360 @@
+# src/registry.py
+# Versioned model artifacts + models/metadata.json, and hot reload for servers.
+#
+#   python src/registry.py register --model models/Linear_Regression.pkl --name Linear_Regression
+#   python src/registry.py list
+#   python src/registry.py activate --name Linear_Regression --version 2025-11-14_v2
+#   python src/registry.py rollback
+#
+# metadata.json keeps the fields of pipeline_architecture.md §7.1 for the
+# current model at top level, plus the list of registered versions:
+#   {"model_name": ..., "version": ..., "trained_on": ..., "features": [...],
+#    "metrics": {...}, "path": "Linear_Regression_2025-11-14_v1.pkl", "versions": [...]}
+import argparse
+import json
+import logging
+import sys
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.compiled import compiled_path, load_compiled_for
+from src.fileutils import atomic_path, file_lock
+from src.inference import LinearBackend, make_backend
+from src.predict import MODEL_FEATURES, file_fingerprint, load_model, predict_features
+
+METADATA_FILE = "metadata.json"
+ENTRY_FIELDS = ["model_name", "version", "trained_on", "features", "metrics", "path"]
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Registry
+# -------------------------
+class ModelRegistry:
+    """Versioned artifacts in `models_dir`, described by `models_dir/metadata.json`."""
+
+    def __init__(self, models_dir, keep: int = 3):
+        self.models_dir = Path(models_dir)
+        self.metadata_path = self.models_dir / METADATA_FILE
+        self.keep = keep  # artifacts kept per model name (the current one is never pruned)
+
+    # ---- metadata ----
+    def read(self) -> dict:
+        if not self.metadata_path.exists():
+            return {"versions": []}
+        with open(self.metadata_path, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _write(self, meta: dict):
+        with atomic_path(self.metadata_path) as tmp:
+            tmp.write_text(json.dumps(meta, indent=2, default=str), encoding="utf-8")
+
+    def versions(self, name: str = None) -> list:
+        return [v for v in self.read().get("versions", []) if name is None or v["model_name"] == name]
+
+    def current(self):
+        """Entry of the active model, or None if nothing is registered."""
+        meta = self.read()
+        if not meta.get("path"):
+            return None
+        return {k: meta.get(k) for k in ENTRY_FIELDS}
+
+    def artifact(self, entry: dict) -> Path:
+        return self.models_dir / entry["path"]
+
+    # ---- changes ----
+    def register(self, model, name: str, metrics: dict = None, features=None, activate: bool = True,
+                 compile: bool = True, holdout=None) -> dict:
+        """
+        Save `model` as the next version of `name` (atomically) and optionally make it current.
+        With `compile`, the compiled export (src/export.py, verified on `holdout`) is written
+        before activation, so servers pick up the lean artifact straight away.
+        """
+        with file_lock(self.metadata_path):
+            meta = self.read()
+            # N keeps increasing across days and pruning (the newest version is never pruned)
+            n = 1 + max((int(v["version"].rsplit("_v", 1)[1]) for v in meta.get("versions", [])
+                         if v["model_name"] == name), default=0)
+            version = f"{date.today().isoformat()}_v{n}"
+            entry = {
+                "model_name": name,
+                "version": version,
+                "trained_on": date.today().isoformat(),
+                "features": list(features or predict_features(model)),
+                "metrics": metrics or {},
+                "path": f"{name}_{version}.pkl",
+                "registered_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            import joblib
+            with atomic_path(self.models_dir / entry["path"]) as tmp:
+                joblib.dump(model, tmp)
+            if compile:
+                self._compile(self.models_dir / entry["path"], holdout)
+            meta.setdefault("versions", []).append(entry)
+            if activate:
+                meta.update({k: entry[k] for k in ENTRY_FIELDS})
+            self._prune(meta, name)
+            self._write(meta)
+        log.info("Registered %s %s (active=%s)", name, version, activate)
+        return entry
+
+    def activate(self, name: str, version: str) -> dict:
+        with file_lock(self.metadata_path):
+            meta = self.read()
+            for entry in meta.get("versions", []):
+                if entry["model_name"] == name and entry["version"] == version:
+                    meta.update({k: entry[k] for k in ENTRY_FIELDS})
+                    self._write(meta)
+                    return entry
+        raise ValueError(f"Unknown model version: {name} {version}")
+
+    def rollback(self) -> dict:
+        """Activate the version registered just before the current one (same model name)."""
+        cur = self.current()
+        if cur is None:
+            raise ValueError("Nothing registered to roll back from")
+        versions = self.versions(cur["model_name"])
+        idx = [v["version"] for v in versions].index(cur["version"])
+        if idx == 0:
+            raise ValueError(f"No version of {cur['model_name']} before {cur['version']}")
+        return self.activate(cur["model_name"], versions[idx - 1]["version"])
+
+    @staticmethod
+    def _compile(path: Path, holdout):
+        from src.export import UnsupportedModel, export_model
+        try:
+            export_model(path, holdout)
+        except UnsupportedModel as e:
+            log.info("No compiled export for %s (%s); it will be served from the pickle", path.name, e)
+        except Exception:
+            log.exception("Compiled export of %s failed; it will be served from the pickle", path.name)
+
+    def _prune(self, meta: dict, name: str):
+        mine = [v for v in meta["versions"] if v["model_name"] == name]
+        for old in mine[:-self.keep] if len(mine) > self.keep else []:
+            if old["path"] == meta.get("path"):
+                continue
+            (self.models_dir / old["path"]).unlink(missing_ok=True)
+            compiled_path(self.models_dir / old["path"]).unlink(missing_ok=True)
+            meta["versions"].remove(old)
+
+
+# -------------------------
+# Hot reload
+# -------------------------
+ServingModel = namedtuple("ServingModel", ["model", "backend", "entry", "key", "path"])
+
+
+def default_probe(n_features: int) -> np.ndarray:
+    """Probe batch used to validate a freshly loaded model before it goes live."""
+    rng = np.random.default_rng(0)
+    return np.vstack([np.zeros(n_features), np.ones(n_features), rng.random((30, n_features))])
+
+
+def load_serving(path, entry=None) -> ServingModel:
+    """Load a model artifact, preferring its compiled export (src/export.py) when it is up to date."""
+    path = Path(path)
+    stat = path.stat()
+    fingerprint = file_fingerprint(path)
+    compiled = load_compiled_for(path, fingerprint)
+    if compiled is not None and compiled.kind == "compiled-linear":
+        # same closed-form backend as a pickled linear model (what-if sweeps rely on it)
+        model, backend = compiled, LinearBackend(compiled.coef_, compiled.intercept_, compiled.feature_names, compiled)
+    elif compiled is not None:
+        model = backend = compiled
+    else:
+        model = load_model(path)
+        backend = make_backend(model, predict_features(model))
+    return ServingModel(model, backend, entry, f"{fingerprint}:{stat.st_mtime_ns}", path)
+
+
+def validate(serving: ServingModel, probe: np.ndarray = None):
+    """Raise ValueError unless the model scores the probe batch with finite, well-shaped output."""
+    features = serving.backend.feature_names
+    if not all(f in MODEL_FEATURES for f in features):
+        raise ValueError(f"Model expects unknown features: {[f for f in features if f not in MODEL_FEATURES]}")
+    probe = default_probe(len(features)) if probe is None else probe
+    preds = serving.backend.predict(probe)
+    if preds.shape != (len(probe),) or not np.all(np.isfinite(preds)):
+        raise ValueError("Model failed validation on the probe batch")
+
+
+class LiveModel:
+    """
+    The model currently being served. `get()` returns an immutable
+    ServingModel; a reload swaps the reference in one assignment, so
+    requests already holding the previous one finish on it undisturbed.
+    A watcher thread polls metadata.json and loads + validates new
+    versions in the background before swapping them in.
+    """
+
+    def __init__(self, registry: ModelRegistry, fallback_path=None, poll_interval: float = 5.0, probe=None):
+        self.registry = registry
+        self.fallback_path = Path(fallback_path) if fallback_path else None
+        self.poll_interval = poll_interval
+        self.probe = probe
+        self._serving = self._load_current()
+        self._seen = self._stamp()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self) -> ServingModel:
+        return self._serving
+
+    def _stamp(self):
+        p = self.registry.metadata_path
+        return p.stat().st_mtime_ns if p.exists() else None
+
+    def _load_current(self) -> ServingModel:
+        entry = self.registry.current()
+        if entry is not None:
+            serving = load_serving(self.registry.artifact(entry), entry)
+        elif self.fallback_path is not None:
+            serving = load_serving(self.fallback_path)
+        else:
+            raise FileNotFoundError(f"No model registered in {self.registry.metadata_path}")
+        validate(serving, self.probe)
+        return serving
+
+    def reload(self) -> bool:
+        """Load + validate the registry's current model and swap it in. Returns True if swapped."""
+        entry = self.registry.current()
+        if entry is not None and self._serving.entry is not None and entry["path"] == self._serving.entry["path"]:
+            return False
+        try:
+            serving = self._load_current()
+        except Exception:
+            log.exception("Hot reload rejected; still serving %s", self._serving.path.name)
+            return False
+        self._serving = serving  # atomic swap
+        log.info("Hot reload: now serving %s", serving.path.name)
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            stamp = self._stamp()
+            if stamp != self._seen:
+                self._seen = stamp
+                self.reload()
+
+
+# -------------------------
+# Several models side by side
+# -------------------------
+CURRENT = "current"
+
+
+class ModelPool:
+    """
+    Named models loaded concurrently: CURRENT is the registry's live model,
+    any other name is a `models_dir/<name>.pkl` file (e.g. the notebook's
+    XGBoost.pkl, Random_Forest.pkl, ...). Models are loaded + validated on
+    first use and reloaded when their file changes; if the new file fails to
+    load or validate, the last good model keeps serving (like LiveModel).
+    """
+
+    def __init__(self, live: LiveModel, models_dir=None):
+        self.live = live
+        self.models_dir = Path(models_dir) if models_dir else live.registry.models_dir
+        self._models = {}
+        self._failed = {}  # name -> mtime of a file that failed to load (not retried until it changes)
+        self._lock = threading.Lock()
+
+    def names(self) -> list:
+        """CURRENT + every plain .pkl in models_dir (registry version artifacts are left out)."""
+        versioned = {v["path"] for v in self.live.registry.versions()}
+        files = sorted(p.stem for p in self.models_dir.glob("*.pkl") if p.name not in versioned)
+        return [CURRENT] + files
+
+    def _stale(self, name: str, cached, mtime: int) -> bool:
+        """The file changed since `cached` was loaded (and isn't a version that already failed)."""
+        if cached is None:
+            return True
+        return cached[0] != mtime and self._failed.get(name) != mtime
+
+    def get(self, name: str = None) -> ServingModel:
+        if name in (None, CURRENT):
+            return self.live.get()
+        path = self.models_dir / f"{name}.pkl"
+        if path.parent != self.models_dir or not path.exists():
+            raise KeyError(f"Unknown model: {name}")
+        mtime = path.stat().st_mtime_ns
+        cached = self._models.get(name)
+        if self._stale(name, cached, mtime):
+            with self._lock:  # one load per model even under concurrent first requests
+                cached = self._models.get(name)
+                if self._stale(name, cached, mtime):
+                    try:
+                        serving = load_serving(path)
+                        validate(serving, self.live.probe)
+                    except Exception:
+                        if cached is None:
+                            raise
+                        log.exception("Reload of %s failed; keeping the previously loaded model", path.name)
+                        self._failed[name] = mtime
+                    else:
+                        self._models[name] = cached = (mtime, serving)
+                        self._failed.pop(name, None)
+        return cached[1]
+
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Model registry (models/metadata.json)")
+    ap.add_argument("--models-dir", default=str(BASE_DIR / "models"))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    reg = sub.add_parser("register", help="register a pickled model as a new version")
+    reg.add_argument("--model", required=True)
+    reg.add_argument("--name", required=True)
+    reg.add_argument("--metrics", default="{}", help="JSON dict, e.g. '{\"RMSE\": 0.01}'")
+    reg.add_argument("--no-activate", action="store_true")
+    reg.add_argument("--no-compile", action="store_true", help="skip the compiled export (src/export.py)")
+    reg.add_argument("--holdout", default=str(BASE_DIR / "data" / "processed" / "engineered_features.csv"),
+                     help="rows used to verify the compiled export")
+    sub.add_parser("list")
+    act = sub.add_parser("activate")
+    act.add_argument("--name", required=True)
+    act.add_argument("--version", required=True)
+    sub.add_parser("rollback")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    registry = ModelRegistry(args.models_dir)
+    if args.cmd == "register":
+        entry = registry.register(load_model(args.model), args.name, json.loads(args.metrics),
+                                  activate=not args.no_activate, compile=not args.no_compile,
+                                  holdout=args.holdout)
+        print(json.dumps(entry, indent=2))
+    elif args.cmd == "list":
+        cur = registry.current() or {}
+        for v in registry.versions():
+            mark = "*" if v["path"] == cur.get("path") else " "
+            print(f"{mark} {v['model_name']:<24} {v['version']:<16} {v['path']}")
+    elif args.cmd == "activate":
+        print(json.dumps(registry.activate(args.name, args.version), indent=2))
+    elif args.cmd == "rollback":
+        print(json.dumps(registry.rollback(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# src/reports.py
+# PDF reports, rendered on a worker pool and cached by their inputs.
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+
+# -------------------------
+# Rendering
+# -------------------------
+class _Writer:
+    """Line-oriented helper around a reportlab canvas (handles page breaks)."""
+
+    def __init__(self, buf):
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import letter
+        self.c = canvas.Canvas(buf, pagesize=letter)
+        self.y = 760
+
+    def title(self, text: str):
+        self.c.setFont("Helvetica-Bold", 14)
+        self.c.drawString(40, self.y, text)
+        self.c.setFont("Helvetica", 10)
+        self.y -= 18
+
+    def line(self, text: str, x: int = 40, step: int = 14):
+        if self.y < 60:
+            self.c.showPage()
+            self.c.setFont("Helvetica", 10)
+            self.y = 750
+        self.c.drawString(x, self.y, text[:120])
+        self.y -= step
+
+    def save(self):
+        self.c.save()
+
+
+def render_report_pdf(input_row: dict, pred: float) -> bytes:
+    """Single-prediction report (same layout as the original in-app report)."""
+    buf = io.BytesIO()
+    w = _Writer(buf)
+    w.title("Crypto Liquidity Prediction Report")
+    w.line(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", step=18)
+    w.line(f"Predicted liquidity_score: {pred:.6f}", step=22)
+    w.line("Input features:", step=18)
+    for col, val in input_row.items():
+        w.line(f"{col}: {val}", x=50)
+    w.save()
+    return buf.getvalue()
+
+
+def render_batch_pdf(df: pd.DataFrame, max_rows: int = 5000) -> bytes:
+    """Multi-page report for a batch: summary over all rows, then one line per row (first `max_rows`)."""
+    buf = io.BytesIO()
+    w = _Writer(buf)
+    preds = pd.to_numeric(df["prediction"], errors="coerce")
+    w.title("Crypto Liquidity Batch Prediction Report")
+    w.line(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", step=18)
+    w.line(f"Rows: {len(df):,}")
+    w.line(f"Predicted liquidity_score  mean: {preds.mean():.6f}  min: {preds.min():.6f}  max: {preds.max():.6f}", step=22)
+    w.line("Rows:" if len(df) <= max_rows else f"Rows (first {max_rows:,}):", step=18)
+    for i, d in enumerate(df.head(max_rows).to_dict("records")):
+        pred = d.pop("prediction", float("nan"))
+        w.line(f"#{i + 1}  prediction={pred:.6f}  " + "  ".join(f"{k}={v}" for k, v in d.items()), x=50)
+    w.save()
+    return buf.getvalue()
+
+
+# -------------------------
+# Cache keys
+# -------------------------
+def report_key(input_row: dict, pred: float) -> str:
+    payload = json.dumps({"row": input_row, "pred": float(pred)}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def batch_key(df: pd.DataFrame) -> str:
+    h = hashlib.sha1(",".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+# -------------------------
+# Worker pool + cache
+# -------------------------
+class ReportRenderer:
+    """
+    Renders reports off the request path. Results (futures of
+    `(file_name, pdf_bytes)`) are cached by input, so asking twice for the
+    same report -- or from two sessions -- renders it once.
+    """
+
+    def __init__(self, out_dir=None, max_workers: int = 2, cache_size: int = 128):
+        self.out_dir = Path(out_dir) if out_dir else None
+        self.cache_size = cache_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-report")
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, input_row: dict, pred: float):
+        key = report_key(input_row, pred)
+        return self._submit(key, "liquidity_report", render_report_pdf, dict(input_row), float(pred))
+
+    def submit_batch(self, df: pd.DataFrame):
+        key = batch_key(df)
+        return self._submit(key, "liquidity_batch_report", render_batch_pdf, df.copy())
+
+    def _submit(self, key, prefix, fn, *args):
+        with self._lock:
+            fut = self._cache.get(key)
+            if fut is not None and not (fut.done() and fut.exception() is not None):
+                self._cache.move_to_end(key)
+                return fut
+            fut = self._pool.submit(self._render, prefix, fn, *args)
+            self._cache[key] = fut
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return fut
+
+    def _render(self, prefix, fn, *args):
+        data = fn(*args)
+        name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        if self.out_dir is not None:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            (self.out_dir / name).write_bytes(data)
+        return name, data
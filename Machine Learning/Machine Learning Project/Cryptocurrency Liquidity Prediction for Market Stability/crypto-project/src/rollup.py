@@ -0,0 +1,134 @@
+# src/rollup.py
+# Incrementally maintained daily aggregates of predictions.
+#
+#   <root>/rollup_daily.csv                  (day, mode)  -> count, sum, min, max, sumsq
+#   <root>/date=YYYY-MM-DD/rollup_coin.parquet  (mode, coin) -> same stats, for that day
+#
+# mode == "*" rows aggregate over all modes, so the global daily chart reads
+# O(days) rows and a per-coin chart reads one small file per day.
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.fileutils import atomic_path
+
+ALL = "*"
+STATS = ["count", "sum", "min", "max", "sumsq"]
+_MERGE = {"count": "sum", "sum": "sum", "min": "min", "max": "max", "sumsq": "sum"}
+
+
+def summarize(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """count / sum / min / max / sum of squares of `prediction` per `keys`."""
+    g = df.assign(_sq=df["prediction"] ** 2).groupby(keys, sort=False)
+    out = g["prediction"].agg(["count", "sum", "min", "max"])
+    out["sumsq"] = g["_sq"].sum()
+    return out.reset_index()
+
+
+def merge(old: pd.DataFrame, new: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Combine two rollups with the same keys (stats are all mergeable)."""
+    both = pd.concat([old, new], ignore_index=True)
+    return both.groupby(keys, sort=True).agg(_MERGE).reset_index()
+
+
+def with_moments(df: pd.DataFrame) -> pd.DataFrame:
+    """Add mean / std (population) derived from count, sum, sumsq."""
+    df = df.copy()
+    df["mean"] = df["sum"] / df["count"]
+    df["std"] = np.sqrt(np.maximum(df["sumsq"] / df["count"] - df["mean"] ** 2, 0.0))
+    return df
+
+
+def _empty(keys: list) -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype="object" if c in keys else "float64") for c in keys + STATS})
+
+
+def _with_all_modes(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Per-mode rows plus the same grouping with mode collapsed to ALL."""
+    return pd.concat([summarize(df, ["mode"] + keys), summarize(df.assign(mode=ALL), ["mode"] + keys)],
+                     ignore_index=True)
+
+
+class DailyRollup:
+    """
+    Daily prediction aggregates, updated as history is written.
+    Callers serialize `update` (HistoryStore holds its lock around it).
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.daily_path = self.root / "rollup_daily.csv"
+
+    def exists(self) -> bool:
+        return self.daily_path.exists()
+
+    def stamp(self):
+        """Changes whenever the rollups do (mtime of the daily file); a cache key for views."""
+        return self.daily_path.stat().st_mtime_ns if self.daily_path.exists() else None
+
+    # ---- writing ----
+    def update(self, df: pd.DataFrame):
+        """Fold new history rows (timestamp, mode, coin, prediction) into the rollups."""
+        if df.empty:
+            return
+        df = df.assign(day=df["timestamp"].dt.strftime("%Y-%m-%d"), coin=df["coin"].fillna("").astype(str))
+        keys = ["day", "mode"]
+        daily = merge(self._read_daily(), _with_all_modes(df, ["day"])[keys + STATS], keys)
+        for day, part in df.groupby("day", sort=False):
+            path = self._coin_path(day)
+            ckeys = ["mode", "coin"]
+            old = pd.read_parquet(path) if path.exists() else _empty(ckeys)
+            self._replace(merge(old, _with_all_modes(part, ["coin"])[ckeys + STATS], ckeys), path)
+        self._replace(daily, self.daily_path)
+
+    def clear(self):
+        if self.daily_path.exists():
+            self.daily_path.unlink()
+        for p in self.root.glob("date=*/rollup_coin.parquet"):
+            p.unlink()
+
+    def _coin_path(self, day: str) -> Path:
+        return self.root / f"date={day}" / "rollup_coin.parquet"
+
+    @staticmethod
+    def _replace(df: pd.DataFrame, path: Path):
+        with atomic_path(path) as tmp:
+            if path.suffix == ".parquet":
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_csv(tmp, index=False)
+
+    # ---- reading ----
+    def _read_daily(self) -> pd.DataFrame:
+        if not self.daily_path.exists():
+            return _empty(["day", "mode"])
+        return pd.read_csv(self.daily_path, dtype={"day": str, "mode": str})
+
+    def daily(self, mode: str = ALL) -> pd.DataFrame:
+        """Stats per day (index: day) for one mode, or all modes combined."""
+        df = self._read_daily()
+        df = df[df["mode"] == mode].drop(columns="mode").set_index("day").sort_index()
+        return with_moments(df)
+
+    def coin_daily(self, coins=None, mode: str = ALL) -> pd.DataFrame:
+        """Stats per (day, coin) for the given coins (all coins if None)."""
+        frames = []
+        for path in sorted(self.root.glob("date=*/rollup_coin.parquet")):
+            df = pd.read_parquet(path)
+            df = df[df["mode"] == mode]
+            if coins is not None:
+                df = df[df["coin"].isin(list(coins))]
+            frames.append(df.assign(day=path.parent.name.split("=", 1)[1]))
+        if not frames:
+            return with_moments(_empty(["day", "coin"]))
+        out = pd.concat(frames, ignore_index=True).drop(columns="mode")
+        return with_moments(out[["day", "coin"] + STATS])
+
+    def coins(self, last_days: int = 30) -> list:
+        """Coins seen in the last `last_days` days (sorted)."""
+        seen = set()
+        for path in sorted(self.root.glob("date=*/rollup_coin.parquet"))[-last_days:]:
+            seen.update(pd.read_parquet(path, columns=["coin"])["coin"])
+        seen.discard("")
+        return sorted(seen)
@@ -0,0 +1,320 @@
+# src/serve.py
+# Lightweight HTTP scoring service (stdlib only) with request micro-batching.
+#
+#   python src/serve.py --port 8000          (serves the current model of models/metadata.json,
+#                                            hot-reloading new versions; see src/registry.py)
+#   python src/serve.py --model models/Linear_Regression.pkl --port 8000
+#   python src/serve.py --shadow XGBoost     (re-score live traffic with models/XGBoost.pkl; GET /shadow)
+#   curl -X POST 'localhost:8000/predict?model=Random_Forest' -d '{...}'   (route to models/Random_Forest.pkl)
+#   curl -X POST localhost:8000/predict -d '{"price": 31245.77, "24h_volume": 1.8e10, ...}'
+#   python src/serve.py --rate-limit 20 --max-batch-jobs 2   (429 past 20 req/s per client; 2 batches at once)
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.inference import vector_from_dict
+from src.batch import to_feature_matrix
+from src.predict import predict_batch
+from src.registry import CURRENT, LiveModel, ModelPool, ModelRegistry
+from src.shadow import ShadowScorer
+from src.admission import AdmissionController, QueueFull
+
+log = logging.getLogger("serve")
+
+
+# -------------------------
+# Micro-batching
+# -------------------------
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row requests into one model call.
+    A batch is flushed when it reaches `max_batch_size` rows or when the
+    oldest queued row has waited `max_wait_ms`, whichever comes first.
+    `backend_source()` returns (backend, label) and is called once per batch,
+    so every batch is scored by a single model even if a hot reload swaps it
+    in between; each row's future resolves to (prediction, label).
+    A failing batch fails its rows' futures, never the batcher.
+    `on_batch(X, feature_names, preds, seconds)` sees every scored batch.
+    """
+
+    def __init__(self, backend_source, max_batch_size: int = 256, max_wait_ms: float = 2.0, on_batch=None):
+        self.backend_source = backend_source
+        self.on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: dict) -> Future:
+        fut = Future()
+        self._queue.put((row, fut))
+        return fut
+
+    def predict_row(self, row: dict, timeout: float = 10.0):
+        """(prediction, label of the model that scored it)."""
+        return self.submit(row).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                backend, label = self.backend_source()
+            except Exception as e:
+                log.exception("No model for a micro-batch of %d rows", len(items))
+                for _, fut in items:
+                    fut.set_exception(e)
+                continue
+            ok = []
+            for row, fut in items:
+                try:
+                    ok.append((vector_from_dict(row, backend.feature_names), fut))
+                except Exception as e:
+                    fut.set_exception(e)
+            if not ok:
+                continue
+            try:
+                X = np.vstack([x for x, _ in ok])
+                t0 = time.perf_counter()
+                preds = backend.predict(X)
+                elapsed = time.perf_counter() - t0
+                for (_, fut), p in zip(ok, preds):
+                    fut.set_result((float(p), label))
+            except Exception as e:
+                log.exception("Micro-batch of %d rows failed", len(ok))
+                for _, fut in ok:
+                    fut.set_exception(e)
+                continue
+            if self.on_batch is not None:
+                self.on_batch(X, backend.feature_names, preds, elapsed)
+
+
+# -------------------------
+# HTTP layer
+# -------------------------
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server_version = "LiquidityScoring/1.0"
+
+    def log_message(self, fmt, *args):
+        log.debug("%s - " + fmt, self.address_string(), *args)
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self):
+        """(path, model name) -- the model comes from `?model=NAME`, default CURRENT."""
+        url = urlsplit(self.path)
+        return url.path, parse_qs(url.query).get("model", [CURRENT])[0]
+
+    def do_GET(self):
+        path, _ = self._route()
+        if path == "/health":
+            serving = self.server.live.get()
+            self._send_json(200, {"status": "ok", "model": model_label(serving),
+                                  "version": (serving.entry or {}).get("version")})
+        elif path == "/models":
+            self._send_json(200, {"models": self.server.pool.names()})
+        elif path == "/shadow":
+            shadow = self.server.shadow
+            self._send_json(200, shadow.metrics() if shadow else {"shadow": None})
+        elif path == "/admission":
+            self._send_json(200, self.server.admission.stats())
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except Exception as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        path, name = self._route()
+        admission, client = self.server.admission, self.client_address[0]
+        error = validate_payload(path, payload)
+        if error:
+            self._send_json(400, {"error": error})
+            return
+        try:
+            if path == "/predict":
+                if self.server.rate_limited:
+                    allowed, retry_after = admission.allow_single(client)
+                    if not allowed:
+                        self._send_json(429, {"error": "Rate limit exceeded"},
+                                        {"Retry-After": str(max(1, round(retry_after)))})
+                        return
+                pred, label = self.server.batcher(name).predict_row(payload)
+                self._send_json(200, {
+                    "liquidity_score": pred,
+                    "model": label,
+                    "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                })
+            elif path == "/predict_batch":
+                serving = self.server.pool.get(name)  # one model for the whole request
+                backend = serving.backend
+                rows = pd.DataFrame(payload.get("rows", []))
+                with admission.batch_slot(client, timeout=self.server.batch_queue_timeout):
+                    t0 = time.perf_counter()
+                    preds = predict_batch(backend, rows)
+                    seconds = time.perf_counter() - t0
+                self._send_json(200, {"predictions": preds.tolist(), "model": model_label(serving)})
+                if name == CURRENT and self.server.shadow is not None and len(rows):  # after replying: off the client's clock
+                    self.server.shadow.observe(to_feature_matrix(rows, backend.feature_names),
+                                               backend.feature_names, preds, seconds)
+            else:
+                self._send_json(404, {"error": f"Unknown path: {path}"})
+        except KeyError as e:
+            self._send_json(404, {"error": str(e.args[0])})
+        except QueueFull as e:
+            self._send_json(429, {"error": str(e)}, {"Retry-After": "1"})
+        except TimeoutError as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "5"})
+        except Exception as e:
+            log.exception("Prediction failed")
+            self._send_json(500, {"error": f"Prediction failed: {e}"})
+
+
+def validate_payload(path: str, payload) -> str:
+    """Error message for a request body of the wrong shape, else None."""
+    if not isinstance(payload, dict):
+        return f"Expected a JSON object, got {type(payload).__name__}"
+    if path == "/predict_batch":
+        rows = payload.get("rows", [])
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            return '"rows" must be a list of JSON objects'
+    return None
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # listen backlog; the default (5) resets bursts of connections
+
+    def batcher(self, name: str) -> MicroBatcher:
+        """One micro-batcher per served model, created on first request."""
+        batcher = self._batchers.get(name)
+        if batcher is None:
+            self.pool.get(name)  # KeyError for unknown models, before starting a thread
+            with self._batchers_lock:
+                batcher = self._batchers.get(name)
+                if batcher is None:
+                    on_batch = self.shadow.observe if (name == CURRENT and self.shadow) else None
+                    batcher = MicroBatcher(lambda: self.scoring_model(name), on_batch=on_batch,
+                                           **self.batch_opts)
+                    self._batchers[name] = batcher
+        return batcher
+
+    def scoring_model(self, name: str):
+        """(backend, label) of the model currently served as `name`."""
+        serving = self.pool.get(name)
+        return serving.backend, model_label(serving)
+
+
+def model_label(serving) -> str:
+    if serving.entry:
+        return f"{serving.entry['model_name']}:{serving.entry['version']}"
+    return serving.path.stem
+
+
+def make_server(model_path=None, host: str = "127.0.0.1", port: int = 8000,
+                max_batch_size: int = 256, max_wait_ms: float = 2.0,
+                models_dir=None, poll_interval: float = 5.0, shadow: str = None,
+                rate_limit: float = 0.0, max_batch_jobs: int = 2, batch_queue_timeout: float = 30.0) -> ScoringServer:
+    """
+    Serve the registry's current model (`models_dir`, default models/), or
+    `model_path` when nothing is registered. New versions activated in the
+    registry are picked up without a restart. Other models in `models_dir`
+    are served on request (`?model=NAME`); `shadow` names one of them to
+    re-score the default model's traffic in the background.
+    `rate_limit` caps /predict per client address (requests/second, 0 = off);
+    at most `max_batch_jobs` /predict_batch requests are scored at once, the
+    rest queue (FIFO) for up to `batch_queue_timeout` seconds.
+    """
+    registry = ModelRegistry(Path(models_dir) if models_dir else BASE_DIR / "models")
+    live = LiveModel(registry, fallback_path=model_path, poll_interval=poll_interval).start()
+    server = ScoringServer((host, port), ScoringHandler)
+    server.live = live
+    server.pool = ModelPool(live)
+    server.shadow = None
+    if shadow:
+        server.pool.get(shadow)  # fail at startup, not on the first request
+        server.shadow = ShadowScorer(lambda: server.pool.get(shadow).backend, name=shadow)
+    server.rate_limited = rate_limit > 0
+    server.admission = AdmissionController(max_batch_jobs=max_batch_jobs, max_queue=64,
+                                           max_jobs_per_session=max_batch_jobs,
+                                           single_rate=rate_limit or 1.0, single_burst=max(1, int(2 * rate_limit)))
+    server.batch_queue_timeout = batch_queue_timeout
+    server.batch_opts = {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms}
+    server._batchers = {}
+    server._batchers_lock = threading.Lock()
+    server.batcher(CURRENT)
+    return server
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP scoring service for the liquidity model")
+    ap.add_argument("--model", default=str(BASE_DIR / "models" / "Linear_Regression.pkl"),
+                    help="model used when the registry has no current version")
+    ap.add_argument("--models-dir", default=str(BASE_DIR / "models"), help="registry directory (metadata.json)")
+    ap.add_argument("--poll-interval", type=float, default=5.0, help="seconds between registry checks")
+    ap.add_argument("--shadow", default=None, help="model in --models-dir to shadow-score the default model with")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--max-batch-size", type=int, default=256, help="max rows per coalesced model call")
+    ap.add_argument("--max-wait-ms", type=float, default=2.0, help="max time a request waits for batch-mates")
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="max /predict requests per second per client (0 = off)")
+    ap.add_argument("--max-batch-jobs", type=int, default=2, help="max /predict_batch requests scored at once")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    server = make_server(args.model, args.host, args.port, args.max_batch_size, args.max_wait_ms,
+                         models_dir=args.models_dir, poll_interval=args.poll_interval, shadow=args.shadow,
+                         rate_limit=args.rate_limit, max_batch_jobs=args.max_batch_jobs)
+    log.info("Serving %s on http://%s:%d (batch<=%d, wait<=%.1fms)",
+             model_label(server.live.get()), args.host, args.port, args.max_batch_size, args.max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.live.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
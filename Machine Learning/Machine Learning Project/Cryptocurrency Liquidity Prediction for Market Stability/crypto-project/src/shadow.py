@@ -0,0 +1,130 @@
+# src/shadow.py
+# Shadow scoring: re-score live traffic with a candidate model off the request
+# path and track latency + prediction deltas against the primary model.
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from src.inference import align_columns
+
+log = logging.getLogger(__name__)
+
+
+class ShadowScorer:
+    """
+    `observe()` hands a scored batch (features, primary predictions, primary
+    latency) to a background thread that scores it again with the backend
+    returned by `backend_source()`. The request never waits on the shadow.
+    Memory is bounded by rows, not batches: a batch over `max_batch_rows` is
+    randomly sampled down to that many rows, and once more than
+    `max_pending_rows` are waiting the oldest batches are dropped (and counted).
+    """
+
+    def __init__(self, backend_source, name: str = "shadow", max_pending_rows: int = 100_000,
+                 max_batch_rows: int = 10_000, window: int = 2000):
+        self.backend_source = backend_source
+        self.name = name
+        self.max_pending_rows = max_pending_rows
+        self.max_batch_rows = max_batch_rows
+        self._pending = deque()
+        self._pending_rows = 0
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._window = window
+        self.reset()
+        self._thread = threading.Thread(target=self._run, name=f"shadow-{name}", daemon=True)
+        self._thread.start()
+
+    def reset(self):
+        with self._lock:
+            self._rows = self._calls = self._dropped = self._sampled_out = self._errors = 0
+            self._sum = self._sum_abs = self._sumsq = self._max_abs = 0.0
+            # per-call (primary rows, shadow rows, primary seconds, shadow seconds) for the last `window` calls
+            self._latency = deque(maxlen=self._window)
+
+    def observe(self, X: np.ndarray, feature_names, primary_preds, primary_seconds: float):
+        X, primary = np.asarray(X), np.asarray(primary_preds, dtype=np.float64)
+        n = len(X)
+        if n == 0:
+            return
+        if n > self.max_batch_rows:  # a random sample keeps the delta stats unbiased
+            idx = np.sort(np.random.default_rng().choice(n, self.max_batch_rows, replace=False))
+            X, primary = X[idx], primary[idx]
+        dropped = 0
+        with self._cond:
+            self._pending.append((X, list(feature_names), primary, float(primary_seconds), n))
+            self._pending_rows += len(X)
+            while self._pending_rows > self.max_pending_rows and len(self._pending) > 1:
+                self._pending_rows -= len(self._pending.popleft()[0])
+                dropped += 1
+            self._cond.notify()
+        with self._lock:
+            self._dropped += dropped
+            self._sampled_out += n - len(X)
+
+    def close(self):
+        with self._cond:
+            self._pending.append(None)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                item = self._pending.popleft()
+                if item is not None:
+                    self._pending_rows -= len(item[0])
+            if item is None:
+                return
+            X, names, primary, primary_s, primary_rows = item
+            try:
+                backend = self.backend_source()
+                Xs = align_columns(X, names, backend.feature_names)
+                t0 = time.perf_counter()
+                preds = backend.predict(Xs)
+                shadow_s = time.perf_counter() - t0
+                delta = preds - primary
+            except Exception:
+                log.exception("Shadow scoring with %s failed", self.name)
+                with self._lock:
+                    self._errors += 1
+                continue
+            with self._lock:
+                self._rows += len(delta)
+                self._calls += 1
+                self._sum += float(delta.sum())
+                self._sum_abs += float(np.abs(delta).sum())
+                self._sumsq += float((delta ** 2).sum())
+                self._max_abs = max(self._max_abs, float(np.abs(delta).max(initial=0.0)))
+                self._latency.append((primary_rows, len(delta), primary_s, shadow_s))
+
+    def metrics(self) -> dict:
+        """Delta stats (shadow - primary) over everything seen, latency percentiles over the recent window."""
+        with self._lock:
+            n = self._rows
+            lat = np.array(self._latency, dtype=np.float64).reshape(-1, 4)
+            out = {
+                "shadow": self.name,
+                "rows": n,
+                "calls": self._calls,
+                "dropped": self._dropped,
+                "sampled_out_rows": self._sampled_out,
+                "errors": self._errors,
+                "pending_rows": self._pending_rows,
+                "delta_mean": self._sum / n if n else None,
+                "delta_mae": self._sum_abs / n if n else None,
+                "delta_rmse": float(np.sqrt(self._sumsq / n)) if n else None,
+                "delta_max_abs": self._max_abs if n else None,
+            }
+        for rows, i, who in ((0, 2, "primary"), (1, 3, "shadow")):
+            if len(lat):
+                out[f"{who}_ms_p50"] = float(np.percentile(lat[:, i], 50) * 1e3)
+                out[f"{who}_ms_p95"] = float(np.percentile(lat[:, i], 95) * 1e3)
+                out[f"{who}_us_per_row"] = float(lat[:, i].sum() / max(lat[:, rows].sum(), 1) * 1e6)
+            else:
+                out[f"{who}_ms_p50"] = out[f"{who}_ms_p95"] = out[f"{who}_us_per_row"] = None
+        return out
@@ -0,0 +1,76 @@
+# src/sweep.py
+# What-if sensitivity sweeps: vary one or two features around a base vector.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.batch import predict_matrix
+
+
+def around(value: float, rel: float = 0.1, n: int = 30) -> np.ndarray:
+    """`n` points spanning value * (1 +/- rel); a zero base sweeps +/- rel around 1.0 like the old preview."""
+    center = value or 1.0
+    lo, hi = sorted((center * (1 - rel), center * (1 + rel)))
+    return np.linspace(lo, hi, n)
+
+
+def sweep_grid(base: np.ndarray, feature_names, axes: dict) -> np.ndarray:
+    """
+    Feature matrix for the full grid over `axes` ({feature: values}, 1-D or 2-D),
+    built by broadcasting: shape (n1 * n2 * ..., n_features), axis order as given.
+    """
+    names = list(feature_names)
+    shape = tuple(len(v) for v in axes.values())
+    X = np.empty(shape + (len(names),), dtype=np.float64)
+    X[...] = base
+    for k, (f, values) in enumerate(axes.items()):
+        idx = [None] * len(shape)
+        idx[k] = slice(None)
+        X[..., names.index(f)] = np.asarray(values, dtype=np.float64)[tuple(idx)]
+    return X.reshape(-1, len(names))
+
+
+class SweepEngine:
+    """
+    Evaluate sweeps for one inference backend, caching results keyed by the
+    base vector and the swept axes.
+    Linear backends are evaluated in closed form (base prediction plus
+    per-axis coefficient deltas, broadcast) without materializing the grid.
+    """
+
+    def __init__(self, backend, cache_size: int = 256):
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sweep(self, base: np.ndarray, axes: dict) -> np.ndarray:
+        """Predictions with shape (len(v) for v in axes.values())."""
+        base = np.asarray(base, dtype=np.float64)
+        axes = {f: np.asarray(v, dtype=np.float64) for f, v in axes.items()}
+        key = (base.tobytes(), tuple((f, v.tobytes()) for f, v in axes.items()))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        preds = self._compute(base, axes)
+        preds.setflags(write=False)
+        with self._lock:
+            self._cache[key] = preds
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return preds
+
+    def _compute(self, base, axes):
+        names = self.backend.feature_names
+        shape = tuple(len(v) for v in axes.values())
+        if getattr(self.backend, "kind", None) == "linear":
+            out = np.full(shape, self.backend.predict_row(base))
+            for k, (f, values) in enumerate(axes.items()):
+                j = names.index(f)
+                idx = [None] * len(shape)
+                idx[k] = slice(None)
+                out = out + ((values - base[j]) * self.backend.coef[j])[tuple(idx)]
+            return out
+        return predict_matrix(self.backend, sweep_grid(base, names, axes)).reshape(shape)
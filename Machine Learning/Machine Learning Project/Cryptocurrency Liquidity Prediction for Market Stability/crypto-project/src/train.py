@@ -0,0 +1,291 @@
+# src/train.py
+# Training runner (reports/LLD.md, "Module: train.py"): fits the candidate
+# models of notebook/03.model_training.ipynb in a process pool instead of one
+# after another.
+#
+#   python src/train.py                                   (every candidate, every core)
+#   python src/train.py --cpus 16 --models "Random Forest" XGBoost
+#   python src/train.py --register                        (also register the best model, see src/registry.py)
+#
+# CPU budget: single-threaded estimators (linear models, GradientBoosting, SVR)
+# take one core each; the rest of the budget is split between the estimators
+# that parallelize (RandomForest, KNN, XGBoost) through n_jobs.
+# Every fit runs in its own worker on memory-mapped train/test arrays, records
+# its wall time and peak RSS in the leaderboard and writes models/<Name>.pkl
+# atomically.
+import argparse
+import importlib
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.features import parse_engineered_dates
+from src.fileutils import atomic_path
+from src.predict import MODEL_FEATURES
+
+TARGET = "liquidity_score"
+DATA_CSV = BASE_DIR / "data" / "processed" / "engineered_features.csv"
+MODELS_DIR = BASE_DIR / "models"
+LEADERBOARD_CSV = BASE_DIR / "reports" / "model_performance" / "leaderboard.csv"
+
+# name -> (estimator class, default params, parallelizes through n_jobs); same as the notebook
+CANDIDATES = {
+    "Linear Regression": ("sklearn.linear_model:LinearRegression", {}, False),
+    "Ridge Regression": ("sklearn.linear_model:Ridge", {"alpha": 1.0}, False),
+    "Lasso Regression": ("sklearn.linear_model:Lasso", {"alpha": 0.001}, False),
+    "Elastic Net": ("sklearn.linear_model:ElasticNet", {"alpha": 0.001}, False),
+    "Random Forest": ("sklearn.ensemble:RandomForestRegressor", {"n_estimators": 100, "random_state": 42}, True),
+    "Gradient Boosting": ("sklearn.ensemble:GradientBoostingRegressor", {"n_estimators": 100, "random_state": 42}, False),
+    "SVR": ("sklearn.svm:SVR", {"kernel": "rbf"}, False),
+    "KNN": ("sklearn.neighbors:KNeighborsRegressor", {"n_neighbors": 5}, True),
+    "XGBoost": ("xgboost:XGBRegressor", {"n_estimators": 100, "random_state": 42, "verbosity": 0}, True),
+}
+
+LEADERBOARD_COLUMNS = ["Model", "RMSE", "MAE", "R2", "fit_seconds", "predict_seconds", "wall_seconds",
+                       "peak_rss_mb", "n_jobs", "artifact", "error"]
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Data
+# -------------------------
+def load_training_data(csv_path=DATA_CSV, features=MODEL_FEATURES, target: str = TARGET):
+    """(X, y) from the engineered dataset, in time order (the notebook's sort by date)."""
+    df = pd.read_csv(csv_path)
+    if "date" in df.columns:
+        order = parse_engineered_dates(df["date"])  # unparseable dates (NaT) sort last
+        df = df.iloc[np.argsort(order.to_numpy(), kind="stable")].reset_index(drop=True)
+    missing = [c for c in list(features) + [target] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+    X = df[list(features)].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+    y = pd.to_numeric(df[target], errors="coerce").astype(np.float64)
+    return X, y
+
+
+def time_split(X, y, train_fraction: float = 0.8):
+    """First `train_fraction` of the rows for training, the rest for testing (no shuffling)."""
+    n = int(len(X) * train_fraction)
+    return X.iloc[:n], X.iloc[n:], y.iloc[:n], y.iloc[n:]
+
+
+def regression_metrics(y_true, preds) -> dict:
+    y_true, preds = np.asarray(y_true, dtype=np.float64), np.asarray(preds, dtype=np.float64)
+    err = y_true - preds
+    ss_tot = float(((y_true - y_true.mean()) ** 2).sum())
+    return {"RMSE": float(np.sqrt(np.mean(err ** 2))), "MAE": float(np.mean(np.abs(err))),
+            "R2": 1.0 - float((err ** 2).sum()) / ss_tot if ss_tot > 0 else float("nan")}
+
+
+# -------------------------
+# Models + CPU budget
+# -------------------------
+def make_model(name: str, params: dict = None, n_jobs: int = 1):
+    """Fresh, unfitted candidate `name` (imported on demand), with `params` over the defaults."""
+    target, defaults, parallel = CANDIDATES[name]
+    module, cls = target.split(":")
+    kwargs = {**defaults, **(params or {})}
+    if parallel:
+        kwargs["n_jobs"] = n_jobs
+    return getattr(importlib.import_module(module), cls)(**kwargs)
+
+
+def plan_cpus(names, cpu_budget: int) -> dict:
+    """
+    n_jobs per candidate so that running them all at once stays within `cpu_budget`:
+    one core per single-threaded model, an equal share of what's left for the others.
+    """
+    parallel = [n for n in names if CANDIDATES[n][2]]
+    spare = cpu_budget - (len(names) - len(parallel))
+    share = max(1, spare // len(parallel)) if parallel else 1
+    return {n: (share if n in parallel else 1) for n in names}
+
+
+def artifact_path(name: str, models_dir=MODELS_DIR) -> Path:
+    return Path(models_dir) / f"{name.replace(' ', '_')}.pkl"
+
+
+class PeakMemory:
+    """Peak RSS (MB) of this process while the block runs, sampled every `interval` seconds."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+
+    def _rss(self):
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / 2 ** 20
+        except ImportError:
+            pass
+        try:  # Linux without psutil
+            with open("/proc/self/statm") as fh:
+                return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = self._rss()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0.0, rss)
+
+    def __enter__(self):
+        self.peak_mb = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        rss = self._rss()
+        if rss is not None:
+            self.peak_mb = round(max(self.peak_mb or 0.0, rss), 1)
+        return False
+
+
+def thread_limit(n: int):
+    """Cap BLAS / OpenMP threads (sklearn's threadpoolctl), so a 1-core job stays on 1 core."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        import contextlib
+        return contextlib.nullcontext()
+    return threadpool_limits(limits=n)
+
+
+# -------------------------
+# Shared arrays (written once, memory-mapped by every worker)
+# -------------------------
+def save_arrays(directory, **arrays):
+    for key, arr in arrays.items():
+        np.save(Path(directory) / f"{key}.npy", np.ascontiguousarray(arr, dtype=np.float64))
+
+
+def load_arrays(directory, *keys):
+    return [np.load(Path(directory) / f"{key}.npy", mmap_mode="r") for key in keys]
+
+
+# -------------------------
+# Worker
+# -------------------------
+def fit_one(name: str, params: dict, n_jobs: int, data_dir, features, out_path) -> dict:
+    """Fit + evaluate one candidate (runs in a worker process) and save it atomically."""
+    t0 = time.perf_counter()
+    X_train, y_train, X_test, y_test = load_arrays(data_dir, "X_train", "y_train", "X_test", "y_test")
+    with PeakMemory() as mem, thread_limit(n_jobs):
+        model = make_model(name, params, n_jobs)
+        t_fit = time.perf_counter()
+        model.fit(pd.DataFrame(X_train, columns=features), y_train)
+        fit_seconds = time.perf_counter() - t_fit
+        t_pred = time.perf_counter()
+        preds = model.predict(pd.DataFrame(X_test, columns=features))
+        predict_seconds = time.perf_counter() - t_pred
+        import joblib
+        with atomic_path(out_path) as tmp:
+            joblib.dump(model, tmp)
+    return {"Model": name, **regression_metrics(y_test, preds),
+            "fit_seconds": round(fit_seconds, 3), "predict_seconds": round(predict_seconds, 3),
+            "wall_seconds": round(time.perf_counter() - t0, 3), "peak_rss_mb": mem.peak_mb,
+            "n_jobs": n_jobs, "artifact": str(out_path), "error": None}
+
+
+# -------------------------
+# Runner
+# -------------------------
+def train_models(X_train, y_train, X_test, y_test, names=None, params: dict = None,
+                 cpu_budget: int = None, models_dir=MODELS_DIR) -> pd.DataFrame:
+    """
+    Fit `names` (default: every candidate) in parallel; returns the leaderboard,
+    best RMSE first. `params` maps a candidate name to parameter overrides.
+    A failed fit is reported in the `error` column instead of stopping the run.
+    """
+    names = list(names or CANDIDATES)
+    unknown = [n for n in names if n not in CANDIDATES]
+    if unknown:
+        raise ValueError(f"Unknown models: {unknown} (choose from {list(CANDIDATES)})")
+    cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+    n_jobs = plan_cpus(names, cpu_budget)
+    features = list(X_train.columns)
+    # the parallel (usually slowest) fits start first
+    order = sorted(names, key=lambda n: not CANDIDATES[n][2])
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="train-") as data_dir:
+        save_arrays(data_dir, X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test)
+        with ProcessPoolExecutor(max_workers=min(len(names), cpu_budget)) as pool:
+            futures = {pool.submit(fit_one, n, (params or {}).get(n), n_jobs[n], data_dir, features,
+                                   artifact_path(n, models_dir)): n for n in order}
+            for fut in as_completed(futures):
+                name = futures[fut]
+                try:
+                    row = fut.result()
+                    log.info("%s: RMSE=%.4f MAE=%.4f R2=%.4f (%.1fs, n_jobs=%d, peak %s MB)", name,
+                             row["RMSE"], row["MAE"], row["R2"], row["wall_seconds"], row["n_jobs"], row["peak_rss_mb"])
+                except Exception as e:
+                    log.exception("Error in %s", name)
+                    row = {"Model": name, "n_jobs": n_jobs[name], "error": str(e)}
+                results.append(row)
+    leaderboard = pd.DataFrame(results).reindex(columns=LEADERBOARD_COLUMNS)
+    return leaderboard.sort_values("RMSE", na_position="last").reset_index(drop=True)
+
+
+def save_leaderboard(leaderboard: pd.DataFrame, path=LEADERBOARD_CSV):
+    with atomic_path(path) as tmp:
+        leaderboard.to_csv(tmp, index=False)
+
+
+def register_best(leaderboard: pd.DataFrame, models_dir=MODELS_DIR, holdout=None) -> dict:
+    """Register the lowest-RMSE model as a new version in the model registry."""
+    from src.predict import load_model
+    from src.registry import ModelRegistry
+    best = leaderboard.dropna(subset=["RMSE"]).iloc[0]
+    metrics = {k: float(best[k]) for k in ("RMSE", "MAE", "R2")}
+    model = load_model(best["artifact"])
+    return ModelRegistry(Path(models_dir)).register(model, best["Model"].replace(" ", "_"), metrics=metrics,
+                                                    holdout=holdout)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train the candidate models in parallel")
+    ap.add_argument("--data", default=str(DATA_CSV))
+    ap.add_argument("--models", nargs="+", choices=list(CANDIDATES), help="default: every candidate")
+    ap.add_argument("--cpus", type=int, default=os.cpu_count(), help="CPU budget for the whole run")
+    ap.add_argument("--train-fraction", type=float, default=0.8)
+    ap.add_argument("--models-dir", default=str(MODELS_DIR))
+    ap.add_argument("--leaderboard", default=str(LEADERBOARD_CSV))
+    ap.add_argument("--register", action="store_true", help="register the best model in --models-dir")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    X, y = load_training_data(args.data)
+    X_train, X_test, y_train, y_test = time_split(X, y, args.train_fraction)
+    log.info("Training on %d rows, testing on %d (%d CPUs)", len(X_train), len(X_test), args.cpus)
+    t0 = time.perf_counter()
+    leaderboard = train_models(X_train, y_train, X_test, y_test, args.models, cpu_budget=args.cpus,
+                               models_dir=args.models_dir)
+    save_leaderboard(leaderboard, args.leaderboard)
+    log.info("Trained %d models in %.1fs -> %s", len(leaderboard), time.perf_counter() - t0, args.leaderboard)
+    print(leaderboard.drop(columns=["artifact"], errors="ignore").to_string(index=False))
+    if args.register:
+        register_best(leaderboard, args.models_dir, holdout=args.data)
+    return 1 if leaderboard["error"].notna().all() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# src/tune.py
+# Hyperparameter search for the candidate models of src/train.py, scored on the
+# rolling-origin folds of src/cv.py.
+#
+#   python src/tune.py --model XGBoost --trials 60 --cpus 16
+#   python src/tune.py --model "Random Forest" --trials 40 --timeout 3600 --register
+#
+# Trials are random samples of SEARCH_SPACES (seeded by study seed + trial number).
+# Each trial is scored fold by fold, (trial, fold) tasks running in parallel worker
+# processes on the memory-mapped fold cache. After every fold a trial's running mean
+# RMSE is compared with the other trials' at the same fold: worse than their median
+# and it is pruned (median pruning), so poor configurations stop after a fold or two.
+# The study (reports/studies/<model>.json) is saved after every fold: rerunning the
+# same command resumes it, interrupted trials continue from their next fold.
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.cv import FoldCache, evaluate_fold, rolling_origin_folds
+from src.fileutils import atomic_path, file_lock
+from src.train import CANDIDATES, DATA_CSV, MODELS_DIR, load_training_data, make_model
+
+STUDIES_DIR = BASE_DIR / "reports" / "studies"
+
+# param -> ("log", lo, hi) | ("float", lo, hi) | ("int", lo, hi) | ("choice", [values])
+SEARCH_SPACES = {
+    "Ridge Regression": {"alpha": ("log", 1e-4, 1e3)},
+    "Lasso Regression": {"alpha": ("log", 1e-6, 1.0)},
+    "Elastic Net": {"alpha": ("log", 1e-6, 1.0), "l1_ratio": ("float", 0.05, 0.95)},
+    "Random Forest": {"n_estimators": ("int", 50, 400), "max_depth": ("choice", [None, 8, 16, 32]),
+                      "min_samples_leaf": ("int", 1, 20), "max_features": ("choice", [1.0, 0.5, "sqrt"])},
+    "Gradient Boosting": {"n_estimators": ("int", 50, 400), "learning_rate": ("log", 0.01, 0.3),
+                          "max_depth": ("int", 2, 8), "subsample": ("float", 0.5, 1.0)},
+    "SVR": {"C": ("log", 1e-2, 1e3), "epsilon": ("log", 1e-4, 1.0), "gamma": ("choice", ["scale", "auto"])},
+    "KNN": {"n_neighbors": ("int", 1, 50), "weights": ("choice", ["uniform", "distance"])},
+    "XGBoost": {"n_estimators": ("int", 50, 600), "learning_rate": ("log", 0.01, 0.3),
+                "max_depth": ("int", 2, 10), "subsample": ("float", 0.5, 1.0),
+                "colsample_bytree": ("float", 0.5, 1.0), "min_child_weight": ("log", 1.0, 20.0)},
+}
+
+RUNNING, COMPLETE, PRUNED, FAILED = "running", "complete", "pruned", "failed"
+
+log = logging.getLogger(__name__)
+
+
+# -------------------------
+# Sampling + pruning
+# -------------------------
+def sample_params(space: dict, seed: int, number: int) -> dict:
+    """Trial `number`'s parameters: the same for a given (seed, number), so resumed studies stay reproducible."""
+    rng = random.Random(f"{seed}:{number}")
+    params = {}
+    for name, (kind, *args) in space.items():
+        if kind == "log":
+            params[name] = math.exp(rng.uniform(math.log(args[0]), math.log(args[1])))
+        elif kind == "float":
+            params[name] = rng.uniform(args[0], args[1])
+        elif kind == "int":
+            params[name] = rng.randint(args[0], args[1])
+        elif kind == "choice":
+            params[name] = rng.choice(args[0])
+        else:
+            raise ValueError(f"Unknown distribution {kind!r} for {name}")
+    return params
+
+
+def running_mean(trial: dict, step: int) -> float:
+    return float(np.mean(trial["values"][:step + 1]))
+
+
+def should_prune(trials: list, trial: dict, step: int, n_startup: int = 5, n_warmup: int = 0) -> bool:
+    """
+    Median rule: prune once `trial`'s mean RMSE over folds 0..step is worse than the
+    median of the other trials' at the same step (needs `n_startup` of them).
+    """
+    if step < n_warmup:
+        return False
+    others = [running_mean(t, step) for t in trials
+              if t is not trial and t["state"] != FAILED and len(t["values"]) > step]
+    if len(others) < n_startup:
+        return False
+    return running_mean(trial, step) > float(np.median(others))
+
+
+# -------------------------
+# Study
+# -------------------------
+class Study:
+    """Trials of one model on one dataset/fold layout, saved as JSON after every change."""
+
+    def __init__(self, path, model: str, folds, data_key: str, seed: int = 42):
+        self.path = Path(path)
+        self.data = {"model": model, "seed": seed, "data": data_key, "folds": [list(f) for f in folds],
+                     "space": SEARCH_SPACES[model], "trials": []}
+        if self.path.exists():
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            for key in ("model", "data", "folds"):
+                if saved[key] != self.data[key]:
+                    raise ValueError(f"{self.path} was run with another {key}; use a different --study file")
+            self.data = saved
+            log.info("Resuming %s: %d trials so far", self.path, len(self.trials))
+
+    @property
+    def trials(self) -> list:
+        return self.data["trials"]
+
+    def new_trial(self) -> dict:
+        number = len(self.trials)
+        trial = {"number": number, "params": sample_params(self.data["space"], self.data["seed"], number),
+                 "state": RUNNING, "values": [], "value": None, "error": None,
+                 "started": datetime.now().isoformat(timespec="seconds"), "finished": None}
+        self.trials.append(trial)
+        return trial
+
+    def finish(self, trial: dict, state: str, error: str = None):
+        trial["state"], trial["error"] = state, error
+        trial["value"] = float(np.mean(trial["values"])) if trial["values"] else None
+        trial["finished"] = datetime.now().isoformat(timespec="seconds")
+
+    def best(self):
+        done = [t for t in self.trials if t["state"] == COMPLETE]
+        return min(done, key=lambda t: t["value"]) if done else None
+
+    def save(self):
+        with atomic_path(self.path) as tmp:
+            tmp.write_text(json.dumps(self.data, indent=2, default=str), encoding="utf-8")
+
+
+def data_key(X, y) -> str:
+    h = hashlib.sha1(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def default_study_path(model: str) -> Path:
+    return STUDIES_DIR / f"{model.replace(' ', '_')}.json"
+
+
+# -------------------------
+# Search
+# -------------------------
+def tune(X, y, model: str, n_trials: int = 50, timeout: float = None, cpu_budget: int = None,
+         workers: int = None, n_splits: int = 5, window: int = None, gap: int = 0, study_path=None,
+         seed: int = 42, n_startup: int = 5, cache_root=None) -> Study:
+    """
+    Run (or resume) the study of `model` until it has `n_trials` finished trials or
+    `timeout` seconds have passed. Returns the study.
+    """
+    if model not in SEARCH_SPACES:
+        raise ValueError(f"No search space for {model!r}; choose from {list(SEARCH_SPACES)}")
+    cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+    workers = max(1, min(workers or cpu_budget, cpu_budget))
+    n_jobs = max(1, cpu_budget // workers) if CANDIDATES[model][2] else 1
+    folds = rolling_origin_folds(len(X), n_splits, window=window, gap=gap)
+    features = list(X.columns)
+    X, y = X.to_numpy(), np.asarray(y)
+    study_path = Path(study_path or default_study_path(model))
+    deadline = time.monotonic() + timeout if timeout else None
+
+    with file_lock(study_path):
+        study = Study(study_path, model, folds, data_key(X, y), seed)
+        finished = sum(t["state"] != RUNNING for t in study.trials)
+        # interrupted trials first, from the fold after their last saved one
+        queue = [t for t in study.trials if t["state"] == RUNNING]
+        t0 = time.perf_counter()
+
+        def can_start() -> bool:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            return bool(queue) or len(study.trials) < n_trials
+
+        with FoldCache(X, y, folds, root=cache_root) as cache, ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+
+            def launch(trial):
+                step = len(trial["values"])
+                fut = pool.submit(evaluate_fold, model, trial["params"], n_jobs, cache.directory,
+                                  folds[step], step, features)
+                pending[fut] = trial
+
+            while True:
+                while len(pending) < workers and can_start():
+                    launch(queue.pop(0) if queue else study.new_trial())
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    trial = pending.pop(fut)
+                    step = len(trial["values"])
+                    try:
+                        trial["values"].append(fut.result()["RMSE"])
+                    except Exception as e:
+                        log.exception("Trial %d failed on fold %d", trial["number"], step)
+                        study.finish(trial, FAILED, str(e))
+                        finished += 1
+                        continue
+                    if should_prune(study.trials, trial, step, n_startup):
+                        study.finish(trial, PRUNED)
+                        finished += 1
+                        log.info("Trial %d pruned at fold %d (mean RMSE %.6f)", trial["number"], step,
+                                 running_mean(trial, step))
+                    elif step + 1 == len(folds):
+                        study.finish(trial, COMPLETE)
+                        finished += 1
+                        best = study.best()
+                        log.info("Trial %d: RMSE %.6f (best: trial %d, %.6f)", trial["number"], trial["value"],
+                                 best["number"], best["value"])
+                    elif deadline is not None and time.monotonic() >= deadline:
+                        pass  # stays RUNNING: a later run resumes it from the next fold
+                    else:
+                        launch(trial)
+                study.save()
+        study.save()
+    log.info("%d trials finished in %.1fs", finished, time.perf_counter() - t0)
+    return study
+
+
+def export_best(study: Study, X, y, models_dir=MODELS_DIR, holdout=None, activate: bool = True) -> dict:
+    """Refit the best trial's configuration on every row and register it as a new version."""
+    from src.registry import ModelRegistry
+    best = study.best()
+    if best is None:
+        raise ValueError(f"{study.path} has no completed trial")
+    name = study.data["model"]
+    model = make_model(name, best["params"], os.cpu_count() or 1).fit(X, y)
+    metrics = {"cv_RMSE": best["value"], "cv_folds": len(best["values"]), "trial": best["number"],
+               "params": best["params"]}
+    return ModelRegistry(Path(models_dir)).register(model, name.replace(" ", "_"), metrics=metrics,
+                                                    features=list(X.columns), holdout=holdout, activate=activate)
+
+
+def trials_table(study: Study):
+    import pandas as pd
+    rows = [{"trial": t["number"], "state": t["state"], "RMSE": t["value"], "folds": len(t["values"]),
+             **t["params"]} for t in study.trials]
+    table = pd.DataFrame(rows)
+    # completed trials first: a pruned trial's RMSE only covers its first folds
+    return table.sort_values(["state", "RMSE"], key=lambda c: c != COMPLETE if c.name == "state" else c,
+                             na_position="last")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Hyperparameter search with median pruning on rolling-origin folds")
+    ap.add_argument("--model", required=True, choices=list(SEARCH_SPACES))
+    ap.add_argument("--data", default=str(DATA_CSV))
+    ap.add_argument("--trials", type=int, default=50, help="finished trials the study should reach")
+    ap.add_argument("--timeout", type=float, default=None, help="stop starting folds after this many seconds")
+    ap.add_argument("--cpus", type=int, default=os.cpu_count(), help="CPU budget for the whole search")
+    ap.add_argument("--workers", type=int, default=None, help="trials run at once (default: --cpus)")
+    ap.add_argument("--splits", type=int, default=5)
+    ap.add_argument("--window", type=int, default=0, help="rolling training window in rows (0 = expanding)")
+    ap.add_argument("--gap", type=int, default=0, help="rows left out between train and test")
+    ap.add_argument("--startup-trials", type=int, default=5, help="trials needed at a fold before pruning on it")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--study", default=None, help="study file (default: reports/studies/<model>.json)")
+    ap.add_argument("--cache-dir", default=None, help="keep the fold cache here and reuse it across runs")
+    ap.add_argument("--models-dir", default=str(MODELS_DIR))
+    ap.add_argument("--register", action="store_true", help="refit the best trial on all rows and register it")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    X, y = load_training_data(args.data)
+    study = tune(X, y, args.model, args.trials, args.timeout, args.cpus, args.workers, args.splits,
+                 args.window or None, args.gap, args.study, args.seed, args.startup_trials, args.cache_dir)
+    print(trials_table(study).head(10).to_string(index=False))
+    best = study.best()
+    if best is None:
+        log.error("No trial completed yet")
+        return 1
+    log.info("Best: trial %d, RMSE %.6f, %s", best["number"], best["value"], best["params"])
+    if args.register:
+        export_best(study, X, y, args.models_dir, holdout=args.data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
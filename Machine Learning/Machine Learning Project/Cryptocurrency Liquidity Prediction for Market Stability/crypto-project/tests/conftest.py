@@ -0,0 +1,65 @@
+# tests/conftest.py
+# Shared fixtures: a small synthetic feature frame, fitted models and a registry
+# in a temp directory (the tests never touch models/ or data/).
+#
+#   python -m pytest -q          (from the project root)
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from src.predict import MODEL_FEATURES
+
+
+def feature_frame(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    """MODEL_FEATURES with roughly the scales of the real data (mkt_cap ~1e9)."""
+    rng = np.random.default_rng(seed)
+    price = rng.lognormal(3, 2, n)
+    df = pd.DataFrame({
+        "price": price,
+        "1h": rng.normal(0, 1, n),
+        "24h": rng.normal(0, 3, n),
+        "7d": rng.normal(0, 8, n),
+        "24h_volume": rng.lognormal(17, 2, n),
+        "mkt_cap": rng.lognormal(21, 2, n),
+    })
+    df["liquidity_ratio"] = df["24h_volume"] / df["mkt_cap"]
+    df["price_change_24h"] = df["24h"] * df["price"] / 100
+    return df[MODEL_FEATURES]
+
+
+def target(X: pd.DataFrame, seed: int = 1) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return X["liquidity_ratio"] * 2 + X["1h"] * 0.1 - X["7d"] * 0.01 + rng.normal(0, 0.01, len(X))
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    return feature_frame()
+
+
+@pytest.fixture
+def linear_model(frame):
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression().fit(frame, target(frame))
+
+
+@pytest.fixture
+def ridge_model(frame):
+    from sklearn.linear_model import Ridge
+    return Ridge(alpha=1.0).fit(frame, target(frame))
+
+
+@pytest.fixture
+def registry(tmp_path, linear_model):
+    """Registry with one active Linear_Regression version (no compiled export)."""
+    from src.registry import ModelRegistry
+    reg = ModelRegistry(tmp_path / "models")
+    reg.register(linear_model, "Linear_Regression", compile=False)
+    return reg
@@ -0,0 +1,75 @@
+# tests/test_admission.py
+# Batch queue limits, FIFO admission and the single-prediction token buckets.
+import threading
+
+import pytest
+
+from src.admission import AdmissionController, QueueFull
+
+
+def test_per_session_limit():
+    adm = AdmissionController(max_batch_jobs=1, max_queue=10, max_jobs_per_session=1)
+    ticket = adm.enqueue("alice")
+    with pytest.raises(QueueFull):
+        adm.enqueue("alice")
+    adm.enqueue("bob")  # other sessions are not affected
+    adm.release(ticket)
+    adm.enqueue("alice")
+
+
+def test_queue_limit():
+    adm = AdmissionController(max_batch_jobs=1, max_queue=2, max_jobs_per_session=5)
+    first = adm.enqueue("a")
+    assert adm.wait(first, timeout=0)  # running: no longer counts against the queue
+    adm.enqueue("a")
+    adm.enqueue("a")
+    with pytest.raises(QueueFull):
+        adm.enqueue("a")
+    assert adm.stats()["queued"] == 2 and adm.stats()["running"] == 1
+
+
+def test_fifo_admission_and_positions():
+    adm = AdmissionController(max_batch_jobs=1, max_queue=10, max_jobs_per_session=5)
+    t1, t2, t3 = (adm.enqueue("s") for _ in range(3))
+    assert [adm.position(t) for t in (t1, t2, t3)] == [1, 2, 3]
+    assert not adm.wait(t2, timeout=0)  # not its turn
+    assert adm.wait(t1, timeout=0)
+    assert not adm.wait(t2, timeout=0)  # the only slot is taken
+    assert [adm.position(t) for t in (t1, t2, t3)] == [0, 1, 2]
+    adm.release(t1)
+    adm.release(t1)  # idempotent
+    assert adm.wait(t2, timeout=0)
+    adm.release(t3)  # a queued job giving up
+    with pytest.raises(KeyError):
+        adm.wait(t3, timeout=0)
+
+
+def test_batch_slot_releases_and_times_out():
+    adm = AdmissionController(max_batch_jobs=1, max_queue=10, max_jobs_per_session=5)
+    holding, done = threading.Event(), threading.Event()
+
+    def hold():
+        with adm.batch_slot("a"):
+            holding.set()
+            done.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    assert holding.wait(5)
+    with pytest.raises(TimeoutError):
+        with adm.batch_slot("b", poll=0.01, timeout=0.05):
+            pass
+    assert adm.stats() == {"running": 1, "queued": 0, "max_batch_jobs": 1, "sessions": 0}
+    done.set()
+    thread.join(5)
+    with adm.batch_slot("b", timeout=1):
+        assert adm.stats()["running"] == 1
+    assert adm.stats()["running"] == 0
+
+
+def test_single_rate_limit():
+    adm = AdmissionController(single_rate=0.001, single_burst=2)
+    assert adm.allow_single("c")[0] and adm.allow_single("c")[0]
+    allowed, retry_after = adm.allow_single("c")
+    assert not allowed and retry_after > 0
+    assert adm.allow_single("other")[0]
@@ -0,0 +1,81 @@
+# tests/test_history.py
+# Prediction history: background writer, partitions and the daily rollups.
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.history import HISTORY_COLUMNS, HistoryStore, HistoryWriter, history_frame
+
+
+def ui_rows(n: int, coins=("Bitcoin", "Ethereum")) -> pd.DataFrame:
+    return pd.DataFrame({"coin": [coins[i % len(coins)] for i in range(n)], "symbol": "X",
+                         "price": np.arange(n, dtype=float), "1h": 0.0, "24h": 0.0, "7d": 0.0,
+                         "24h_volume": 1.0, "mkt_cap": 2.0, "date": "16-03-2022",
+                         "liquidity_ratio": 0.5, "price_change_24h": 0.0})
+
+
+def test_writer_batches_rows_into_the_store(tmp_path):
+    store = HistoryStore(tmp_path / "history")
+    writer = HistoryWriter(store, flush_interval=60)
+    writer.write(ui_rows(3), [1.0, 2.0, 3.0], "batch")
+    writer.write(ui_rows(1), [4.0], "single")
+    writer.flush(timeout=10)
+    recent = store.read_recent(10)
+    assert list(recent.columns) == HISTORY_COLUMNS
+    assert recent["prediction"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert len(list(store.partitions()[0].glob("part-*.parquet"))) == 1  # one append per flush
+    writer.close()
+
+
+def test_writer_survives_malformed_rows(tmp_path):
+    store = HistoryStore(tmp_path / "history")
+    writer = HistoryWriter(store, flush_interval=60)
+    writer.write(ui_rows(2), [1.0], "batch")  # one prediction for two rows
+    writer.write(ui_rows(1), [5.0], "single")
+    writer.flush(timeout=10)
+    assert store.read_recent(10)["prediction"].tolist() == [5.0]
+    writer.close()
+
+
+def test_rollups_match_the_stored_rows(tmp_path):
+    store = HistoryStore(tmp_path / "history")
+    for day, mode, preds in (("2024-01-01 10:00:00", "single", [1.0, 3.0]),
+                             ("2024-01-01 11:00:00", "batch", [2.0, 6.0, 4.0]),
+                             ("2024-01-02 09:00:00", "batch", [10.0])):
+        store.append(history_frame(ui_rows(len(preds)), preds, mode, timestamp=day))
+    daily = store.daily_stats()
+    assert daily.index.tolist() == ["2024-01-01", "2024-01-02"]
+    assert daily["count"].tolist() == [5, 1]
+    assert daily.loc["2024-01-01", "sum"] == 16.0
+    assert daily.loc["2024-01-01", "min"] == 1.0 and daily.loc["2024-01-01", "max"] == 6.0
+    assert daily.loc["2024-01-01", "mean"] == pytest.approx(3.2)
+    assert daily.loc["2024-01-01", "std"] == pytest.approx(np.std([1, 3, 2, 6, 4]), rel=1e-6)
+    assert store.daily_stats("batch")["count"].tolist() == [3, 1]
+
+    coins = store.coin_daily_stats(["Bitcoin"])
+    # ui_rows alternates Bitcoin / Ethereum: Bitcoin gets rows 0, 2 of each append
+    assert coins.set_index("day")["sum"].to_dict() == {"2024-01-01": 1.0 + 2.0 + 4.0, "2024-01-02": 10.0}
+
+    before = store.daily_stats()
+    store.rebuild_rollup()
+    pd.testing.assert_frame_equal(store.daily_stats(), before)
+
+
+def test_partitions_are_compacted(tmp_path):
+    store = HistoryStore(tmp_path / "history")
+    store.compact_after = 3
+    for i in range(5):
+        store.append(history_frame(ui_rows(1), [float(i)], "single", timestamp="2024-01-01 10:00:00"))
+    parts = list(store.partitions()[0].glob("part-*.parquet"))
+    assert len(parts) <= 3
+    assert sorted(store.read_recent(10)["prediction"]) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert not list(store.root.rglob(".tmp-*"))
+
+
+def test_import_csv_skips_bad_timestamps(tmp_path):
+    legacy = ui_rows(3).assign(prediction=[1.0, 2.0, 3.0], mode="batch",
+                               timestamp=["2024-01-01 10:00:00", "not a time", "2024-01-03 10:00:00"])
+    legacy.to_csv(tmp_path / "prediction_history.csv", index=False)
+    store = HistoryStore(tmp_path / "history")
+    assert store.import_csv(tmp_path / "prediction_history.csv", chunksize=2) == 2
+    assert store.daily_stats().index.tolist() == ["2024-01-01", "2024-01-03"]
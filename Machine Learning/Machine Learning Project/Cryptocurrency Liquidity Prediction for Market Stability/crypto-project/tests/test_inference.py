@@ -0,0 +1,36 @@
+# tests/test_inference.py
+# The closed-form backend must reproduce the estimator's own predict.
+import numpy as np
+
+from src.inference import EstimatorBackend, LinearBackend, linear_params, make_backend
+from src.predict import MODEL_FEATURES
+
+
+def test_linear_backend_matches_predict(frame, linear_model):
+    backend = make_backend(linear_model, MODEL_FEATURES)
+    assert isinstance(backend, LinearBackend)
+    expected = linear_model.predict(frame)
+    np.testing.assert_allclose(backend.predict(frame.to_numpy()), expected, rtol=1e-9, atol=1e-9)
+    assert backend.predict_row(frame.to_numpy()[0]) == np.float64(backend.predict(frame.to_numpy()[:1])[0])
+
+
+def test_ridge_backend_matches_predict(frame, ridge_model):
+    backend = make_backend(ridge_model, MODEL_FEATURES)
+    assert backend.kind == "linear"
+    np.testing.assert_allclose(backend.predict(frame.to_numpy()), ridge_model.predict(frame), rtol=1e-9, atol=1e-9)
+
+
+def test_linear_params_follow_the_requested_feature_order(frame, linear_model):
+    order = MODEL_FEATURES[::-1]
+    coef, intercept = linear_params(linear_model, order)
+    backend = LinearBackend(coef, intercept, order)
+    np.testing.assert_allclose(backend.predict(frame[order].to_numpy()), linear_model.predict(frame),
+                               rtol=1e-9, atol=1e-9)
+
+
+def test_non_linear_models_fall_back_to_the_estimator(frame):
+    from sklearn.tree import DecisionTreeRegressor
+    model = DecisionTreeRegressor(max_depth=3, random_state=0).fit(frame, frame["liquidity_ratio"])
+    backend = make_backend(model, MODEL_FEATURES)
+    assert isinstance(backend, EstimatorBackend)
+    np.testing.assert_array_equal(backend.predict(frame.to_numpy()), model.predict(frame))
@@ -0,0 +1,83 @@
+# tests/test_ingest.py
+# Streaming ingestion: dedup across chunks, files, runs and date formats; rejects.
+import numpy as np
+import pandas as pd
+
+from src.ingest import SeenRows, ingest
+
+
+def raw_row(coin: str, date: str, price: float = 1.0) -> dict:
+    return {"coin": coin, "symbol": coin[:3].upper(), "price": price, "1h": 0.1, "24h": 0.2, "7d": 0.3,
+            "24h_volume": 5.0, "mkt_cap": 10.0, "date": date}
+
+
+def write_raw(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_duplicates_are_dropped_across_chunks_files_and_date_formats(tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "cleaned"
+    write_raw(raw / "coin_gecko_2022-03-16.csv", [
+        raw_row("Bitcoin", "2022-03-16"),
+        raw_row("Ethereum", "2022-03-16"),
+        raw_row("Bitcoin", "2022-03-16"),   # exact duplicate, next chunk
+        raw_row("Bitcoin", "16-03-2022"),   # same row, other date format
+        raw_row("Bitcoin", "2022-03-16", price=2.0),
+    ])
+    write_raw(raw / "coin_gecko_2022-03-17.csv", [
+        raw_row("Ethereum", "16-03-2022"),  # seen in the first file
+        raw_row("Ethereum", "2022-03-17"),
+    ])
+    reports = ingest(raw, out, chunk_rows=2)
+    assert [(r["rows"], r["duplicates"], r["written"]) for r in reports] == [(5, 2, 3), (2, 1, 1)]
+    cleaned = pd.read_parquet(out)
+    assert len(cleaned) == 4
+    assert sorted(cleaned["date"].astype(str)) == ["2022-03-16"] * 3 + ["2022-03-17"]
+
+
+def test_later_runs_dedup_against_earlier_ones(tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "cleaned"
+    write_raw(raw / "coin_gecko_2022-03-16.csv", [raw_row("Bitcoin", "2022-03-16")])
+    assert len(ingest(raw, out)) == 1
+    assert ingest(raw, out) == []  # nothing new
+    write_raw(raw / "coin_gecko_2022-03-17.csv", [raw_row("Bitcoin", "16-03-2022"), raw_row("Solana", "17-03-2022")])
+    [report] = ingest(raw, out)
+    assert (report["duplicates"], report["written"]) == (1, 1)
+    assert len(pd.read_parquet(out)) == 2
+
+
+def test_invalid_rows_are_rejected_with_their_raw_date(tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "cleaned"
+    write_raw(raw / "coin_gecko_2022-03-16.csv", [
+        raw_row("Bitcoin", "2022-03-16"),
+        raw_row("Bitcoin", "March 16th"),
+        raw_row("Bitcoin", "March 16th"),   # duplicate of a rejected row
+        raw_row("Bitcoin", "Mar 16"),       # another bad date: not a duplicate
+        raw_row("Ethereum", "2022-03-16", price=-1.0),
+    ])
+    [report] = ingest(raw, out)
+    assert (report["duplicates"], report["rejected"], report["written"]) == (1, 3, 1)
+    rejected = pd.read_csv(out / "_rejected" / "coin_gecko_2022-03-16.csv")
+    assert rejected["raw_date"].tolist() == ["March 16th", "Mar 16", "2022-03-16"]
+    assert rejected["reason"].tolist() == ["bad date", "bad date", "negative price"]
+
+
+def test_seen_rows_stay_sorted_and_unique(tmp_path):
+    rng = np.random.default_rng(0)
+    seen, reference = SeenRows(), set()
+    for _ in range(20):
+        h = rng.integers(0, 2 ** 63, 300, dtype=np.uint64)
+        h[:50] = h[50:100]  # repeats within the chunk
+        if reference:
+            h[100:150] = rng.choice(np.array(sorted(reference), dtype=np.uint64), 50)  # and from earlier chunks
+        mask = seen.keep(h)
+        expected, known = [], set(reference)
+        for x in h.tolist():
+            expected.append(x not in known)
+            known.add(x)
+        assert mask.tolist() == expected
+        reference.update(h.tolist())
+    assert seen.hashes.tolist() == sorted(reference)
+    seen.save(tmp_path / "hashes.npy")
+    assert SeenRows.load(tmp_path / "hashes.npy").hashes.tolist() == sorted(reference)
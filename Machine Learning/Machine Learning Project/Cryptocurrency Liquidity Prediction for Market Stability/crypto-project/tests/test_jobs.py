@@ -0,0 +1,113 @@
+# tests/test_jobs.py
+# Background jobs: cancel, resume from the last chunk, model pinned at submit.
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.admission import AdmissionController, QueueFull
+from src.jobs import CANCELLED, DONE, FAILED, JobRunner
+from src.registry import LiveModel, ModelPool
+
+
+@pytest.fixture
+def pool(registry):
+    return ModelPool(LiveModel(registry, poll_interval=3600))
+
+
+def run(runner, job_id):
+    runner.shutdown(wait=True)
+    return runner.status(job_id)
+
+
+def cancel_after(root, chunks: int, seen: list, gate: threading.Event = None):
+    """on_chunk that records chunk sizes and cancels the job after `chunks` of them (once `gate` is set)."""
+    def on_chunk(job, chunk):
+        seen.append(len(chunk))
+        if len(seen) == chunks:
+            if gate is not None:
+                gate.wait(5)
+            (root / job["id"] / "cancel").touch()
+    return on_chunk
+
+
+def test_job_scores_every_row(tmp_path, pool, frame, linear_model):
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=64)
+    job = run(runner, runner.submit(frame))
+    assert job["status"] == DONE and job["rows_done"] == len(frame) and job["chunks_done"] == 5
+    out = pd.read_csv(job["output"])
+    np.testing.assert_allclose(out["prediction"], linear_model.predict(frame), rtol=1e-9)
+
+
+def test_cancel_then_resume_from_the_last_chunk(tmp_path, pool, frame, linear_model):
+    seen = []
+    on_chunk = cancel_after(tmp_path / "jobs", 2, seen)
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=64, on_chunk=on_chunk)
+    job_id = runner.submit(frame)
+    job = run(runner, job_id)
+    assert job["status"] == CANCELLED and job["chunks_done"] == 2 and seen == [64, 64]
+
+    seen.clear()
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=64,
+                       on_chunk=lambda job, chunk: seen.append(len(chunk)))
+    assert runner.resume(job_id)
+    job = run(runner, job_id)
+    assert job["status"] == DONE and job["rows_done"] == len(frame)
+    assert seen == [64, 64, 44]  # only the chunks not scored before
+    out = pd.read_csv(job["output"])
+    assert len(out) == len(frame)
+    np.testing.assert_allclose(out["prediction"], linear_model.predict(frame), rtol=1e-9)
+    assert not JobRunner(tmp_path / "jobs", pool.get).resume(job_id)  # done jobs don't restart
+
+
+def test_resume_keeps_the_model_it_was_submitted_with(tmp_path, registry, pool, frame, linear_model, ridge_model):
+    seen = []
+    on_chunk = cancel_after(tmp_path / "jobs", 1, seen)
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=100, on_chunk=on_chunk)
+    job_id = runner.submit(frame)
+    assert run(runner, job_id)["status"] == CANCELLED
+
+    registry.register(ridge_model, "Ridge_Regression", compile=False)  # a new current model
+    pool.live.reload()
+    assert pool.get().entry["model_name"] == "Ridge_Regression"
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=100)
+    runner.resume(job_id)
+    job = run(runner, job_id)
+    assert job["status"] == DONE
+    np.testing.assert_allclose(pd.read_csv(job["output"])["prediction"], linear_model.predict(frame), rtol=1e-9)
+
+
+def test_resume_refuses_a_changed_model(tmp_path, registry, pool, frame, ridge_model):
+    path = registry.models_dir / "XGBoost.pkl"
+    joblib.dump(ridge_model, path)
+    seen = []
+    on_chunk = cancel_after(tmp_path / "jobs", 1, seen)
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=100, on_chunk=on_chunk)
+    job_id = runner.submit(frame, model="XGBoost")
+    assert run(runner, job_id)["status"] == CANCELLED
+
+    path.unlink()
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=100)
+    with pytest.raises(KeyError):
+        runner.submit(frame, model="XGBoost")
+    joblib.dump(ridge_model.set_params(alpha=2.0).fit(frame, frame["liquidity_ratio"]), path)
+    runner.resume(job_id)
+    job = run(runner, job_id)
+    assert job["status"] == FAILED and "changed since the job was submitted" in job["error"]
+
+
+def test_admission_limits_jobs(tmp_path, pool, frame):
+    admission = AdmissionController(max_batch_jobs=1, max_queue=5, max_jobs_per_session=1)
+    seen, gate = [], threading.Event()
+    on_chunk = cancel_after(tmp_path / "jobs", 1, seen, gate)
+    runner = JobRunner(tmp_path / "jobs", pool.get, max_workers=1, chunk_size=100,
+                       admission=admission, on_chunk=on_chunk)
+    job_id = runner.submit(frame, owner="alice")
+    with pytest.raises(QueueFull):
+        runner.submit(frame, owner="alice")
+    assert runner.status(job_id)["status"] in ("queued", "running")
+    gate.set()
+    assert run(runner, job_id)["status"] == CANCELLED
+    assert admission.stats()["running"] == admission.stats()["queued"] == 0  # the slot was released
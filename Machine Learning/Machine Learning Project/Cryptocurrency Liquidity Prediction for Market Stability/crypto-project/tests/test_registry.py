@@ -0,0 +1,97 @@
+# tests/test_registry.py
+# Versions, activate / rollback, and hot reload of the served models.
+import copy
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from src.registry import CURRENT, LiveModel, ModelPool, ModelRegistry
+
+
+def broken(model):
+    """A copy of `model` that predicts NaN (fails validation)."""
+    model = copy.deepcopy(model)
+    model.coef_ = np.full_like(model.coef_, np.nan)
+    return model
+
+
+def touch_later(path):
+    """Bump the mtime so a rewrite within the same clock tick still counts as a change."""
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_register_activate_rollback(registry, ridge_model):
+    v1 = registry.current()
+    assert v1["model_name"] == "Linear_Regression" and registry.artifact(v1).exists()
+    v2 = registry.register(ridge_model, "Linear_Regression", compile=False)
+    assert registry.current()["version"] == v2["version"] != v1["version"]
+    assert registry.rollback()["version"] == v1["version"]
+    assert registry.current()["version"] == v1["version"]
+    with pytest.raises(ValueError):
+        registry.rollback()  # nothing before v1
+    registry.activate("Linear_Regression", v2["version"])
+    assert registry.current()["version"] == v2["version"]
+    with pytest.raises(ValueError):
+        registry.activate("Linear_Regression", "1999-01-01_v9")
+
+
+def test_register_without_activating(registry, ridge_model):
+    before = registry.current()
+    registry.register(ridge_model, "Ridge_Regression", activate=False, compile=False)
+    assert registry.current() == before
+    assert [v["model_name"] for v in registry.versions()] == ["Linear_Regression", "Ridge_Regression"]
+
+
+def test_old_versions_are_pruned(tmp_path, linear_model):
+    reg = ModelRegistry(tmp_path / "models", keep=2)
+    entries = [reg.register(linear_model, "Linear_Regression", compile=False) for _ in range(4)]
+    assert [v["version"] for v in reg.versions()] == [e["version"] for e in entries[-2:]]
+    assert not reg.artifact(entries[0]).exists()
+
+
+def test_live_model_hot_reload(registry, frame, ridge_model):
+    live = LiveModel(registry, poll_interval=3600)
+    first = live.get()
+    assert not live.reload()  # nothing changed
+    registry.register(ridge_model, "Ridge_Regression", compile=False)
+    assert live.reload()
+    assert live.get().entry["model_name"] == "Ridge_Regression"
+    np.testing.assert_allclose(live.get().backend.predict(frame.to_numpy()), ridge_model.predict(frame), rtol=1e-9)
+    assert first.entry["model_name"] == "Linear_Regression"  # holders of the old model are undisturbed
+
+
+def test_live_model_rejects_invalid_versions(registry, linear_model):
+    live = LiveModel(registry, poll_interval=3600)
+    registry.register(broken(linear_model), "Linear_Regression", compile=False)
+    assert not live.reload()
+    assert live.get().entry["version"] == registry.versions()[0]["version"]
+
+
+def test_pool_reloads_changed_files_and_keeps_the_last_good_one(registry, frame, linear_model, ridge_model):
+    pool = ModelPool(LiveModel(registry, poll_interval=3600))
+    path = registry.models_dir / "XGBoost.pkl"
+    joblib.dump(linear_model, path)
+    assert pool.names() == [CURRENT, "XGBoost"]
+    first = pool.get("XGBoost")
+    assert pool.get("XGBoost") is first  # cached while the file is unchanged
+
+    joblib.dump(ridge_model, path)
+    touch_later(path)
+    second = pool.get("XGBoost")
+    np.testing.assert_allclose(second.backend.predict(frame.to_numpy()), ridge_model.predict(frame), rtol=1e-9)
+
+    path.write_bytes(b"not a pickle")
+    touch_later(path)
+    assert pool.get("XGBoost") is second  # failed reload: keep serving the last good model
+    joblib.dump(broken(linear_model), path)
+    touch_later(path)
+    assert pool.get("XGBoost") is second
+
+    with pytest.raises(KeyError):
+        pool.get("Missing")
+    (registry.models_dir / "Bad.pkl").write_bytes(b"not a pickle")
+    with pytest.raises(Exception):
+        pool.get("Bad")  # nothing good to fall back to
@@ -0,0 +1,162 @@
+# tests/test_serve.py
+# Micro-batcher failure paths, the shadow scorer's queue and the HTTP layer on top.
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import joblib
+import numpy as np
+import pytest
+
+from src.inference import LinearBackend
+from src.predict import MODEL_FEATURES
+from src.serve import MicroBatcher, make_server
+from src.shadow import ShadowScorer
+
+ROW = {"price": 2.0, "1h": 1.0, "mkt_cap": 3.0}
+
+
+def backend(scale: float = 1.0) -> LinearBackend:
+    return LinearBackend(np.full(len(MODEL_FEATURES), scale), 0.5, MODEL_FEATURES)
+
+
+class FailingBackend:
+    feature_names = MODEL_FEATURES
+
+    def predict(self, X):
+        raise RuntimeError("predict failed")
+
+
+def test_rows_are_scored_and_labelled():
+    batches = []
+    batcher = MicroBatcher(lambda: (backend(), "m:v1"), max_wait_ms=20,
+                           on_batch=lambda X, names, preds, s: batches.append(len(X)))
+    futures = [batcher.submit(dict(ROW, price=float(i))) for i in range(10)]
+    results = [f.result(timeout=5) for f in futures]
+    assert results == [(i + 1.0 + 3.0 + 0.5, "m:v1") for i in range(10)]
+    assert sum(batches) == 10 and len(batches) < 10  # coalesced
+
+
+def test_a_failing_model_lookup_fails_the_batch_not_the_batcher():
+    state = {"fail": True}
+
+    def source():
+        if state["fail"]:
+            raise FileNotFoundError("model file is gone")
+        return backend(), "m:v2"
+
+    batcher = MicroBatcher(source, max_wait_ms=1)
+    with pytest.raises(FileNotFoundError):
+        batcher.predict_row(ROW, timeout=5)
+    state["fail"] = False
+    assert batcher.predict_row(ROW, timeout=5) == (6.5, "m:v2")
+
+
+def test_a_failing_predict_fails_the_batch_not_the_batcher():
+    current = {"backend": FailingBackend()}
+    seen = []
+    batcher = MicroBatcher(lambda: (current["backend"], "m"), max_wait_ms=1,
+                           on_batch=lambda *args: seen.append(args))
+    with pytest.raises(RuntimeError, match="predict failed"):
+        batcher.predict_row(ROW, timeout=5)
+    assert seen == []  # failed batches are not observed
+    current["backend"] = backend(2.0)
+    assert batcher.predict_row(ROW, timeout=5) == (12.5, "m")
+
+
+def test_each_batch_reports_the_model_that_scored_it():
+    label = {"name": "m:v1"}
+    batcher = MicroBatcher(lambda: (backend(), label["name"]), max_wait_ms=1)
+    assert batcher.predict_row(ROW, timeout=5)[1] == "m:v1"
+    label["name"] = "m:v2"  # a hot reload between batches
+    assert batcher.predict_row(ROW, timeout=5)[1] == "m:v2"
+
+
+def wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_shadow_scores_observed_batches():
+    shadow = ShadowScorer(lambda: backend(2.0), name="double")
+    X = np.ones((4, len(MODEL_FEATURES)))
+    primary = backend().predict(X)
+    shadow.observe(X, MODEL_FEATURES, primary, 0.001)
+    wait_for(lambda: shadow.metrics()["rows"] == 4)
+    metrics = shadow.metrics()
+    assert metrics["delta_mean"] == pytest.approx(len(MODEL_FEATURES))
+    assert metrics["errors"] == 0 and metrics["pending_rows"] == 0
+    shadow.close()
+
+
+def test_shadow_skips_empty_batches():
+    shadow = ShadowScorer(lambda: backend(), name="same")
+    shadow.observe(np.empty((0, len(MODEL_FEATURES))), MODEL_FEATURES, np.empty(0), 0.0)
+    shadow.observe(np.ones((1, len(MODEL_FEATURES))), MODEL_FEATURES, [8.5], 0.0)
+    wait_for(lambda: shadow.metrics()["rows"] == 1)
+    metrics = shadow.metrics()
+    assert metrics["calls"] == 1 and metrics["errors"] == 0
+    shadow.close()
+
+
+def test_shadow_queue_is_bounded_by_rows():
+    gate = threading.Event()
+
+    def slow_source():
+        gate.wait(5)
+        return backend()
+
+    shadow = ShadowScorer(slow_source, max_pending_rows=100, max_batch_rows=50)
+    X = np.ones((80, len(MODEL_FEATURES)))
+    for _ in range(5):
+        shadow.observe(X, MODEL_FEATURES, backend().predict(X), 0.0)
+    metrics = shadow.metrics()
+    assert metrics["sampled_out_rows"] == 5 * 30  # each batch sampled down to 50 rows
+    assert metrics["pending_rows"] <= 100 and metrics["dropped"] >= 2
+    gate.set()
+    shadow.close()
+
+
+@pytest.fixture
+def server(registry):
+    srv = make_server(host="127.0.0.1", port=0, models_dir=registry.models_dir, poll_interval=3600)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def post(srv, path: str, payload) -> tuple:
+    req = urllib.request.Request(f"http://127.0.0.1:{srv.server_address[1]}{path}",
+                                 data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_named_model_keeps_serving_through_a_bad_reload(server, registry, linear_model):
+    path = registry.models_dir / "XGBoost.pkl"
+    joblib.dump(linear_model, path)
+    status, first = post(server, "/predict?model=XGBoost", ROW)
+    assert status == 200 and first["model"] == "XGBoost"
+
+    path.write_bytes(b"not a pickle")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    for _ in range(2):
+        status, body = post(server, "/predict?model=XGBoost", ROW)
+        assert status == 200 and body["liquidity_score"] == first["liquidity_score"]
+
+    path.unlink()
+    assert post(server, "/predict?model=XGBoost", ROW)[0] == 404
+    status, body = post(server, "/predict", ROW)
+    assert status == 200 and body["model"].startswith("Linear_Regression:")
+    assert post(server, "/predict_batch", {"rows": []}) == (200, {"predictions": [], "model": body["model"]})